@@ -0,0 +1,133 @@
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+from .config import settings
+
+
+class AdmissionRejected(Exception):
+    """Raised when a login or registration attempt is shed before any hashing."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class TokenBuckets:
+    """Per-key token buckets refilled at a fixed rate, bounded to max_keys."""
+
+    def __init__(self, rate_per_minute: float, burst: int, max_keys: int):
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+
+    def try_acquire(self, key: str) -> float:
+        """Take one token for key. Returns 0 on success, else seconds until one is available."""
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = [float(self.burst), now]
+            self._buckets[key] = bucket
+            # Idle keys fall off the front; a forgotten key simply starts with a full bucket
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            tokens, last = bucket
+            bucket[0] = min(float(self.burst), tokens + (now - last) * self.rate)
+            bucket[1] = now
+            self._buckets.move_to_end(key)
+
+        if bucket[0] >= 1.0:
+            bucket[0] -= 1.0
+            return 0.0
+        if self.rate <= 0:
+            return 60.0
+        return (1.0 - bucket[0]) / self.rate
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class LoginAdmission:
+    """In-process admission control for the token and register endpoints.
+
+    Attempts are checked against per-email and per-client-IP token buckets
+    before the user lookup, and every bcrypt call must hold one of a fixed
+    number of verification slots. Both checks reject immediately instead of
+    queueing, so a flood costs no hashing work.
+
+    The buckets and slots live in each worker process. Keep-alive pins a
+    client to one worker, so the configured limits apply per process as
+    they are; across the deployment a key may get up to workers times them.
+    """
+
+    def __init__(
+        self,
+        email_rate_per_minute: float,
+        email_burst: int,
+        ip_rate_per_minute: float,
+        ip_burst: int,
+        max_concurrent_verifications: int,
+        max_keys: int,
+    ):
+        self.email_buckets = TokenBuckets(email_rate_per_minute, email_burst, max_keys)
+        self.ip_buckets = TokenBuckets(ip_rate_per_minute, ip_burst, max_keys)
+        self.max_concurrent_verifications = max_concurrent_verifications
+        self.active_verifications = 0
+        self.admitted = 0
+        self.rejected_email = 0
+        self.rejected_ip = 0
+        self.rejected_concurrency = 0
+
+    def admit(self, scope: str, email: str, client_ip: Optional[str]) -> None:
+        """Charge one attempt to the email and client IP buckets or raise AdmissionRejected."""
+        if client_ip:
+            wait = self.ip_buckets.try_acquire(f"{scope}:{client_ip}")
+            if wait:
+                self.rejected_ip += 1
+                raise AdmissionRejected("Too many attempts from this client", wait)
+
+        wait = self.email_buckets.try_acquire(f"{scope}:{email.strip().lower()}")
+        if wait:
+            self.rejected_email += 1
+            raise AdmissionRejected("Too many attempts for this account", wait)
+
+        self.admitted += 1
+
+    @asynccontextmanager
+    async def verification_slot(self):
+        """Hold one of the global password verification slots, failing fast when none is free."""
+        if self.active_verifications >= self.max_concurrent_verifications:
+            self.rejected_concurrency += 1
+            raise AdmissionRejected("Too many concurrent sign-in attempts", 1.0)
+
+        self.active_verifications += 1
+        try:
+            yield
+        finally:
+            self.active_verifications -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "admitted": self.admitted,
+            "rejected_email": self.rejected_email,
+            "rejected_ip": self.rejected_ip,
+            "rejected_concurrency": self.rejected_concurrency,
+            "active_verifications": self.active_verifications,
+            "max_concurrent_verifications": self.max_concurrent_verifications,
+            "tracked_emails": len(self.email_buckets),
+            "tracked_ips": len(self.ip_buckets),
+        }
+
+
+login_admission = LoginAdmission(
+    email_rate_per_minute=settings.LOGIN_RATE_PER_EMAIL_PER_MINUTE,
+    email_burst=settings.LOGIN_BURST_PER_EMAIL,
+    ip_rate_per_minute=settings.LOGIN_RATE_PER_IP_PER_MINUTE,
+    ip_burst=settings.LOGIN_BURST_PER_IP,
+    max_concurrent_verifications=settings.LOGIN_MAX_CONCURRENT_VERIFICATIONS,
+    max_keys=settings.LOGIN_ADMISSION_MAX_KEYS,
+)
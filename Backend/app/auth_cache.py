@@ -0,0 +1,32 @@
+from typing import Any, Dict
+
+from .cache import TTLCache
+from .config import settings
+
+# Verified JWTs mapped to the user id in their "sub" claim. Entries never
+# outlive the token's own "exp".
+token_cache = TTLCache(
+    max_entries=settings.AUTH_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.TOKEN_CACHE_TTL_SECONDS,
+)
+
+# Resolved User principals keyed by user id. The TTL bounds how long a change
+# made by another worker process can go unnoticed.
+principal_cache = TTLCache(
+    max_entries=settings.AUTH_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+def invalidate_user(user_id: str) -> None:
+    """Drop the cached principal for a user that was updated or deactivated."""
+    principal_cache.invalidate(str(user_id))
+
+def clear() -> None:
+    token_cache.clear()
+    principal_cache.clear()
+
+def cache_stats() -> Dict[str, Any]:
+    return {
+        "tokens": token_cache.stats(),
+        "principals": principal_cache.stats(),
+    }
@@ -0,0 +1,95 @@
+"""Conditional GET: ETag, Last-Modified and Cache-Control for read endpoints.
+
+A route describes the documents it is about to return with a small key
+that changes whenever they do, then lets conditional_get answer 304 Not
+Modified when the client already holds that version:
+
+    key = (fingerprint(crops), next_cursor)
+    headers = conditional_get(request, response, CATALOGUE_CACHE_CONTROL, key, last_modified(crops))
+
+The ETag hashes the key, not the documents, so a 304 skips response model
+validation and JSON rendering, which dominate the cost of these routes,
+without serializing the payload just to compare it.
+"""
+
+import hashlib
+import json
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Request, Response, status
+
+
+def entity_tag(key: Any) -> str:
+    """Strong ETag over a validator key such as fingerprint() builds."""
+    encoded = json.dumps(key, default=str, sort_keys=True, separators=(",", ":")).encode()
+    return f'"{hashlib.blake2b(encoded, digest_size=16).hexdigest()}"'
+
+
+def last_modified(documents: Iterable[Dict[str, Any]], field: str = "updated_at") -> Optional[datetime]:
+    """Latest value of field across documents, or None when none carries it."""
+    return max((d[field] for d in documents if d and d.get(field)), default=None)
+
+
+def fingerprint(documents: Sequence[Dict[str, Any]], field: str = "updated_at",
+                values: Optional[str] = None) -> Tuple[Any, ...]:
+    """Cheap stand-in for documents in a validator key.
+
+    Their count, the latest value of field, the first and last ids and,
+    given values, every document's value of that field, for documents such
+    as prices that are corrected in place without a newer timestamp.
+    """
+    if not documents:
+        return (0,)
+    key = (len(documents), last_modified(documents, field), documents[0].get("_id"), documents[-1].get("_id"))
+    if values is not None:
+        key += (tuple(d.get(values) for d in documents),)
+    return key
+
+
+def validators(key: Any, cache_control: str, modified: Optional[datetime] = None) -> Dict[str, str]:
+    headers = {"ETag": entity_tag(key), "Cache-Control": cache_control}
+    if modified is not None:
+        if modified.tzinfo is None:
+            modified = modified.replace(tzinfo=timezone.utc)
+        headers["Last-Modified"] = format_datetime(modified.astimezone(timezone.utc), usegmt=True)
+    return headers
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match uses the weak comparison: W/"x" matches "x"
+    if if_none_match.strip() == "*":
+        return True
+    tags = (tag.strip() for tag in if_none_match.split(","))
+    return any((tag[2:] if tag.startswith("W/") else tag) == etag for tag in tags)
+
+
+def _not_modified_since(if_modified_since: str, modified: str) -> bool:
+    try:
+        return parsedate_to_datetime(modified) <= parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+
+
+def _fresh(request: Request, headers: Dict[str, str]) -> bool:
+    # If-Modified-Since is only consulted without If-None-Match (RFC 9110 13.2.2)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, headers["ETag"])
+    if_modified_since = request.headers.get("if-modified-since")
+    return bool(if_modified_since and "Last-Modified" in headers
+                and _not_modified_since(if_modified_since, headers["Last-Modified"]))
+
+
+def conditional_get(request: Request, response: Response, cache_control: str, key: Any,
+                    modified: Optional[datetime] = None) -> Dict[str, str]:
+    """Set the validators for key on response, or raise 304 if the client holds that version.
+
+    Returns the headers for routes that build their own JSONResponse.
+    """
+    headers = validators(key, cache_control, modified)
+    if _fresh(request, headers):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return headers
@@ -18,25 +18,108 @@ class Settings(BaseModel):
     JWT_ALGORITHM: str = os.getenv("JWT_ALGORITHM", "HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
     
+    # Authentication Cache Settings
+    AUTH_CACHE_MAX_ENTRIES: int = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000"))
+    TOKEN_CACHE_TTL_SECONDS: int = int(os.getenv("TOKEN_CACHE_TTL_SECONDS", "900"))
+    PRINCIPAL_CACHE_TTL_SECONDS: int = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+    MARKETS_CACHE_TTL_SECONDS: int = int(os.getenv("MARKETS_CACHE_TTL_SECONDS", "60"))
+    CATALOGUE_CACHE_MAX_ENTRIES: int = int(os.getenv("CATALOGUE_CACHE_MAX_ENTRIES", "2048"))
+    CATALOGUE_CACHE_TTL_SECONDS: int = int(os.getenv("CATALOGUE_CACHE_TTL_SECONDS", "300"))
+    
+    # Password Hashing Settings
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    PASSWORD_HASH_EXECUTOR: str = os.getenv("PASSWORD_HASH_EXECUTOR", "thread")  # "thread" or "process"
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+    PASSWORD_HASH_QUEUE_SIZE: int = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", "64"))
+    
+    # Login Admission Control Settings
+    LOGIN_RATE_PER_EMAIL_PER_MINUTE: float = float(os.getenv("LOGIN_RATE_PER_EMAIL_PER_MINUTE", "10"))
+    LOGIN_BURST_PER_EMAIL: int = int(os.getenv("LOGIN_BURST_PER_EMAIL", "5"))
+    LOGIN_RATE_PER_IP_PER_MINUTE: float = float(os.getenv("LOGIN_RATE_PER_IP_PER_MINUTE", "60"))
+    LOGIN_BURST_PER_IP: int = int(os.getenv("LOGIN_BURST_PER_IP", "20"))
+    LOGIN_MAX_CONCURRENT_VERIFICATIONS: int = int(os.getenv("LOGIN_MAX_CONCURRENT_VERIFICATIONS", "16"))
+    LOGIN_ADMISSION_MAX_KEYS: int = int(os.getenv("LOGIN_ADMISSION_MAX_KEYS", "100000"))
+    
+    # Admin Settings; comma separated emails allowed on admin-only endpoints
+    ADMIN_EMAILS: List[str] = [e.strip().lower() for e in os.getenv("ADMIN_EMAILS", "").split(",") if e.strip()]
+    
     # Database Settings
     MONGO_USER: str = os.getenv("MONGO_USER", "")
     MONGO_PASSWORD: str = os.getenv("MONGO_PASSWORD", "")
     MONGO_CLUSTER: str = os.getenv("MONGO_CLUSTER", "")
     DB_NAME: str = os.getenv("MONGO_DB_NAME", "")
+    AUTO_CREATE_INDEXES: bool = os.getenv("AUTO_CREATE_INDEXES", "True").lower() == "true"
+    # Motor connection pool, one per worker process
+    MONGO_MAX_POOL_SIZE: int = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+    MONGO_MIN_POOL_SIZE: int = int(os.getenv("MONGO_MIN_POOL_SIZE", "10"))
+    MONGO_MAX_IDLE_TIME_MS: int = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000"))
+    MONGO_WAIT_QUEUE_TIMEOUT_MS: int = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "10000"))
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "30000"))
+    MONGO_CONNECT_TIMEOUT_MS: int = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "20000"))
+    # Wire compression in order of preference; zstd and snappy need pymongo[zstd,snappy]
+    MONGO_COMPRESSORS: str = os.getenv("MONGO_COMPRESSORS", "zstd,snappy,zlib")
+    STORAGE_BACKEND: str = os.getenv("STORAGE_BACKEND", "mongo")  # "mongo" or "sqlite"
+    SQLITE_PATH: str = os.getenv(
+        "SQLITE_PATH",
+        os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data", "fasalsaathi.db")
+    )
     
     @property
     def MONGO_DATABASE_URI(self) -> str:
         return f"mongodb+srv://{self.MONGO_USER}:{self.MONGO_PASSWORD}@{self.MONGO_CLUSTER}.mongodb.net/{self.DB_NAME}?retryWrites=true&w=majority"
     
+    # Write-behind Settings (weather and market price ingestion)
+    WRITE_BEHIND_ENABLED: bool = os.getenv("WRITE_BEHIND_ENABLED", "False").lower() == "true"
+    WRITE_BEHIND_BATCH_SIZE: int = int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "500"))
+    WRITE_BEHIND_FLUSH_INTERVAL_MS: int = int(os.getenv("WRITE_BEHIND_FLUSH_INTERVAL_MS", "250"))
+    WRITE_BEHIND_MAX_QUEUE: int = int(os.getenv("WRITE_BEHIND_MAX_QUEUE", "10000"))
+    WRITE_BEHIND_ENQUEUE_TIMEOUT_MS: int = int(os.getenv("WRITE_BEHIND_ENQUEUE_TIMEOUT_MS", "1000"))
+    WRITE_BEHIND_RETRIES: int = int(os.getenv("WRITE_BEHIND_RETRIES", "3"))
+    WRITE_BEHIND_RETRY_BACKOFF_MS: int = int(os.getenv("WRITE_BEHIND_RETRY_BACKOFF_MS", "100"))
+    
+    # Bulk Ingest Settings (POST /market/prices/bulk)
+    BULK_INGEST_CHUNK_SIZE: int = int(os.getenv("BULK_INGEST_CHUNK_SIZE", "1000"))
+    BULK_INGEST_MAX_ERRORS: int = int(os.getenv("BULK_INGEST_MAX_ERRORS", "1000"))
+    
+    # Forecast Settings (app/forecasting.py)
+    FORECAST_SCHEDULE_ENABLED: bool = os.getenv("FORECAST_SCHEDULE_ENABLED", "False").lower() == "true"
+    FORECAST_INTERVAL_MINUTES: int = int(os.getenv("FORECAST_INTERVAL_MINUTES", "360"))
+    FORECAST_HISTORY_DAYS: int = int(os.getenv("FORECAST_HISTORY_DAYS", "180"))
+    FORECAST_HORIZON_DAYS: int = int(os.getenv("FORECAST_HORIZON_DAYS", "14"))
+    FORECAST_MIN_HISTORY_DAYS: int = int(os.getenv("FORECAST_MIN_HISTORY_DAYS", "28"))
+    
+    # Streaming Settings
+    STREAM_BATCH_SIZE: int = int(os.getenv("STREAM_BATCH_SIZE", "500"))
+    
     # CORS Settings
     CORS_ORIGINS: List[str] = ["*"]
-    HOST: str = "127.0.0.1"
-    PORT: int = 8000
+    
+    # Server Settings (read by run.py)
+    HOST: str = os.getenv("HOST", "127.0.0.1")
+    PORT: int = int(os.getenv("PORT", "8000"))
+    # Worker processes; each one opens its own database pool and HTTP clients
+    WORKERS: int = int(os.getenv("WORKERS", os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1))))
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "info")
+    ACCESS_LOG: bool = os.getenv("ACCESS_LOG", "True").lower() == "true"
+    KEEP_ALIVE_TIMEOUT: int = int(os.getenv("KEEP_ALIVE_TIMEOUT", "60"))
+    # Seconds a worker waits for in-flight requests to finish after SIGTERM
+    GRACEFUL_SHUTDOWN_TIMEOUT: int = int(os.getenv("GRACEFUL_SHUTDOWN_TIMEOUT", "30"))
+    RELOAD: bool = os.getenv("RELOAD", "False").lower() == "true"
     
     # ML Model Settings
     MODEL_PATH: str = "app/ml_models"
     
     # External APIs
     WEATHER_API_KEY: str = "8f945372fa522a39510cade87c27e8bf"
+    WEATHER_API_BASE_URL: str = os.getenv("WEATHER_API_BASE_URL", "https://api.openweathermap.org/data/2.5")
+    # Shared OpenWeather HTTP client (app/services/weather_service.py), one pool per worker
+    WEATHER_HTTP_MAX_CONNECTIONS: int = int(os.getenv("WEATHER_HTTP_MAX_CONNECTIONS", "20"))
+    WEATHER_HTTP_MAX_KEEPALIVE: int = int(os.getenv("WEATHER_HTTP_MAX_KEEPALIVE", "10"))
+    WEATHER_HTTP_KEEPALIVE_EXPIRY_SECONDS: float = float(os.getenv("WEATHER_HTTP_KEEPALIVE_EXPIRY_SECONDS", "30"))
+    WEATHER_HTTP_CONNECT_TIMEOUT_SECONDS: float = float(os.getenv("WEATHER_HTTP_CONNECT_TIMEOUT_SECONDS", "3"))
+    WEATHER_HTTP_READ_TIMEOUT_SECONDS: float = float(os.getenv("WEATHER_HTTP_READ_TIMEOUT_SECONDS", "10"))
+    WEATHER_HTTP_POOL_TIMEOUT_SECONDS: float = float(os.getenv("WEATHER_HTTP_POOL_TIMEOUT_SECONDS", "5"))
+    WEATHER_HTTP_RETRIES: int = int(os.getenv("WEATHER_HTTP_RETRIES", "2"))
+    WEATHER_HTTP_RETRY_BACKOFF_MS: int = int(os.getenv("WEATHER_HTTP_RETRY_BACKOFF_MS", "200"))
 
 settings = Settings()
\ No newline at end of file
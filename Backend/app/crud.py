@@ -1,141 +1,234 @@
-from motor.motor_asyncio import AsyncIOMotorDatabase
-from bson import ObjectId
-from passlib.context import CryptContext
 from . import schemas
+from .security import password_hasher
+from .storage import DuplicateRecord, Storage
+from .write_behind import write_behind
+from .rollups import period_start, refresh_price_rollups
+from .auth_cache import invalidate_user
+from .reference_cache import bump_catalogue_version, catalogue_cache, catalogue_key, markets_cache, projection_key
 from datetime import datetime, timedelta
 import logging
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
-pwd_context = CryptContext(
-    schemes=["bcrypt"],
-    deprecated="auto",
-    bcrypt__rounds=12,
-    bcrypt__ident="2b"
-)
+def _now() -> datetime:
+    # BSON dates have millisecond precision; truncate so returned documents match what is stored
+    now = datetime.utcnow()
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+def _stamp(document: dict, with_updated_at: bool = True) -> dict:
+    """Set creation (and update) timestamps on a document about to be inserted."""
+    now = _now()
+    document["created_at"] = now
+    if with_updated_at:
+        document["updated_at"] = now
+    return document
+
+def _since(days: int) -> datetime:
+    return datetime.utcnow() - timedelta(days=days)
 
 # User CRUD
-async def get_user_by_email(db: AsyncIOMotorDatabase, email: str):
-    return await db.users.find_one({"email": email})
+async def get_user_by_email(db: Storage, email: str):
+    return await db.get_user_by_email(email)
 
-async def create_user(db: AsyncIOMotorDatabase, user: schemas.UserCreate):
+async def create_user(db: Storage, user: schemas.UserCreate):
     try:
-        # Check if user already exists
-        if await db.users.find_one({"email": user.email}):
-            raise ValueError("Email already registered")
-
-        # Hash the password
-        hashed_password = pwd_context.hash(user.password)
+        # Hash the password off the event loop
+        hashed_password = await password_hasher.hash(user.password)
         
         # Prepare user document
         user_dict = user.model_dump(exclude_unset=True)
         user_dict["hashed_password"] = hashed_password
         user_dict["is_active"] = True
-        user_dict["created_at"] = datetime.utcnow()
-        user_dict["updated_at"] = datetime.utcnow()
+        _stamp(user_dict)
         del user_dict["password"]  # Remove plain password
         
-        # Insert into database
-        result = await db.users.insert_one(user_dict)
+        # Insert into database; the unique indexes reject duplicates
+        try:
+            await db.insert_one("users", user_dict)
+        except DuplicateRecord as e:
+            if e.field == "phone":
+                raise ValueError("Phone number already registered")
+            raise ValueError("Email already registered")
         
-        # Fetch and return the new user
-        new_user = await db.users.find_one({"_id": result.inserted_id})
-        if new_user:
-            # Convert ObjectId to string and update the document
-            new_user["_id"] = str(new_user["_id"])
-            return new_user
-        else:
-            raise ValueError("Failed to create user")
+        # The inserted document is what was stored, no need to read it back
+        return user_dict
     except Exception as e:
         logger.error(f"Error creating user: {str(e)}")
         raise
 
-async def get_user(db: AsyncIOMotorDatabase, user_id: str):
-    return await db.users.find_one({"_id": ObjectId(user_id)})
+async def get_user(db: Storage, user_id: str):
+    return await db.get_user(user_id)
+
+async def _update_user(db: Storage, user_id: str, changes: dict):
+    changes["updated_at"] = _now()
+    try:
+        user = await db.update_user(user_id, changes)
+    except DuplicateRecord as e:
+        raise ValueError(f"{(e.field or 'Value').capitalize()} already registered")
+    # The cached principal would keep serving the old fields, or an
+    # account that was just deactivated, until its TTL ran out
+    invalidate_user(user_id)
+    return user
+
+async def update_user(db: Storage, user_id: str, user_update: schemas.UserUpdate):
+    return await _update_user(db, user_id, user_update.model_dump(exclude_none=True))
+
+async def set_user_active(db: Storage, user_id: str, is_active: bool):
+    return await _update_user(db, user_id, {"is_active": is_active})
 
 # Farm CRUD
-async def create_farm(db: AsyncIOMotorDatabase, farm: schemas.FarmCreate, owner_id: str):
+async def create_farm(db: Storage, farm: schemas.FarmCreate, owner_id: str):
     farm_dict = farm.model_dump()
     farm_dict["owner_id"] = owner_id
-    result = await db.farms.insert_one(farm_dict)
-    new_farm = await db.farms.find_one({"_id": result.inserted_id})
-    return new_farm
+    _stamp(farm_dict)
+    return await db.insert_one("farms", farm_dict)
 
-async def get_farms_by_owner(db: AsyncIOMotorDatabase, owner_id: str, skip: int = 0, limit: int = 100):
-    return await db.farms.find({"owner_id": owner_id}).skip(skip).limit(limit).to_list(length=limit)
+async def get_farms_by_owner(db: Storage, owner_id: str, cursor: str = None, limit: int = 100, projection: dict = None):
+    return await db.get_farms_by_owner(owner_id, cursor, limit, projection)
 
-async def get_farm(db: AsyncIOMotorDatabase, farm_id: str, owner_id: str):
-    return await db.farms.find_one({"_id": ObjectId(farm_id), "owner_id": owner_id})
+async def get_farm(db: Storage, farm_id: str, owner_id: str, projection: dict = None):
+    return await db.get_farm(farm_id, owner_id, projection)
 
-async def update_farm(db: AsyncIOMotorDatabase, farm_id: str, farm_update: schemas.FarmCreate, owner_id: str):
-    await db.farms.update_one({"_id": ObjectId(farm_id), "owner_id": owner_id}, {"$set": farm_update.model_dump()})
-    updated_farm = await db.farms.find_one({"_id": ObjectId(farm_id)})
-    return updated_farm
+async def update_farm(db: Storage, farm_id: str, farm_update: schemas.FarmCreate, owner_id: str):
+    changes = farm_update.model_dump()
+    changes["updated_at"] = _now()
+    return await db.update_farm(farm_id, owner_id, changes)
 
-async def delete_farm(db: AsyncIOMotorDatabase, farm_id: str, owner_id: str):
-    result = await db.farms.delete_one({"_id": ObjectId(farm_id), "owner_id": owner_id})
-    return result.deleted_count > 0
+async def delete_farm(db: Storage, farm_id: str, owner_id: str):
+    return await db.delete_farm(farm_id, owner_id)
 
 # Crop CRUD
-async def list_crops(db: AsyncIOMotorDatabase, season: str = None):
-    query = {}
-    if season:
-        query["season"] = season
-    return await db.crops.find(query).to_list(length=100)
-
-async def get_crop(db: AsyncIOMotorDatabase, crop_id: str):
-    return await db.crops.find_one({"_id": ObjectId(crop_id)})
-
-async def get_crop_diseases(db: AsyncIOMotorDatabase, crop_id: str):
-    return await db.diseases.find({"crop_id": crop_id}).to_list(length=100)
-
-async def create_crop(db: AsyncIOMotorDatabase, crop: schemas.CropCreate):
-    crop_dict = crop.model_dump()
-    result = await db.crops.insert_one(crop_dict)
-    new_crop = await db.crops.find_one({"_id": result.inserted_id})
-    return new_crop
-
-async def create_disease(db: AsyncIOMotorDatabase, disease: schemas.DiseaseCreate):
-    disease_dict = disease.model_dump()
-    result = await db.diseases.insert_one(disease_dict)
-    new_disease = await db.diseases.find_one({"_id": result.inserted_id})
-    return new_disease
+async def _catalogue_read(key: tuple, load):
+    """Read through the catalogue cache; misses (None) are not cached."""
+    key = catalogue_key(*key)
+    value = catalogue_cache.get(key)
+    if value is None:
+        value = await load()
+        if value is not None:
+            catalogue_cache.set(key, value)
+    return value
+
+async def list_crops(db: Storage, season: str = None, cursor: str = None, limit: int = 100, projection: dict = None):
+    return await _catalogue_read(
+        ("crops", season, cursor, limit, projection_key(projection)),
+        lambda: db.list_crops(season, cursor, limit, projection),
+    )
+
+async def get_crop(db: Storage, crop_id: str, projection: dict = None):
+    return await _catalogue_read(("crop", crop_id, projection_key(projection)), lambda: db.get_crop(crop_id, projection))
+
+async def get_crop_diseases(db: Storage, crop_id: str, cursor: str = None, limit: int = 100, projection: dict = None):
+    return await _catalogue_read(
+        ("diseases", crop_id, cursor, limit, projection_key(projection)),
+        lambda: db.get_crop_diseases(crop_id, cursor, limit, projection),
+    )
+
+async def create_crop(db: Storage, crop: schemas.CropCreate):
+    document = await db.insert_one("crops", _stamp(crop.model_dump()))
+    bump_catalogue_version()
+    return document
+
+async def create_disease(db: Storage, disease: schemas.DiseaseCreate):
+    document = await db.insert_one("diseases", _stamp(disease.model_dump()))
+    bump_catalogue_version()
+    return document
 
 # Market CRUD
-async def get_current_prices(db: AsyncIOMotorDatabase, market: str = None, crop_id: str = None):
-    query = {"date": {"$gte": datetime.utcnow().date()}}
-    if market:
-        query["market_name"] = market
-    if crop_id:
-        query["crop_id"] = crop_id
-    return await db.market_prices.find(query).sort("market_name").to_list(length=100)
-
-async def get_price_history(db: AsyncIOMotorDatabase, crop_id: str, days: int = 30):
-    return await db.market_prices.find({"crop_id": crop_id}).sort("date", -1).limit(days).to_list(length=days)
-
-async def get_markets(db: AsyncIOMotorDatabase):
-    return await db.market_prices.distinct("market_name")
-
-async def create_market_price(db: AsyncIOMotorDatabase, price: schemas.MarketPriceCreate):
-    price_dict = price.model_dump()
-    result = await db.market_prices.insert_one(price_dict)
-    new_price = await db.market_prices.find_one({"_id": result.inserted_id})
-    return new_price
+async def get_current_prices(db: Storage, market: str = None, crop_id: str = None, limit: int = 100, projection: dict = None):
+    """Latest price of each crop in each market, from the view kept by rollups.refresh_price_rollups."""
+    return await db.get_latest_prices(market, crop_id, limit, projection)
 
-# Weather CRUD
-async def get_weather_history(db: AsyncIOMotorDatabase, location: str, days: int = 30):
-    return await db.weather_data.find({
-        "location": location,
-        "date": {"$gte": datetime.utcnow() - timedelta(days=days)}
-    }).sort("date", -1).to_list(length=days)
+async def get_price_history(db: Storage, crop_id: str, days: int = 30, cursor: str = None, limit: int = 100, projection: dict = None):
+    return await db.get_price_history(crop_id, _since(days), cursor, limit, projection)
+
+def stream_price_history(db: Storage, crop_id: str, days: int = 30, batch_size: int = 500, projection: dict = None):
+    """Iterate the whole price history window in batches, newest first."""
+    return db.stream_price_history(crop_id, _since(days), batch_size, projection)
+
+async def get_market_registry(db: Storage):
+    markets = markets_cache.get("markets")
+    if markets is None:
+        markets = await db.get_markets()
+        markets_cache.set("markets", markets)
+    return markets
 
-async def create_weather_data(db: AsyncIOMotorDatabase, weather: schemas.WeatherDataCreate):
-    weather_dict = weather.model_dump()
-    result = await db.weather_data.insert_one(weather_dict)
-    new_weather = await db.weather_data.find_one({"_id": result.inserted_id})
-    return new_weather
+async def get_markets(db: Storage):
+    return [market["name"] for market in await get_market_registry(db)]
 
+async def create_market_price(db: Storage, price: schemas.MarketPriceCreate):
+    try:
+        document = await db.insert_one("market_prices", _stamp(price.model_dump(), with_updated_at=False))
+    except DuplicateRecord:
+        # One price per (crop_id, market_name, date); the bulk endpoint updates existing ones
+        raise ValueError("A price for this crop, market and date already exists")
+    await refresh_price_rollups(db, [document])
+    return document
+
+async def upsert_market_prices(db: Storage, prices: list):
+    """Upsert MarketPriceCreate rows keyed on (crop_id, market_name, date); returns (inserted, updated)."""
+    now = _now()
+    documents = [{**price.model_dump(), "created_at": now} for price in prices]
+    counts = await db.upsert_market_prices(documents)
+    await refresh_price_rollups(db, documents)
+    return counts
+
+async def get_price_rollups(db: Storage, crop_id: str, period: str, days: int = 365, market: str = None):
+    # Start at the period boundary so the oldest rollup returned is a whole one
+    return await db.get_price_rollups(crop_id, period, period_start(_since(days), period), market)
+
+def _price_change(first_price: float, current_price: float):
+    return (current_price - first_price) / first_price * 100 if first_price else None
+
+def _market_trends(stats: dict) -> dict:
+    if not stats["count"]:
+        return {"trend": "insufficient_data", "forecast": stats["forecast"]}
+
+    # Latest price against the mean of the first day in the window
+    if stats["count"] >= 2:
+        price_change = _price_change(stats["first_price"], stats["current_price"])
+        trend = "rising" if price_change and price_change > 0 else "falling"
+    else:
+        price_change = None
+        trend = "stable"
+    for market in stats["markets"]:
+        market["price_change"] = _price_change(market["first_price"], market["current_price"])
+    return {
+        "trend": trend,
+        "current_price": stats["current_price"],
+        "average_price": stats["average_price"],
+        "price_change": price_change,
+        "volatility": stats["volatility"],
+        "markets": stats["markets"],
+        "series": stats["series"],
+        "forecast": stats["forecast"],
+    }
+
+async def get_market_trends(db: Storage, crop_id: str, days: int = 90, markets: list = None):
+    """Trend analysis over the daily rollups of the last `days` days; None if the crop does not exist."""
+    trends = await get_market_trends_batch(db, [crop_id], days=days, markets=markets)
+    return trends.get(crop_id)
+
+async def get_market_trends_batch(db: Storage, crop_ids: list, days: int = 90, markets: list = None):
+    """Trend analysis for several crops in one query, keyed by crop id; missing crops are left out."""
+    stats = await db.get_price_trends(crop_ids, period_start(_since(days), "day"), markets)
+    return {crop_id: _market_trends(crop_stats) for crop_id, crop_stats in stats.items()}
+
+async def queue_market_price(price: schemas.MarketPriceCreate) -> int:
+    """Queue a price for the write-behind buffer; returns the queue depth."""
+    return await write_behind.enqueue("market_prices", _stamp(price.model_dump(), with_updated_at=False))
+
+# Weather CRUD
+async def get_weather_history(db: Storage, location: str, days: int = 30, cursor: str = None, limit: int = 100):
+    return await db.get_weather_history(location, _since(days), cursor, limit)
 
+def stream_weather_history(db: Storage, location: str, days: int = 30, batch_size: int = 500):
+    """Iterate the whole weather history window in batches, newest first."""
+    return db.stream_weather_history(location, _since(days), batch_size)
 
+async def create_weather_data(db: Storage, weather: schemas.WeatherDataCreate):
+    return await db.insert_one("weather_data", _stamp(weather.model_dump(), with_updated_at=False))
 
+async def queue_weather_data(weather: schemas.WeatherDataCreate) -> int:
+    """Queue a reading for the write-behind buffer; returns the queue depth."""
+    return await write_behind.enqueue("weather_data", _stamp(weather.model_dump(), with_updated_at=False))
@@ -1,27 +1,25 @@
+import time
 from datetime import datetime, timedelta
 from typing import Optional
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from .config import settings
-from .database import database
 from . import crud
+from .auth_cache import token_cache, principal_cache
+from .security import password_hasher
 from .schemas import User, TokenData
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # OAuth2 scheme for token handling
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_PREFIX}/users/token")
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plain password against a hashed password."""
-    return pwd_context.verify(plain_password, hashed_password)
+    return await password_hasher.verify(plain_password, hashed_password)
 
-def get_password_hash(password: str) -> str:
+async def get_password_hash(password: str) -> str:
     """Generate password hash."""
-    return pwd_context.hash(password)
+    return await password_hasher.hash(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token."""
@@ -38,8 +36,9 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     )
     return encoded_jwt
 
-async def get_db():
-    return database
+async def get_db(request: Request):
+    # The storage opened by the application lifespan (see main.lifespan)
+    return request.app.state.storage
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
@@ -51,24 +50,38 @@ async def get_current_user(
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(
-            token, 
-            settings.SECRET_KEY, 
-            algorithms=[settings.JWT_ALGORITHM]
-        )
-        user_id: str = payload.get("sub")
-        if user_id is None:
+    user_id = token_cache.get(token)
+    if user_id is None:
+        try:
+            payload = jwt.decode(
+                token, 
+                settings.SECRET_KEY, 
+                algorithms=[settings.JWT_ALGORITHM]
+            )
+            user_id: str = payload.get("sub")
+            if user_id is None:
+                raise credentials_exception
+            token_data = TokenData(user_id=user_id)
+        except JWTError:
             raise credentials_exception
-        token_data = TokenData(user_id=user_id)
-    except JWTError:
-        raise credentials_exception
-        
-    user = await crud.get_user(db, user_id=token_data.user_id)
+
+        user_id = token_data.user_id
+        # Never keep a verified token around past its own expiry
+        expires_at = payload.get("exp")
+        if expires_at is not None:
+            token_cache.set(token, user_id, ttl_seconds=expires_at - time.time())
+
+    current_user = principal_cache.get(user_id)
+    if current_user is not None:
+        return current_user
+
+    user = await crud.get_user(db, user_id=user_id)
     if user is None:
         raise credentials_exception
-        
-    return User(**user)
+
+    current_user = User(**user)
+    principal_cache.set(user_id, current_user)
+    return current_user
 
 async def get_current_active_user(
     current_user: User = Depends(get_current_user)
@@ -80,3 +93,14 @@ async def get_current_active_user(
             detail="Inactive user"
         )
     return current_user
+
+async def get_current_admin_user(
+    current_user: User = Depends(get_current_active_user)
+) -> User:
+    """Get current active user, who must be listed in ADMIN_EMAILS."""
+    if current_user.email.lower() not in settings.ADMIN_EMAILS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    return current_user
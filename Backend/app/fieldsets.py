@@ -0,0 +1,95 @@
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type
+
+from fastapi import HTTPException, Query, status
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field, create_model
+
+# Fetched whatever the selection, for the conditional GET validators
+# (see app/conditional.py); dump() leaves them out of the response
+VALIDATOR_FIELDS = ("updated_at", "created_at")
+
+
+@lru_cache(maxsize=256)
+def partial_model(model: Type[BaseModel], fields: Tuple[str, ...]) -> Type[BaseModel]:
+    """Response model containing only the selected fields of model."""
+    definitions = {}
+    for name in fields:
+        info = model.model_fields[name]
+        definitions[name] = (Optional[info.annotation], Field(default=None, alias=info.alias))
+    return create_model(
+        f"{model.__name__}Fields",
+        __config__=model.model_config,
+        **definitions
+    )
+
+
+class FieldSet:
+    """A client-selected subset of a response model's fields.
+
+    Carries both the Mongo projection that fetches only those fields and the
+    trimmed model used to serialize them, so the selection cuts Atlas
+    transfer, validation work and response size together.
+    """
+
+    def __init__(self, model: Type[BaseModel], fields: Tuple[str, ...]):
+        self.fields = fields
+        self.model = partial_model(model, fields)
+        self.projection: Dict[str, Any] = {
+            (model.model_fields[name].alias or name): 1 for name in fields
+        }
+        self.projection.update({name: 1 for name in VALIDATOR_FIELDS if name in model.model_fields})
+
+    def dump(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        return self.model.model_validate(document).model_dump(mode="json", by_alias=True)
+
+    def response(self, document: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> JSONResponse:
+        return JSONResponse(self.dump(document), headers=headers)
+
+    def list_response(self, documents: Iterable[Dict[str, Any]],
+                      headers: Optional[Dict[str, str]] = None) -> JSONResponse:
+        return JSONResponse([self.dump(document) for document in documents], headers=headers)
+
+    def page_response(self, documents: Iterable[Dict[str, Any]], next_cursor: Optional[str],
+                      headers: Optional[Dict[str, str]] = None) -> JSONResponse:
+        return JSONResponse({
+            "items": [self.dump(document) for document in documents],
+            "next_cursor": next_cursor,
+        }, headers=headers)
+
+
+def parse_fields(model: Type[BaseModel], fields: Optional[str]) -> Optional[FieldSet]:
+    """Parse a comma separated `fields` value; fields may be given by name or alias."""
+    if not fields:
+        return None
+
+    by_alias = {info.alias: name for name, info in model.model_fields.items() if info.alias}
+    selected: List[str] = []
+    for raw in fields.split(","):
+        requested = raw.strip()
+        if not requested:
+            continue
+        name = by_alias.get(requested, requested)
+        if name not in model.model_fields:
+            raise ValueError(f"Unknown field '{requested}'")
+        if name not in selected:
+            selected.append(name)
+
+    if not selected:
+        return None
+    return FieldSet(model, tuple(sorted(selected)))
+
+
+def sparse_fields(model: Type[BaseModel]):
+    """Dependency that turns the `fields` query parameter into a FieldSet (or None)."""
+    def dependency(
+        fields: Optional[str] = Query(
+            None,
+            description="Comma separated list of fields to return, e.g. `id,name,price`"
+        )
+    ) -> Optional[FieldSet]:
+        try:
+            return parse_fields(model, fields)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return dependency
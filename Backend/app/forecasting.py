@@ -0,0 +1,308 @@
+"""Batch price forecasting for every crop and market series.
+
+Daily mean prices come from the daily rollups (app/rollups.py), one
+series per crop and market, gaps forward-filled. Every series is fitted
+in the same NumPy pass. The time recursion runs once, over arrays that
+hold all series and all candidate parameter sets side by side. The model
+is additive Holt-Winters with a damped trend and a weekly season. Each
+series keeps its best parameters by in-sample one-step error. A seasonal
+naive baseline (the same weekday last week) is kept instead wherever it
+beats Holt-Winters on a holdout of the most recent days.
+
+Forecasts are stored in price_forecasts and served with the market
+trends. They are recomputed on a schedule by ForecastScheduler when
+FORECAST_SCHEDULE_ENABLED is set, by whichever worker holds the
+"forecasts" lease, or by running this module, e.g. from cron:
+
+    python -m app.forecasting
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from .config import settings
+from .rollups import period_start
+from .storage import Storage
+
+logger = logging.getLogger(__name__)
+
+SEASON = 7
+# Candidate smoothing parameters: level, trend, season; every combination is tried
+ALPHAS = (0.1, 0.3, 0.5, 0.8)
+BETAS = (0.01, 0.1)
+GAMMAS = (0.05, 0.2)
+PHI = 0.98
+# Lease taken by the worker whose scheduler runs the next refresh
+LEASE_NAME = "forecasts"
+# Series fitted together; bounds memory to about 100 bytes x chunk x grid x SEASON
+CHUNK_SIZE = 4096
+# z-score of the 95% prediction interval
+Z_95 = 1.96
+
+_GRID = np.array([(a, b, g) for a in ALPHAS for b in BETAS for g in GAMMAS])
+
+
+class SeriesMatrix(NamedTuple):
+    keys: List[Tuple[str, str]]  # (crop_id, market_name) per row
+    values: np.ndarray           # (series, days) daily prices, gaps filled
+    first_day: datetime
+
+
+class Forecasts(NamedTuple):
+    prices: np.ndarray        # (series, horizon)
+    spread: np.ndarray        # (series, horizon) half width of the 95% interval
+    holt_winters: np.ndarray  # (series,) True where Holt-Winters beat the baseline
+    mae: np.ndarray           # (series,) holdout MAE of the chosen model
+    baseline_mae: np.ndarray  # (series,) holdout MAE of the seasonal naive baseline
+
+
+def series_matrix(rows: List[Dict[str, Any]], since: datetime, until: datetime,
+                  min_days: int) -> SeriesMatrix:
+    """Lay daily rollups out as one row per (crop, market), one column per day.
+
+    Missing days repeat the previous day's price (the first observed price
+    before a series starts). Series with fewer than min_days observed days
+    are dropped.
+    """
+    first_day = period_start(since, "day")
+    n_days = (period_start(until, "day") - first_day).days + 1
+    if not rows:
+        return SeriesMatrix([], np.empty((0, n_days)), first_day)
+
+    crop = np.array([str(row["crop_id"]) for row in rows])
+    market = np.array([row["market_name"] for row in rows])
+    pairs, pair_index = np.unique(np.char.add(np.char.add(crop, "\x1f"), market), return_inverse=True)
+    day_index = (np.array([row["start"] for row in rows], dtype="datetime64[D]")
+                 - np.datetime64(first_day, "D")).astype(np.int64)
+    inside = (day_index >= 0) & (day_index < n_days)
+
+    values = np.full((len(pairs), n_days), np.nan)
+    values[pair_index[inside], day_index[inside]] = np.array([row["mean"] for row in rows], dtype=float)[inside]
+    observed = ~np.isnan(values)
+    keep = observed.sum(axis=1) >= min_days
+    values, observed, pairs = values[keep], observed[keep], pairs[keep]
+
+    # Forward fill: each day takes the value of the latest observed day up to it
+    latest = np.maximum.accumulate(np.where(observed, np.arange(n_days), -1), axis=1)
+    first = observed.argmax(axis=1)
+    latest = np.where(latest < 0, first[:, None], latest)
+    values = np.take_along_axis(values, latest, axis=1)
+
+    keys = [tuple(pair.split("\x1f", 1)) for pair in pairs.tolist()]
+    return SeriesMatrix(keys, values, first_day)
+
+
+def _holt_winters(y: np.ndarray, horizon: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Fit every grid point to every series; return (forecasts, one-step RMSE) of the best.
+
+    y is (series, days) with days >= 2 * SEASON.
+    """
+    n, days = y.shape
+    alpha, beta, gamma = (_GRID[:, i][:, None] for i in range(3))
+    grid = len(_GRID)
+
+    first_week = y[:, :SEASON].mean(axis=1)
+    level = np.broadcast_to(first_week, (grid, n)).copy()
+    trend = np.broadcast_to((y[:, SEASON:2 * SEASON].mean(axis=1) - first_week) / SEASON, (grid, n)).copy()
+    season = np.broadcast_to((y[:, :SEASON] - first_week[:, None]).T, (grid, SEASON, n)).copy()
+    sse = np.zeros((grid, n))
+
+    for t in range(days):
+        observed = y[:, t]
+        seasonal = season[:, t % SEASON]
+        error = observed - (level + PHI * trend + seasonal)
+        if t >= SEASON:
+            sse += error * error
+        new_level = alpha * (observed - seasonal) + (1 - alpha) * (level + PHI * trend)
+        trend = beta * (new_level - level) + (1 - beta) * PHI * trend
+        season[:, t % SEASON] = gamma * (observed - new_level) + (1 - gamma) * seasonal
+        level = new_level
+
+    best = sse.argmin(axis=0)
+    columns = np.arange(n)
+    level, trend = level[best, columns], trend[best, columns]
+    steps = np.arange(1, horizon + 1)
+    damped = np.cumsum(PHI ** steps)
+    seasonal = season[best, :, columns][:, (days + steps - 1) % SEASON]
+    forecast = level[:, None] + damped[None, :] * trend[:, None] + seasonal
+    rmse = np.sqrt(sse[best, columns] / (days - SEASON))
+    return forecast, rmse
+
+
+def _seasonal_naive(y: np.ndarray, horizon: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Repeat the last week; RMSE of doing the same one week at a time in-sample."""
+    steps = np.arange(horizon)
+    forecast = y[:, y.shape[1] - SEASON + steps % SEASON]
+    rmse = np.sqrt(np.mean((y[:, SEASON:] - y[:, :-SEASON]) ** 2, axis=1))
+    return forecast, rmse
+
+
+def fit_forecasts(y: np.ndarray, horizon: int, holdout: int) -> Forecasts:
+    """Forecast horizon days for every row of y, choosing a model per series on a holdout."""
+    chunks = [_fit_chunk(y[i:i + CHUNK_SIZE], horizon, holdout) for i in range(0, len(y), CHUNK_SIZE)]
+    if not chunks:
+        empty = np.empty((0, horizon))
+        return Forecasts(empty, empty, np.empty(0, dtype=bool), np.empty(0), np.empty(0))
+    return Forecasts(*(np.concatenate(parts) for parts in zip(*chunks)))
+
+
+def _fit_chunk(y: np.ndarray, horizon: int, holdout: int) -> Forecasts:
+    train, test = y[:, :-holdout], y[:, -holdout:]
+    hw_test, _ = _holt_winters(train, holdout)
+    naive_test, _ = _seasonal_naive(train, holdout)
+    hw_mae = np.abs(hw_test - test).mean(axis=1)
+    baseline_mae = np.abs(naive_test - test).mean(axis=1)
+    use_hw = hw_mae <= baseline_mae
+
+    hw_forecast, hw_rmse = _holt_winters(y, horizon)
+    naive_forecast, naive_rmse = _seasonal_naive(y, horizon)
+    prices = np.where(use_hw[:, None], hw_forecast, naive_forecast)
+    # Prices cannot go negative however steep the fitted trend
+    prices = np.maximum(prices, 0)
+    rmse = np.where(use_hw, hw_rmse, naive_rmse)
+    spread = Z_95 * rmse[:, None] * np.sqrt(np.arange(1, horizon + 1))[None, :]
+    return Forecasts(prices, spread, use_hw, np.where(use_hw, hw_mae, baseline_mae), baseline_mae)
+
+
+def forecast_documents(matrix: SeriesMatrix, forecasts: Forecasts, generated_at: datetime) -> List[Dict[str, Any]]:
+    last_day = matrix.first_day + timedelta(days=matrix.values.shape[1] - 1)
+    dates = [last_day + timedelta(days=step) for step in range(1, forecasts.prices.shape[1] + 1)]
+    documents = []
+    for (crop_id, market_name), prices, spread, use_hw, mae, baseline_mae in zip(
+        matrix.keys, forecasts.prices.tolist(), forecasts.spread.tolist(),
+        forecasts.holt_winters.tolist(), forecasts.mae.tolist(), forecasts.baseline_mae.tolist(),
+    ):
+        documents.append({
+            "crop_id": crop_id,
+            "market_name": market_name,
+            "generated_at": generated_at,
+            "model": "holt_winters" if use_hw else "seasonal_naive",
+            "mae": mae,
+            "baseline_mae": baseline_mae,
+            "points": [
+                {"date": date, "price": price, "lower": max(price - half, 0.0), "upper": price + half}
+                for date, price, half in zip(dates, prices, spread)
+            ],
+        })
+    return documents
+
+
+async def refresh_forecasts(db: Storage) -> Dict[str, Any]:
+    """Fit and store forecasts for every crop and market series; returns run stats."""
+    started = time.perf_counter()
+    generated_at = datetime.utcnow().replace(microsecond=0)
+    since = generated_at - timedelta(days=settings.FORECAST_HISTORY_DAYS)
+    rows = []
+    async for batch in db.stream_price_rollups("day", since, settings.STREAM_BATCH_SIZE):
+        rows.extend(batch)
+    loaded = time.perf_counter()
+
+    horizon, holdout = settings.FORECAST_HORIZON_DAYS, SEASON * 2
+    # Enough history for the holdout plus two weeks to initialise the season on
+    min_days = max(settings.FORECAST_MIN_HISTORY_DAYS, holdout + 2 * SEASON)
+    matrix = series_matrix(rows, since, generated_at, min_days)
+    # CPU-bound: keep the event loop serving requests while it runs
+    forecasts = await asyncio.to_thread(fit_forecasts, matrix.values, horizon, holdout)
+    fitted = time.perf_counter()
+
+    await db.store_price_forecasts(forecast_documents(matrix, forecasts, generated_at), generated_at)
+    return {
+        "generated_at": generated_at.isoformat(),
+        "series": len(matrix.keys),
+        "holt_winters": int(forecasts.holt_winters.sum()),
+        "load_seconds": round(loaded - started, 3),
+        "fit_seconds": round(fitted - loaded, 3),
+        "total_seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+class ForecastScheduler:
+    """Recomputes forecasts every interval in the background.
+
+    Started by the application lifespan when FORECAST_SCHEDULE_ENABLED is
+    set. Every worker runs one, but a refresh only starts after taking the
+    "forecasts" lease in the database until the next one is due, so the
+    workers share one run per interval between them. Schedulers without
+    the lease check again every poll interval and take over once it expires.
+    """
+
+    def __init__(self, interval_minutes: int, poll_seconds: int = 60):
+        # At least a minute, and a positive poll, so the loop never spins on the lease
+        self.interval = max(interval_minutes, 1) * 60
+        self.poll = max(min(poll_seconds, self.interval), 1)
+        self.holder = f"{socket.gethostname()}:{os.getpid()}"
+        self._task: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.failures = 0
+        self.last_run: Optional[Dict[str, Any]] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self, storage: Storage) -> None:
+        self._task = asyncio.create_task(self._run(storage), name="forecast-scheduler")
+        logger.info(f"Forecast scheduler started: every {self.interval // 60} minutes")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self, storage: Storage) -> None:
+        while True:
+            try:
+                now = datetime.utcnow()
+                if await storage.acquire_lease(LEASE_NAME, self.holder, now, now + timedelta(seconds=self.interval)):
+                    self.last_run = await refresh_forecasts(storage)
+                    self.runs += 1
+                    logger.info(f"Forecasts refreshed: {self.last_run}")
+                    await asyncio.sleep(self.interval)
+                    continue
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Forecast refresh failed: {e}")
+            await asyncio.sleep(self.poll)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.running,
+            "interval_minutes": self.interval // 60,
+            "holder": self.holder,
+            "runs": self.runs,
+            "failures": self.failures,
+            "last_run": self.last_run,
+        }
+
+
+forecast_scheduler = ForecastScheduler(interval_minutes=settings.FORECAST_INTERVAL_MINUTES)
+
+
+async def main() -> int:
+    from .storage import create_storage
+
+    storage = create_storage()
+    await storage.startup()
+    try:
+        logger.info(f"Forecasts refreshed: {await refresh_forecasts(storage)}")
+        return 0
+    finally:
+        await storage.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(asyncio.run(main()))
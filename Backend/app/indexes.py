@@ -0,0 +1,211 @@
+"""Declarative index registry for the Mongo collections used by crud.py.
+
+Startup applies the registry with ensure_indexes(). Run this module to
+create the indexes by hand and/or check that every crud query is served by
+an index:
+
+    python -m app.indexes --create --verify
+
+Verify against a populated database (a production snapshot or seeded
+data): on missing or empty collections the plans prove nothing.
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from .pagination import ID_ORDER, NEWEST_FIRST
+
+logger = logging.getLogger(__name__)
+
+# Order of /market/prices/current
+LATEST_PRICE_ORDER = [("market_name", ASCENDING), ("crop_id", ASCENDING)]
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+    ],
+    # Compound indexes end in the keyset pagination order (see pagination.ID_ORDER
+    # and pagination.NEWEST_FIRST) so every page is a bounded index range scan
+    "farms": [
+        IndexModel([("owner_id", ASCENDING), ("_id", ASCENDING)], name="owner_id_id"),
+    ],
+    "crops": [
+        IndexModel([("season", ASCENDING), ("_id", ASCENDING)], name="season_id"),
+    ],
+    "diseases": [
+        IndexModel([("crop_id", ASCENDING), ("_id", ASCENDING)], name="crop_id_id"),
+    ],
+    "market_prices": [
+        IndexModel([("crop_id", ASCENDING), ("date", DESCENDING), ("_id", DESCENDING)], name="crop_id_date_id"),
+        # The bulk ingest upsert key; concurrent upserts of one key cannot both insert
+        IndexModel([("crop_id", ASCENDING), ("market_name", ASCENDING), ("date", ASCENDING)],
+                   name="crop_id_market_date_unique", unique=True),
+        IndexModel([("market_name", ASCENDING), ("date", DESCENDING)], name="market_name_date"),
+    ],
+    "price_rollups": [
+        IndexModel([("crop_id", ASCENDING), ("period", ASCENDING), ("start", DESCENDING), ("market_name", ASCENDING)],
+                   name="crop_id_period_start_market_unique", unique=True),
+        IndexModel([("period", ASCENDING), ("market_name", ASCENDING)], name="period_market_name"),
+    ],
+    "latest_prices": [
+        IndexModel([("crop_id", ASCENDING), ("market_name", ASCENDING)], name="crop_id_market_unique", unique=True),
+        IndexModel([("market_name", ASCENDING), ("crop_id", ASCENDING)], name="market_name_crop_id"),
+    ],
+    "markets": [
+        IndexModel([("name", ASCENDING)], name="name_unique", unique=True),
+    ],
+    "price_forecasts": [
+        IndexModel([("crop_id", ASCENDING), ("market_name", ASCENDING)], name="crop_id_market_unique", unique=True),
+        IndexModel([("generated_at", ASCENDING)], name="generated_at"),
+    ],
+    "weather_data": [
+        IndexModel([("location", ASCENDING), ("date", DESCENDING), ("_id", DESCENDING)], name="location_date_id"),
+    ],
+}
+
+
+class QueryCheck(NamedTuple):
+    """A crud query shape whose plan must not fall back to a collection scan."""
+    name: str
+    collection: str
+    filter: Dict[str, Any]
+    sort: Optional[List[Tuple[str, int]]] = None
+    distinct: Optional[str] = None
+
+
+def query_checks() -> List[QueryCheck]:
+    """Query shapes issued by crud.py, with representative values."""
+    sample_id = ObjectId()
+    today = datetime.combine(datetime.utcnow().date(), datetime.min.time())
+    tomorrow = today + timedelta(days=1)
+    return [
+        QueryCheck("get_user_by_email", "users", {"email": "farmer@example.com"}),
+        QueryCheck("get_user", "users", {"_id": sample_id}),
+        QueryCheck("get_farms_by_owner", "farms", {"owner_id": str(sample_id)}, sort=ID_ORDER),
+        QueryCheck("get_farm", "farms", {"_id": sample_id, "owner_id": str(sample_id)}),
+        QueryCheck("list_crops", "crops", {}, sort=ID_ORDER),
+        QueryCheck("list_crops(season)", "crops", {"season": "kharif"}, sort=ID_ORDER),
+        QueryCheck("get_crop", "crops", {"_id": sample_id}),
+        QueryCheck("get_crop_diseases", "diseases", {"crop_id": str(sample_id)}, sort=ID_ORDER),
+        QueryCheck("get_current_prices", "latest_prices", {}, sort=LATEST_PRICE_ORDER),
+        QueryCheck("get_current_prices(market)", "latest_prices", {"market_name": "Itarsi"}, sort=LATEST_PRICE_ORDER),
+        QueryCheck("get_current_prices(crop)", "latest_prices", {"crop_id": str(sample_id)}, sort=LATEST_PRICE_ORDER),
+        QueryCheck("get_price_history", "market_prices",
+                   {"crop_id": str(sample_id), "date": {"$gte": today}}, sort=NEWEST_FIRST),
+        QueryCheck("recompute_price_rollups", "market_prices",
+                   {"crop_id": str(sample_id), "market_name": "Itarsi", "date": {"$gte": today, "$lt": tomorrow}}),
+        QueryCheck("get_markets", "markets", {}, sort=[("name", ASCENDING)]),
+        QueryCheck("refresh_markets", "price_rollups", {"period": "month", "market_name": {"$in": ["Itarsi"]}}),
+        QueryCheck("get_price_rollups", "price_rollups",
+                   {"crop_id": str(sample_id), "period": "day", "start": {"$gte": today}},
+                   sort=[("start", DESCENDING), ("market_name", ASCENDING)]),
+        QueryCheck("get_weather_history", "weather_data",
+                   {"location": "Itarsi", "date": {"$gte": today}}, sort=NEWEST_FIRST),
+    ]
+
+
+async def ensure_indexes(db) -> None:
+    """Create every registered index. Safe to run repeatedly."""
+    for collection, models in INDEXES.items():
+        try:
+            created = await db[collection].create_indexes(models)
+            logger.info(f"Indexes ensured on {collection}: {', '.join(created)}")
+        except OperationFailure as e:
+            # Typically a conflicting definition or duplicate keys for a unique index
+            logger.error(f"Could not create indexes on {collection}: {str(e)}")
+
+
+def _plan_stages(plan: Any) -> List[str]:
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(_plan_stages(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(_plan_stages(item))
+    return stages
+
+
+async def explain_query(db, check: QueryCheck) -> List[str]:
+    """Return the stages of the winning plan for a query shape."""
+    if check.distinct:
+        result = await db.command({
+            "explain": {"distinct": check.collection, "key": check.distinct, "query": check.filter},
+            "verbosity": "queryPlanner",
+        })
+    else:
+        cursor = db[check.collection].find(check.filter)
+        if check.sort:
+            cursor = cursor.sort(check.sort)
+        result = await cursor.explain()
+    return _plan_stages(result.get("queryPlanner", {}).get("winningPlan", {}))
+
+
+async def verify_indexes(db) -> bool:
+    """Explain every crud query shape and report any collection scans.
+
+    Only meaningful on populated data: a collection that does not exist
+    explains to a bare EOF plan, which fails here, and on an empty one the
+    planner picks among candidate indexes without any data to rank them,
+    which is reported as a warning.
+    """
+    ok = True
+    counts: Dict[str, int] = {}
+    for check in query_checks():
+        if check.collection not in counts:
+            counts[check.collection] = await db[check.collection].estimated_document_count()
+            if not counts[check.collection]:
+                logger.warning(f"{check.collection} is empty; its query plans may differ once it holds data")
+        stages = await explain_query(db, check)
+        if "COLLSCAN" in stages:
+            ok = False
+            logger.error(f"{check.name}: COLLSCAN on {check.collection} ({' <- '.join(stages)})")
+        elif stages in ([], ["EOF"]):
+            ok = False
+            logger.error(f"{check.name}: {check.collection} does not exist, nothing was verified")
+        else:
+            logger.info(f"{check.name}: {' <- '.join(stages)}")
+    return ok
+
+
+async def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Create and verify MongoDB indexes")
+    parser.add_argument("--create", action="store_true", help="create the registered indexes")
+    parser.add_argument("--verify", action="store_true", help="fail if any crud query does a COLLSCAN; run against populated data")
+    args = parser.parse_args(argv)
+
+    from .storage import create_storage
+
+    storage = create_storage()
+    if storage.name != "mongo":
+        logger.error(f"Indexes are managed by the {storage.name} backend itself; set STORAGE_BACKEND=mongo")
+        return 1
+    storage.connect()
+    database = storage.database
+
+    try:
+        if args.create or not args.verify:
+            await ensure_indexes(database)
+        if args.verify:
+            if not await verify_indexes(database):
+                logger.error("Index verification failed: some queries still scan whole collections")
+                return 1
+            logger.info("Index verification passed")
+        return 0
+    finally:
+        await storage.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(asyncio.run(main()))
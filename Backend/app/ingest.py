@@ -0,0 +1,156 @@
+import codecs
+import csv
+import json
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from . import crud
+from .schemas import IngestReport, IngestRowError, MarketPriceCreate
+from .storage import Storage
+
+# (line number, parsed row or None, parse error or None)
+ParsedRow = Tuple[int, Optional[Dict[str, Any]], Optional[str]]
+
+PRICE_COLUMNS = ("crop_id", "market_name", "price", "date")
+
+def ingest_format(content_type: str, requested: Optional[str] = None) -> Optional[str]:
+    """'csv' or 'ndjson' from the format query parameter or the Content-Type."""
+    if requested:
+        return requested
+    media_type = content_type.split(";")[0].strip().lower()
+    if media_type in ("text/csv", "application/csv"):
+        return "csv"
+    if media_type in ("application/x-ndjson", "application/ndjson", "application/jsonl", "application/x-jsonlines"):
+        return "ndjson"
+    return None
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, str]]:
+    """Split a byte stream into numbered text lines without buffering the whole body."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    line_no = 0
+    try:
+        async for chunk in chunks:
+            pending += decoder.decode(chunk)
+            *complete, pending = pending.split("\n")
+            for line in complete:
+                line_no += 1
+                yield line_no, line.rstrip("\r")
+        pending += decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        raise ValueError(f"Body is not valid UTF-8 after line {line_no}")
+    if pending:
+        yield line_no + 1, pending.rstrip("\r")
+
+async def _csv_rows(lines: AsyncIterator[Tuple[int, str]]) -> AsyncIterator[ParsedRow]:
+    header = None
+    record, start = "", 0
+    async for line_no, line in lines:
+        if record:
+            record += "\n" + line
+        else:
+            record, start = line, line_no
+        # An odd number of quotes means a quoted field continues on the next line
+        if record.count('"') % 2:
+            continue
+        text, record = record, ""
+        if not text.strip():
+            continue
+        fields = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip() for name in fields]
+            missing = [name for name in PRICE_COLUMNS if name not in header]
+            if missing:
+                raise ValueError(f"CSV header is missing columns: {', '.join(missing)}")
+            continue
+        if len(fields) != len(header):
+            yield start, None, f"expected {len(header)} fields, got {len(fields)}"
+            continue
+        yield start, dict(zip(header, fields)), None
+    if record:
+        yield start, None, "unterminated quoted field"
+
+async def _ndjson_rows(lines: AsyncIterator[Tuple[int, str]]) -> AsyncIterator[ParsedRow]:
+    async for line_no, line in lines:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_no, None, f"invalid JSON: {e.msg}"
+            continue
+        if not isinstance(row, dict):
+            yield line_no, None, "expected a JSON object"
+            continue
+        yield line_no, row, None
+
+def _validation_messages(error: ValidationError) -> List[str]:
+    return [
+        f"{'.'.join(str(part) for part in detail['loc']) or 'row'}: {detail['msg']}"
+        for detail in error.errors(include_url=False)
+    ]
+
+async def ingest_market_prices(
+    db: Storage,
+    chunks: AsyncIterator[bytes],
+    fmt: str,
+    chunk_size: int = 1000,
+    max_errors: int = 1000,
+) -> IngestReport:
+    """Parse, validate and upsert a CSV or NDJSON price feed as it streams in.
+
+    Valid rows are collected into chunks of chunk_size and each chunk is
+    written as one bulk upsert keyed on (crop_id, market_name, date); within
+    a chunk the last row for a key wins. Rows that fail to parse or validate
+    are reported by line number and skipped. A ValueError (bad header, bad
+    encoding) or a storage error stops the ingest with earlier chunks
+    already written, which is safe because re-sending the feed only
+    updates those rows again.
+    """
+    started = time.perf_counter()
+    parser = _csv_rows if fmt == "csv" else _ndjson_rows
+    rows = valid = inserted = updated = failed = 0
+    errors: List[IngestRowError] = []
+    pending: Dict[Tuple[str, str, Any], MarketPriceCreate] = {}
+
+    async def flush():
+        nonlocal inserted, updated
+        chunk_inserted, chunk_updated = await crud.upsert_market_prices(db, list(pending.values()))
+        inserted += chunk_inserted
+        updated += chunk_updated
+        pending.clear()
+
+    async for line_no, data, parse_error in parser(_lines(chunks)):
+        rows += 1
+        messages = [parse_error] if parse_error else None
+        if data is not None:
+            try:
+                price = MarketPriceCreate.model_validate(data)
+            except ValidationError as e:
+                messages = _validation_messages(e)
+            else:
+                valid += 1
+                pending[(price.crop_id, price.market_name, price.date)] = price
+                if len(pending) >= chunk_size:
+                    await flush()
+        if messages:
+            failed += 1
+            if len(errors) < max_errors:
+                errors.append(IngestRowError(line=line_no, errors=messages))
+    if pending:
+        await flush()
+
+    seconds = time.perf_counter() - started
+    return IngestReport(
+        rows=rows,
+        valid=valid,
+        inserted=inserted,
+        updated=updated,
+        failed=failed,
+        errors=errors,
+        errors_truncated=failed > len(errors),
+        seconds=round(seconds, 3),
+        rows_per_sec=round(rows / seconds, 1) if seconds else 0.0,
+    )
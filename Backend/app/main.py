@@ -1,18 +1,69 @@
 import logging
 import asyncio
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
 # Import routers
 from .routers import users, farms, crops, market, weather
-from .database import verify_database_connection
+from .config import settings
+from .storage import create_storage
+from .dependencies import get_current_admin_user
+from . import auth_cache, reference_cache
+from .security import password_hasher
+from .admission import login_admission
+from .write_behind import write_behind
+from .rollups import backfill_price_rollups, refresh_price_rollups
+from .forecasting import forecast_scheduler
+from .services.weather_service import weather_service
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+async def _backfill_price_rollups(storage) -> None:
+    try:
+        await backfill_price_rollups(storage)
+    except Exception as e:
+        logger.error(f"Price rollup backfill failed, run python -m app.rollups --rebuild: {e}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Database clients are created here, not at import, so each worker process
+    # opens its own connections on its own event loop
+    storage = create_storage()
+    app.state.storage = storage
+    try:
+        await storage.startup()
+        logger.info(f"Storage backend '{storage.name}' ready")
+    except Exception as e:
+        logger.error(f"Database connection failed: {e}")
+        # Don't raise the error, allow the application to start without DB connection
+        # This will let us handle DB errors gracefully in the routes
+    # In the background: serving starts while a large database is rebuilt
+    backfill = asyncio.create_task(_backfill_price_rollups(storage), name="rollups-backfill")
+    if settings.WRITE_BEHIND_ENABLED:
+        write_behind.start(storage, after_flush={"market_prices": refresh_price_rollups})
+    if settings.FORECAST_SCHEDULE_ENABLED:
+        forecast_scheduler.start(storage)
+    weather_service.start()
+    logger.info("Application startup complete.")
+
+    try:
+        yield
+    finally:
+        # Flush queued writes while the storage is still open
+        backfill.cancel()
+        await forecast_scheduler.stop()
+        await write_behind.stop()
+        password_hasher.shutdown()
+        await weather_service.close()
+        await storage.close()
+        logger.info("Application shutting down.")
+
 app = FastAPI(
+    lifespan=lifespan,
     title="FasalSaathi API",
     description="Backend API for FasalSaathi - Smart Agriculture Management Platform",
     version="1.0.0",
@@ -77,26 +128,18 @@ async def health_check():
     """Returns the operational status of the API."""
     return {"status": "healthy"}
 
-@app.on_event("startup")
-async def startup_event():
-    try:
-        from .database import verify_database_connection
-        # Try to connect with a timeout
-        try:
-            await asyncio.wait_for(verify_database_connection(), timeout=10.0)
-            logger.info("Database connection verified successfully")
-        except asyncio.TimeoutError:
-            logger.error("Database connection timed out")
-            raise ConnectionError("Could not connect to MongoDB Atlas - connection timed out")
-    except Exception as e:
-        logger.error(f"Database connection failed: {e}")
-        # Don't raise the error, allow the application to start without DB connection
-        # This will let us handle DB errors gracefully in the routes
-    logger.info("Application startup complete.")
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    logger.info("Application shutting down.")
+@app.get("/api/metrics", tags=["Health Check"], dependencies=[Depends(get_current_admin_user)])
+async def metrics():
+    """Returns in-process cache and performance counters (admin only)."""
+    return {
+        "auth_cache": auth_cache.cache_stats(),
+        "reference_cache": reference_cache.cache_stats(),
+        "password_hasher": password_hasher.stats(),
+        "login_admission": login_admission.stats(),
+        "write_behind": write_behind.stats(),
+        "forecasts": forecast_scheduler.stats(),
+        "weather_client": weather_service.stats(),
+    }
 
 # This is a basic global exception handler.
 # You can expand it to handle specific exceptions differently.
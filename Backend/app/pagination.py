@@ -0,0 +1,78 @@
+import base64
+import binascii
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from bson import ObjectId, json_util
+
+# Sort specification: (field, direction) pairs; the last field must be unique (_id)
+SortSpec = Sequence[Tuple[str, int]]
+
+# Keyset pagination orders shared by every storage backend (1 ascending, -1 descending)
+ID_ORDER = [("_id", 1)]
+NEWEST_FIRST = [("date", -1), ("_id", -1)]
+
+# Types a cursor may carry per sort field: ObjectId on Mongo and integer rowids
+# on SQLite for _id. Anything else must be a plain scalar, never a document
+# that would turn into a query operator.
+CURSOR_TYPES = {"_id": (ObjectId, int), "date": (datetime,)}
+SCALAR_TYPES = (str, int, float)
+
+def encode_cursor(document: Dict[str, Any], sort: SortSpec) -> str:
+    """Build an opaque cursor from the sort key of the last document on a page."""
+    position = {field: document[field] for field, _ in sort}
+    return base64.urlsafe_b64encode(json_util.dumps(position).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, sort: SortSpec) -> Dict[str, Any]:
+    """Decode a cursor produced by encode_cursor for the same sort order."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        position = json_util.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Invalid pagination cursor")
+    if not isinstance(position, dict) or set(position) != {field for field, _ in sort}:
+        raise ValueError("Invalid pagination cursor")
+    for field, value in position.items():
+        if isinstance(value, bool) or not isinstance(value, CURSOR_TYPES.get(field, SCALAR_TYPES)):
+            raise ValueError("Invalid pagination cursor")
+    return position
+
+def after_cursor(position: Dict[str, Any], sort: SortSpec) -> Dict[str, Any]:
+    """Mongo filter matching documents strictly after position in the given sort order.
+
+    For a sort on (a, b) this is ``a > x OR (a == x AND b > y)``, with the
+    comparison flipped for descending fields, so the index can seek straight
+    to the next page instead of skipping over earlier ones.
+    """
+    clauses: List[Dict[str, Any]] = []
+    for i, (field, direction) in enumerate(sort):
+        clause = {prev: position[prev] for prev, _ in sort[:i]}
+        clause[field] = {"$gt" if direction > 0 else "$lt": position[field]}
+        clauses.append(clause)
+    return clauses[0] if len(clauses) == 1 else {"$or": clauses}
+
+async def keyset_page(
+    collection,
+    query: Dict[str, Any],
+    sort: SortSpec,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    projection: Optional[Dict[str, Any]] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Fetch one page of a keyset-paginated query.
+
+    Returns the documents and the cursor for the next page, or None when
+    this is the last page.
+    """
+    if cursor:
+        query = {"$and": [query, after_cursor(decode_cursor(cursor, sort), sort)]}
+    if projection is not None:
+        # The sort key is needed to build the next cursor
+        projection = {**projection, **{field: 1 for field, _ in sort}}
+
+    # Read one extra document to learn whether another page exists
+    documents = await collection.find(query, projection).sort(list(sort)).limit(limit + 1).to_list(length=limit + 1)
+    if len(documents) <= limit:
+        return documents, None
+    documents = documents[:limit]
+    return documents, encode_cursor(documents[-1], sort)
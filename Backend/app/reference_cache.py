@@ -0,0 +1,41 @@
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from .cache import TTLCache
+from .config import settings
+
+# The market registry as one entry. Rollup refreshes clear it; the TTL bounds
+# how long a refresh made by another worker process can go unnoticed.
+markets_cache = TTLCache(max_entries=1, ttl_seconds=settings.MARKETS_CACHE_TTL_SECONDS)
+
+# Crop catalogue and diseases-by-crop reads, keyed by the catalogue version
+# they were read at. Writes in this process bump the version; the TTL bounds
+# how long a write made by another worker process can go unnoticed.
+catalogue_cache = TTLCache(
+    max_entries=settings.CATALOGUE_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.CATALOGUE_CACHE_TTL_SECONDS,
+)
+_catalogue_version = 0
+
+def invalidate_markets() -> None:
+    markets_cache.clear()
+
+def catalogue_version() -> int:
+    return _catalogue_version
+
+def bump_catalogue_version() -> None:
+    """Retire every cached catalogue read after a crop or disease is written."""
+    global _catalogue_version
+    _catalogue_version += 1
+    catalogue_cache.clear()
+
+def catalogue_key(*parts: Hashable) -> Tuple[Hashable, ...]:
+    return (_catalogue_version, *parts)
+
+def projection_key(projection: Optional[Dict[str, Any]]) -> Optional[Tuple[Tuple[str, Any], ...]]:
+    return tuple(sorted(projection.items())) if projection else None
+
+def cache_stats() -> Dict[str, Any]:
+    return {
+        "markets": markets_cache.stats(),
+        "catalogue": {**catalogue_cache.stats(), "version": _catalogue_version},
+    }
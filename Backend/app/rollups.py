@@ -0,0 +1,171 @@
+"""Daily, weekly and monthly market price rollups per crop and market.
+
+Each rollup holds the min, max, mean, last and count of one crop's prices
+in one market over one period. Price writes made through crud.py and
+write-behind flushes call refresh_price_rollups() with the written prices.
+It has the storage recompute only the rollups those prices fall in, from
+the prices in each rollup's window, so the rollups stay exact even when a
+bulk upsert changes an existing price. The same step keeps the
+latest_prices view (the newest price per crop and market) and the markets
+registry, which is derived from the monthly rollups, up to date. Reading
+the prices and writing the results happen in one database step, so
+refreshes from several worker processes cannot overwrite each other with
+stale totals. Startup rebuilds them when market_prices holds data but any
+of them is empty, e.g. on a database that predates them. Run this module
+to rebuild all of them from market_prices after a backfill or a failed
+refresh:
+
+    python -m app.rollups --rebuild
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+from .reference_cache import invalidate_markets
+from .storage import Storage
+
+logger = logging.getLogger(__name__)
+
+PERIODS = ("day", "week", "month")
+
+# (crop_id, market_name, period, start)
+RollupKey = Tuple[str, str, str, datetime]
+
+# Views derived from market_prices; all empty on a database that predates them
+DERIVED_COLLECTIONS = ("price_rollups", "latest_prices", "markets")
+# Held by the worker backfilling them, long enough for a large rebuild
+BACKFILL_LEASE = timedelta(hours=1)
+
+
+def period_start(date: datetime, period: str) -> datetime:
+    """Start of the UTC day, ISO week (Monday) or month containing date."""
+    if date.tzinfo is not None:
+        date = date.astimezone(timezone.utc).replace(tzinfo=None)
+    day = datetime(date.year, date.month, date.day)
+    if period == "day":
+        return day
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def period_end(start: datetime, period: str) -> datetime:
+    if period == "day":
+        return start + timedelta(days=1)
+    if period == "week":
+        return start + timedelta(days=7)
+    return (start + timedelta(days=32)).replace(day=1)
+
+
+def period_for(days: int) -> str:
+    """Coarsest period that still gives a readable series over a window of days."""
+    if days <= 92:
+        return "day"
+    if days <= 730:
+        return "week"
+    return "month"
+
+
+def rollup_keys(price: Dict[str, Any]) -> List[RollupKey]:
+    return [
+        (str(price["crop_id"]), price["market_name"], period, period_start(price["date"], period))
+        for period in PERIODS
+    ]
+
+
+def rollup_windows(keys: Iterable[RollupKey]) -> List[Dict[str, Any]]:
+    """The windows Storage.recompute_price_rollups() reads for these rollups."""
+    return [
+        {"crop_id": crop_id, "market_name": market_name, "period": period,
+         "start": start, "end": period_end(start, period)}
+        for crop_id, market_name, period, start in sorted(keys)
+    ]
+
+
+async def refresh_price_rollups(db: Storage, prices: List[Dict[str, Any]]) -> None:
+    """Recompute the rollups that the given price documents fall in, and their latest prices.
+
+    Only the windows of the written (crop, market, period) keys are read,
+    so a chunk of a multi-year backfill rereads its own days, weeks and
+    months rather than everything between its oldest and newest price.
+
+    Failures are logged rather than raised: the prices themselves are
+    already stored, and a rebuild brings the rollups back in line.
+    """
+    if not prices:
+        return
+    touched = {key for price in prices for key in rollup_keys(price)}
+    try:
+        await db.recompute_price_rollups(rollup_windows(touched))
+        invalidate_markets()
+    except Exception as e:
+        logger.error(f"Price rollup refresh for {len(prices)} prices failed, run python -m app.rollups --rebuild: {e}")
+
+
+async def rebuild_price_rollups(db: Storage, batch_size: int = 1000) -> int:
+    """Recompute every rollup, latest price and market from market_prices; returns the rollups written."""
+    keys: Set[RollupKey] = set()
+    async for batch in db.stream_market_prices(None, None, None, None, batch_size):
+        keys.update(key for price in batch for key in rollup_keys(price))
+    await db.clear_price_rollups()
+    await db.clear_latest_prices()
+    windows = rollup_windows(keys)
+    for offset in range(0, len(windows), batch_size):
+        await db.recompute_price_rollups(windows[offset:offset + batch_size])
+    # Drops markets that no longer have any prices
+    await db.refresh_markets(None)
+    invalidate_markets()
+    return len(windows)
+
+
+async def backfill_price_rollups(db: Storage) -> bool:
+    """Rebuild at startup if market_prices holds data but a derived view is empty.
+
+    Covers databases that predate the rollups, the latest prices view or
+    the markets registry, which would otherwise serve empty lists until a
+    manual rebuild. Only the worker that takes the "rollups-backfill" lease
+    rebuilds. Returns whether this process rebuilt.
+    """
+    empty = [name for name in DERIVED_COLLECTIONS if await db.is_empty(name)]
+    if not empty or await db.is_empty("market_prices"):
+        return False
+    now = datetime.utcnow()
+    if not await db.acquire_lease("rollups-backfill", f"{socket.gethostname()}:{os.getpid()}", now, now + BACKFILL_LEASE):
+        logger.info(f"{', '.join(empty)} empty, another worker is rebuilding them")
+        return False
+    logger.warning(f"{', '.join(empty)} empty while market_prices is not, rebuilding price rollups")
+    count = await rebuild_price_rollups(db)
+    logger.info(f"Rebuilt {count} price rollups")
+    return True
+
+
+async def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Maintain market price rollups, latest prices and the markets registry")
+    parser.add_argument("--rebuild", action="store_true", help="recompute everything from market_prices")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args(argv)
+    if not args.rebuild:
+        parser.print_help()
+        return 1
+
+    from .storage import create_storage
+
+    storage = create_storage()
+    await storage.startup()
+    try:
+        count = await rebuild_price_rollups(storage, args.batch_size)
+        logger.info(f"Rebuilt {count} price rollups")
+        return 0
+    finally:
+        await storage.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(asyncio.run(main()))
@@ -1,5 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from typing import List, Annotated
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status, UploadFile, File
+from typing import List, Annotated, Optional
 import numpy as np
 from PIL import Image
 import io
@@ -10,45 +10,89 @@ from ..schemas import (
     Crop as CropSchema,
     DiseaseCreate,
     Disease as DiseaseSchema,
+    Page,
     User as UserSchema
 )
+from ..fieldsets import FieldSet, sparse_fields
+from ..conditional import conditional_get, fingerprint, last_modified
 from .. import crud
 
 router = APIRouter(tags=["Crops"])
 
-@router.get("/", response_model=List[CropSchema])
+# The catalogue rarely changes; clients may reuse it for as long as the server cache may
+CATALOGUE_CACHE_CONTROL = "private, max-age=300"
+
+@router.get("/", response_model=Page[CropSchema])
 async def list_crops(
+    request: Request,
+    response: Response,
     current_user: Annotated[UserSchema, Depends(get_current_active_user)],
     db = Depends(get_db),
-    season: str = None
+    season: str = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    selected: Optional[FieldSet] = Depends(sparse_fields(CropSchema))
 ):
-    """Get list of all crops, optionally filtered by season."""
-    return await crud.list_crops(db, season=season)
+    """Get a page of crops, optionally filtered by season."""
+    try:
+        crops, next_cursor = await crud.list_crops(
+            db, season=season, cursor=cursor, limit=limit,
+            projection=selected.projection if selected else None
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    headers = conditional_get(request, response, CATALOGUE_CACHE_CONTROL,
+                              (fingerprint(crops), next_cursor), last_modified(crops))
+    if selected:
+        return selected.page_response(crops, next_cursor, headers=headers)
+    return {"items": crops, "next_cursor": next_cursor}
 
 @router.get("/{crop_id}", response_model=CropSchema)
 async def get_crop(
     crop_id: str,
+    request: Request,
+    response: Response,
     current_user: Annotated[UserSchema, Depends(get_current_active_user)],
-    db = Depends(get_db)
+    db = Depends(get_db),
+    selected: Optional[FieldSet] = Depends(sparse_fields(CropSchema))
 ):
     """Get detailed information about a specific crop."""
-    crop = await crud.get_crop(db, crop_id=crop_id)
+    crop = await crud.get_crop(db, crop_id=crop_id, projection=selected.projection if selected else None)
     if crop is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Crop not found"
         )
+    headers = conditional_get(request, response, CATALOGUE_CACHE_CONTROL,
+                              fingerprint([crop]), last_modified([crop]))
+    if selected:
+        return selected.response(crop, headers=headers)
     return crop
 
-@router.get("/{crop_id}/diseases", response_model=List[DiseaseSchema])
+@router.get("/{crop_id}/diseases", response_model=Page[DiseaseSchema])
 async def get_crop_diseases(
     crop_id: str,
+    request: Request,
+    response: Response,
     current_user: Annotated[UserSchema, Depends(get_current_active_user)],
-    db = Depends(get_db)
+    db = Depends(get_db),
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    selected: Optional[FieldSet] = Depends(sparse_fields(DiseaseSchema))
 ):
-    """Get list of diseases associated with a crop."""
-    diseases = await crud.get_crop_diseases(db, crop_id=crop_id)
-    return diseases
+    """Get a page of diseases associated with a crop."""
+    try:
+        diseases, next_cursor = await crud.get_crop_diseases(
+            db, crop_id=crop_id, cursor=cursor, limit=limit,
+            projection=selected.projection if selected else None
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    headers = conditional_get(request, response, CATALOGUE_CACHE_CONTROL,
+                              (fingerprint(diseases), next_cursor), last_modified(diseases))
+    if selected:
+        return selected.page_response(diseases, next_cursor, headers=headers)
+    return {"items": diseases, "next_cursor": next_cursor}
 
 @router.post("/disease-detection", response_model=dict)
 async def detect_disease(
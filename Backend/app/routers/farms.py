@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List, Annotated
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import List, Annotated, Optional
 
 from ..dependencies import get_db, get_current_active_user
-from ..schemas import FarmCreate, Farm as FarmSchema, User as UserSchema
+from ..schemas import FarmCreate, Farm as FarmSchema, Page, User as UserSchema
+from ..fieldsets import FieldSet, sparse_fields
 from .. import crud
 
 router = APIRouter(tags=["Farms"])
@@ -17,30 +18,45 @@ async def create_farm(
     new_farm = await crud.create_farm(db, farm=farm, owner_id=str(current_user.id))
     return new_farm
 
-@router.get("/", response_model=List[FarmSchema])
+@router.get("/", response_model=Page[FarmSchema])
 async def read_farms(
     current_user: Annotated[UserSchema, Depends(get_current_active_user)],
-    skip: int = 0,
-    limit: int = 100,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    selected: Optional[FieldSet] = Depends(sparse_fields(FarmSchema)),
     db = Depends(get_db)
 ):
-    """Get list of farms for current user."""
-    farms = await crud.get_farms_by_owner(db, owner_id=str(current_user.id), skip=skip, limit=limit)
-    return farms
+    """Get a page of farms for current user; pass next_cursor back to get the next page."""
+    try:
+        farms, next_cursor = await crud.get_farms_by_owner(
+            db, owner_id=str(current_user.id), cursor=cursor, limit=limit,
+            projection=selected.projection if selected else None
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if selected:
+        return selected.page_response(farms, next_cursor)
+    return {"items": farms, "next_cursor": next_cursor}
 
 @router.get("/{farm_id}", response_model=FarmSchema)
 async def read_farm(
     farm_id: str,
     current_user: Annotated[UserSchema, Depends(get_current_active_user)],
+    selected: Optional[FieldSet] = Depends(sparse_fields(FarmSchema)),
     db = Depends(get_db)
 ):
     """Get specific farm details."""
-    farm = await crud.get_farm(db, farm_id=farm_id, owner_id=str(current_user.id))
+    farm = await crud.get_farm(
+        db, farm_id=farm_id, owner_id=str(current_user.id),
+        projection=selected.projection if selected else None
+    )
     if farm is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Farm not found"
         )
+    if selected:
+        return selected.response(farm)
     return farm
 
 @router.put("/{farm_id}", response_model=FarmSchema)
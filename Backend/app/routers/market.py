@@ -1,104 +1,285 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List, Annotated
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import JSONResponse
+from typing import List, Annotated, Literal, Optional
 from datetime import datetime
 
-from ..dependencies import get_db, get_current_active_user
-from ..schemas import MarketPriceCreate, MarketPrice as MarketPriceSchema, User as UserSchema
+from ..dependencies import get_db, get_current_active_user, get_current_admin_user
+from ..schemas import (
+    IngestReport, MarketPriceCreate, MarketPrice as MarketPriceSchema, MarketTrends, MarketTrendsBatch, Page,
+    PriceRollup, MarketSummary, User as UserSchema,
+)
+from ..config import settings
+from ..streaming import ndjson_response, wants_ndjson
+from ..fieldsets import FieldSet, sparse_fields
+from ..write_behind import WriteQueueFull, write_behind
+from ..ingest import ingest_format, ingest_market_prices
+from ..rollups import period_for
+from ..conditional import conditional_get, fingerprint
 from .. import crud
 
 router = APIRouter(tags=["Market"])
 
+# Crop ids accepted by one batch trends request
+MAX_TRENDS_BATCH = 100
+
+# Cache-Control per kind of data. Current prices are always revalidated,
+# which costs a 304 when nothing changed; history changes only as new days arrive.
+PRICES_CACHE_CONTROL = "private, no-cache"
+HISTORY_CACHE_CONTROL = "private, max-age=60"
+MARKETS_CACHE_CONTROL = "private, max-age=300"
+
+def _queued_response(queue_depth: int) -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={"status": "queued", "queue_depth": queue_depth}
+    )
+
+def _write_queue_full() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Write queue is full, please retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
+def _trends_key(trends: dict) -> tuple:
+    # Every figure aggregates the rollups in the window, so a price change
+    # moves at least one of them; forecasts change with their generation time
+    return (
+        trends["trend"], trends.get("current_price"), trends.get("average_price"), trends.get("volatility"),
+        [(m["market_name"], m["count"], m["current_price"], m["average_price"]) for m in trends.get("markets", [])],
+        [(f["market_name"], f["generated_at"]) for f in trends["forecast"]],
+    )
+
 @router.get("/prices/current", response_model=List[MarketPriceSchema])
 async def get_current_prices(
+    request: Request,
+    response: Response,
     current_user: Annotated[UserSchema, Depends(get_current_active_user)],
     db = Depends(get_db),
     market: str = None,
-    crop_id: str = None
+    crop_id: str = None,
+    limit: int = Query(100, ge=1, le=1000),
+    selected: Optional[FieldSet] = Depends(sparse_fields(MarketPriceSchema))
 ):
-    """Get current market prices, optionally filtered by market or crop."""
-    prices = await crud.get_current_prices(db, market=market, crop_id=crop_id)
+    """Get the latest price of each crop in each market, optionally filtered by market or crop.
+
+    Ordered by market name, then crop.
+    """
+    prices = await crud.get_current_prices(
+        db, market=market, crop_id=crop_id, limit=limit,
+        projection=selected.projection if selected else None
+    )
+    headers = conditional_get(request, response, PRICES_CACHE_CONTROL,
+                              fingerprint(prices, "created_at", values="price"))
+    if selected:
+        return selected.list_response(prices, headers=headers)
     return prices
 
-@router.get("/prices/history/{crop_id}", response_model=List[MarketPriceSchema])
+@router.get("/prices/history/{crop_id}", response_model=Page[MarketPriceSchema])
 async def get_price_history(
     crop_id: str,
+    request: Request,
+    response: Response,
     current_user: Annotated[UserSchema, Depends(get_current_active_user)],
     db = Depends(get_db),
-    days: int = 30
+    days: int = 30,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    stream: bool = False,
+    selected: Optional[FieldSet] = Depends(sparse_fields(MarketPriceSchema))
 ):
-    """Get price history for a specific crop."""
+    """Get a page of prices for a specific crop over the last `days` days, newest first.
+
+    With `stream=true` or `Accept: application/x-ndjson` the whole window is
+    streamed as NDJSON instead, one price per line. Every item is a stored
+    price; for charts over long ranges use `/prices/rollups/{crop_id}`.
+    """
     # Verify crop exists
-    crop = await crud.get_crop(db, crop_id=crop_id)
+    crop = await crud.get_crop(db, crop_id=crop_id, projection={"_id": 1})
     if not crop:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Crop not found"
         )
     
-    prices = await crud.get_price_history(db, crop_id=crop_id, days=days)
-    return prices
+    projection = selected.projection if selected else None
+    if wants_ndjson(request, stream):
+        batches = crud.stream_price_history(
+            db, crop_id=crop_id, days=days, batch_size=settings.STREAM_BATCH_SIZE, projection=projection
+        )
+        return ndjson_response(batches, selected.model if selected else MarketPriceSchema)
+
+    try:
+        prices, next_cursor = await crud.get_price_history(
+            db, crop_id=crop_id, days=days, cursor=cursor, limit=limit, projection=projection
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    headers = conditional_get(request, response, HISTORY_CACHE_CONTROL,
+                              (fingerprint(prices, "created_at", values="price"), next_cursor))
+    if selected:
+        return selected.page_response(prices, next_cursor, headers=headers)
+    return {"items": prices, "next_cursor": next_cursor}
+
+@router.get("/prices/rollups/{crop_id}", response_model=List[PriceRollup])
+async def get_price_rollups(
+    crop_id: str,
+    request: Request,
+    response: Response,
+    current_user: Annotated[UserSchema, Depends(get_current_active_user)],
+    db = Depends(get_db),
+    days: int = Query(365, ge=1),
+    period: Literal["auto", "day", "week", "month"] = "auto",
+    market: Optional[str] = None
+):
+    """Get min/max/mean/last/count per market and period for a crop, newest first.
+
+    Use this instead of the raw history for long ranges. With `period=auto`
+    the period is chosen from `days`: daily up to about three months,
+    weekly up to two years, monthly beyond.
+    """
+    crop = await crud.get_crop(db, crop_id=crop_id, projection={"_id": 1})
+    if not crop:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Crop not found"
+        )
+    if period == "auto":
+        period = period_for(days)
+    rollups = await crud.get_price_rollups(db, crop_id=crop_id, period=period, days=days, market=market)
+    conditional_get(request, response, HISTORY_CACHE_CONTROL, fingerprint(rollups))
+    return rollups
 
 @router.get("/markets", response_model=List[str])
 async def get_markets(
+    request: Request,
+    response: Response,
     current_user: Annotated[UserSchema, Depends(get_current_active_user)],
     db = Depends(get_db)
 ):
     """Get list of available markets."""
-    markets = await crud.get_markets(db)
+    registry = await crud.get_market_registry(db)
+    conditional_get(request, response, MARKETS_CACHE_CONTROL, fingerprint(registry))
+    return [market["name"] for market in registry]
+
+@router.get("/markets/registry", response_model=List[MarketSummary])
+async def get_market_registry(
+    request: Request,
+    response: Response,
+    current_user: Annotated[UserSchema, Depends(get_current_active_user)],
+    db = Depends(get_db)
+):
+    """Get every market with the crops it trades, its latest price date and its number of prices."""
+    markets = await crud.get_market_registry(db)
+    conditional_get(request, response, MARKETS_CACHE_CONTROL, fingerprint(markets))
     return markets
 
-@router.get("/trends/{crop_id}", response_model=dict)
+@router.get("/trends", response_model=MarketTrendsBatch)
+async def get_market_trends_batch(
+    request: Request,
+    response: Response,
+    current_user: Annotated[UserSchema, Depends(get_current_active_user)],
+    db = Depends(get_db),
+    crop_id: List[str] = Query(..., description="Repeat for each crop"),
+    market: Optional[List[str]] = Query(None, description="Restrict to these markets; repeatable"),
+    days: int = Query(90, ge=1, le=365)
+):
+    """Get market trends for several crops at once, keyed by crop id.
+
+    Same figures as `/trends/{crop_id}`, computed for all crops in one
+    query. Ids that match no crop are listed in `not_found`.
+    """
+    crop_ids = list(dict.fromkeys(crop_id))
+    if len(crop_ids) > MAX_TRENDS_BATCH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_TRENDS_BATCH} crops per request"
+        )
+    trends = await crud.get_market_trends_batch(db, crop_ids=crop_ids, days=days, markets=market)
+    batch = {
+        "trends": {c: trends[c] for c in crop_ids if c in trends},
+        "not_found": [c for c in crop_ids if c not in trends]
+    }
+    conditional_get(request, response, HISTORY_CACHE_CONTROL,
+                    ({crop: _trends_key(t) for crop, t in batch["trends"].items()}, batch["not_found"]))
+    return batch
+
+@router.get("/trends/{crop_id}", response_model=MarketTrends)
 async def get_market_trends(
     crop_id: str,
+    request: Request,
+    response: Response,
     current_user: Annotated[UserSchema, Depends(get_current_active_user)],
-    db = Depends(get_db)
+    db = Depends(get_db),
+    market: Optional[List[str]] = Query(None, description="Restrict to these markets; repeatable"),
+    days: int = Query(90, ge=1, le=365)
 ):
-    """Get market trends analysis for a crop."""
-    # Verify crop exists
-    crop = await crud.get_crop(db, crop_id=crop_id)
-    if not crop:
+    """Get market trends analysis for a crop over the last `days` days.
+
+    Includes average, change and volatility, a per-market breakdown and the
+    daily series with 7 and 30 day moving averages. Everything, including
+    the crop check, comes from one query over the daily price rollups.
+    """
+    trends = await crud.get_market_trends(db, crop_id=crop_id, days=days, markets=market)
+    if trends is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Crop not found"
         )
-    
-    # Get price data for analysis (last 90 days)
-    prices = await crud.get_price_history(db, crop_id=crop_id, days=90)
-    
-    if not prices:
-        return {
-            "trend": "insufficient_data",
-            "current_price": None,
-            "price_change": None,
-            "forecast": None
-        }
-    
-    current_price = prices[0]["price"] if prices else None
-    avg_price = sum(p["price"] for p in prices) / len(prices) if prices else None
-    
-    # Simple trend analysis
-    if len(prices) >= 2:
-        price_change = ((prices[0]["price"] - prices[-1]["price"]) / prices[-1]["price"]) * 100
-        trend = "rising" if price_change > 0 else "falling"
-    else:
-        price_change = None
-        trend = "stable"
-    
-    return {
-        "trend": trend,
-        "current_price": current_price,
-        "average_price": avg_price,
-        "price_change": price_change,
-        "forecast": "TODO: Implement price forecast"
-    }
+    conditional_get(request, response, HISTORY_CACHE_CONTROL, _trends_key(trends))
+    return trends
 
 # Admin endpoints for managing market data
-@router.post("/prices", response_model=MarketPriceSchema)
+@router.post("/prices", response_model=MarketPriceSchema,
+             responses={202: {"description": "Queued for a batched write (write-behind mode)"}})
 async def create_market_price(
     price: MarketPriceCreate,
     current_user: Annotated[UserSchema, Depends(get_current_active_user)],
     db = Depends(get_db)
 ):
-    """Create new market price entry (admin only)."""
+    """Create new market price entry (admin only).
+
+    With write-behind enabled the price is queued and written in a batch
+    shortly after; the response is 202 with the current queue depth.
+    """
     # TODO: Add admin check
-    return await crud.create_market_price(db, price=price)
+    if write_behind.running:
+        try:
+            return _queued_response(await crud.queue_market_price(price))
+        except WriteQueueFull:
+            raise _write_queue_full()
+    try:
+        return await crud.create_market_price(db, price=price)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+@router.post("/prices/bulk", response_model=IngestReport)
+async def bulk_ingest_market_prices(
+    request: Request,
+    current_user: Annotated[UserSchema, Depends(get_current_admin_user)],
+    db = Depends(get_db),
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$")
+):
+    """Ingest a CSV or NDJSON price feed (admin only).
+
+    The body is parsed as it streams in and upserted in chunks keyed on
+    (crop_id, market_name, date), so re-sending a feed updates prices
+    instead of duplicating them. CSV needs a header row with crop_id,
+    market_name, price and date. The format comes from `format` or the
+    Content-Type. Rows that fail validation are skipped and listed by line.
+    Only users listed in ADMIN_EMAILS may call it.
+    """
+    fmt = ingest_format(request.headers.get("content-type", ""), format)
+    if fmt is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Send text/csv or application/x-ndjson, or pass format=csv|ndjson"
+        )
+    try:
+        return await ingest_market_prices(
+            db, request.stream(), fmt,
+            chunk_size=settings.BULK_INGEST_CHUNK_SIZE,
+            max_errors=settings.BULK_INGEST_MAX_ERRORS
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
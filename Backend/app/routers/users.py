@@ -1,5 +1,6 @@
 import logging
-from fastapi import APIRouter, Depends, HTTPException, status
+import math
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
 from typing import Annotated
 from datetime import timedelta
@@ -10,39 +11,62 @@ from ..dependencies import (
     verify_password,
     create_access_token,
     get_current_active_user,
+    get_current_admin_user,
 )
 from ..schemas.schemas import (
     UserCreate, 
     UserResponse, 
+    UserStatus,
+    UserUpdate,
     Token, 
     UserBase as UserSchema  # Using UserBase as UserSchema for existing endpoints
 )
+from ..security import PasswordHasherBusy
+from ..admission import AdmissionRejected, login_admission
 from .. import crud
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["Users & Authentication"])
 
+def _too_many_attempts(exc: AdmissionRejected) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=exc.reason,
+        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))},
+    )
+
+def _client_ip(request: Request):
+    return request.client.host if request.client else None
+
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def register_user(user: UserCreate, db = Depends(get_db)):
+async def register_user(user: UserCreate, request: Request, db = Depends(get_db)):
     """
     Register a new user in the database and return user info with access token.
     """
     try:
         logger.info(f"Registration attempt for email: {user.email}")
 
-        # Check if email exists
+        try:
+            login_admission.admit("register", user.email, _client_ip(request))
+        except AdmissionRejected as exc:
+            logger.warning(f"Registration throttled for {user.email}: {exc.reason}")
+            raise _too_many_attempts(exc)
+
+        # Cheap indexed lookup before spending a verification slot and a bcrypt hash;
+        # the unique index still rejects registrations that race past it
         db_user = await crud.get_user_by_email(db, email=user.email)
         if db_user:
             logger.warning(f"Registration failed: Email already registered for {user.email}")
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Email already registered."
+                detail="Email already registered"
             )
 
         # Create new user
         try:
-            new_user = await crud.create_user(db, user=user)
+            async with login_admission.verification_slot():
+                new_user = await crud.create_user(db, user=user)
             if not new_user:
                 logger.error("User creation failed: No user record returned")
                 raise HTTPException(
@@ -72,6 +96,16 @@ async def register_user(user: UserCreate, db = Depends(get_db)):
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=str(ve)
             )
+        except AdmissionRejected as exc:
+            logger.warning(f"Registration throttled for {user.email}: {exc.reason}")
+            raise _too_many_attempts(exc)
+        except PasswordHasherBusy:
+            logger.warning(f"Registration rejected for {user.email}: password hasher busy")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, please retry shortly",
+                headers={"Retry-After": "1"},
+            )
         except Exception as e:
             logger.error(f"Error creating user: {str(e)}", exc_info=True)
             raise HTTPException(
@@ -90,6 +124,7 @@ async def register_user(user: UserCreate, db = Depends(get_db)):
 @router.post("/token", response_model=Token)
 async def login_for_access_token(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
+    request: Request,
     db = Depends(get_db)
 ):
     """
@@ -97,9 +132,31 @@ async def login_for_access_token(
     The frontend must send the user's email in the 'username' field.
     """
     logger.info(f"Login attempt for user: {form_data.username}")
+    try:
+        login_admission.admit("token", form_data.username, _client_ip(request))
+    except AdmissionRejected as exc:
+        logger.warning(f"Login throttled for user {form_data.username}: {exc.reason}")
+        raise _too_many_attempts(exc)
+
     user = await crud.get_user_by_email(db, email=form_data.username)
     
-    if not user or not verify_password(form_data.password, user['hashed_password']):
+    try:
+        password_ok = False
+        if user:
+            async with login_admission.verification_slot():
+                password_ok = await verify_password(form_data.password, user['hashed_password'])
+    except AdmissionRejected as exc:
+        logger.warning(f"Login throttled for user {form_data.username}: {exc.reason}")
+        raise _too_many_attempts(exc)
+    except PasswordHasherBusy:
+        logger.warning(f"Login rejected for user {form_data.username}: password hasher busy")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+
+    if not password_ok:
         logger.warning(f"Failed login attempt for user: {form_data.username}")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -124,3 +181,36 @@ async def read_users_me(
     Get information about the currently authenticated user.
     """
     return current_user
+
+@router.patch("/me", response_model=UserSchema)
+async def update_users_me(
+    user_update: UserUpdate,
+    current_user: Annotated[UserSchema, Depends(get_current_active_user)],
+    db = Depends(get_db)
+):
+    """
+    Update the phone, name or language of the currently authenticated user.
+    """
+    try:
+        user = await crud.update_user(db, user_id=str(current_user.id), user_update=user_update)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    return user
+
+@router.put("/users/{user_id}/status", response_model=UserSchema)
+async def set_user_status(
+    user_id: str,
+    user_status: UserStatus,
+    current_user: Annotated[UserSchema, Depends(get_current_admin_user)],
+    db = Depends(get_db)
+):
+    """
+    Activate or deactivate a user (admin only). Takes effect on the user's next request.
+    """
+    user = await crud.set_user_active(db, user_id=user_id, is_active=user_status.is_active)
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    logger.info(f"User {user_id} {'activated' if user_status.is_active else 'deactivated'} by {current_user.email}")
+    return user
@@ -1,14 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List, Annotated, Dict, Any
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import JSONResponse
+from typing import List, Annotated, Dict, Any, Literal, Optional
 from datetime import datetime, timedelta
 
 from ..dependencies import get_db, get_current_active_user
-from ..schemas.schemas import WeatherDataCreate, WeatherDataBase as WeatherDataSchema, UserBase as UserSchema
+from ..schemas.schemas import DailyForecast, WeatherDataCreate, WeatherDataBase as WeatherDataSchema, Page, UserBase as UserSchema
 from ..services.weather_service import weather_service
+from ..config import settings
+from ..streaming import ndjson_response, wants_ndjson
+from ..write_behind import WriteQueueFull, write_behind
 from .. import crud
 
 router = APIRouter(tags=["Weather"])
 
+def _queued_response(queue_depth: int) -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={"status": "queued", "queue_depth": queue_depth}
+    )
+
+def _write_queue_full() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Write queue is full, please retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
 @router.get("/current", response_model=Dict[str, Any])
 async def get_current_weather(
     current_user: Annotated[UserSchema, Depends(get_current_active_user)],
@@ -25,41 +42,75 @@ async def get_current_weather(
             detail=str(e)
         )
 
-@router.get("/forecast", response_model=Dict[str, Any])
+@router.get("/forecast", response_model=DailyForecast,
+            responses={200: {"description": "Daily summaries, or OpenWeather's 3-hourly payload with mode=raw"}})
 async def get_weather_forecast(
     current_user: Annotated[UserSchema, Depends(get_current_active_user)],
     lat: float = 22.62,
     lon: float = 77.76,
-    days: int = 7
+    days: int = Query(7, ge=1, le=16),
+    mode: Literal["compact", "raw"] = "compact"
 ):
-    """Get weather forecast for coordinates (default: Itarsi, MP)"""
+    """Get weather forecast for coordinates (default: Itarsi, MP)
+
+    By default one summary per local day (min/max temperature and humidity,
+    total rain, rain probability, main condition) for up to `days` days; the
+    upstream forecast covers about five. `mode=raw` returns OpenWeather's
+    3-hourly payload, cut to the same local days.
+    """
     try:
-        forecast_data = await weather_service.get_forecast(lat, lon, days)
-        return forecast_data
+        if mode == "raw":
+            return JSONResponse(await weather_service.get_forecast(lat, lon, days))
+        return await weather_service.get_daily_forecast(lat, lon, days)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
         )
 
-@router.get("/history/{location}", response_model=List[WeatherDataSchema])
+@router.get("/history/{location}", response_model=Page[WeatherDataSchema])
 async def get_weather_history(
     location: str,
+    request: Request,
     current_user: Annotated[UserSchema, Depends(get_current_active_user)],
     db = Depends(get_db),
-    days: int = 30
+    days: int = 30,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    stream: bool = False
 ):
-    """Get historical weather data for a location."""
-    history = await crud.get_weather_history(db, location=location, days=days)
-    return history
+    """Get a page of historical weather data for a location, newest first.
+
+    With `stream=true` or `Accept: application/x-ndjson` the whole window is
+    streamed as NDJSON instead, one reading per line.
+    """
+    if wants_ndjson(request, stream):
+        batches = crud.stream_weather_history(db, location=location, days=days, batch_size=settings.STREAM_BATCH_SIZE)
+        return ndjson_response(batches, WeatherDataSchema)
+
+    try:
+        history, next_cursor = await crud.get_weather_history(db, location=location, days=days, cursor=cursor, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return {"items": history, "next_cursor": next_cursor}
 
 # Admin endpoints for managing weather data
-@router.post("/", response_model=WeatherDataSchema)
+@router.post("/", response_model=WeatherDataSchema,
+             responses={202: {"description": "Queued for a batched write (write-behind mode)"}})
 async def create_weather_data(
     weather: WeatherDataCreate,
     current_user: Annotated[UserSchema, Depends(get_current_active_user)],
     db = Depends(get_db)
 ):
-    """Create new weather data entry (admin only)."""
+    """Create new weather data entry (admin only).
+
+    With write-behind enabled the reading is queued and written in a batch
+    shortly after; the response is 202 with the current queue depth.
+    """
     # TODO: Add admin check
+    if write_behind.running:
+        try:
+            return _queued_response(await crud.queue_weather_data(weather))
+        except WriteQueueFull:
+            raise _write_queue_full()
     return await crud.create_weather_data(db, weather=weather)
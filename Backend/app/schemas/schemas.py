@@ -1,4 +1,4 @@
-from typing import List, Optional, Any
+from typing import Dict, Generic, List, Optional, Any, TypeVar
 from datetime import datetime
 from pydantic import BaseModel, EmailStr, Field, GetJsonSchemaHandler
 from pydantic.json_schema import JsonSchemaValue
@@ -16,6 +16,11 @@ class PyObjectId(str):
             json_schema=core_schema.str_schema(),
             python_schema=core_schema.union_schema([
                 core_schema.is_instance_schema(ObjectId),
+                # Integer primary keys from the SQLite backend
+                core_schema.chain_schema([
+                    core_schema.int_schema(strict=True),
+                    core_schema.no_info_plain_validator_function(str),
+                ]),
                 core_schema.chain_schema([
                     core_schema.str_schema(),
                     core_schema.no_info_plain_validator_function(cls.validate),
@@ -113,6 +118,15 @@ class Token(BaseModel):
 class UserCreate(UserBase):
     password: str
 
+class UserUpdate(BaseModel):
+    """Profile fields a user may change; omitted fields are left as they are."""
+    phone: Optional[str] = None
+    full_name: Optional[str] = None
+    language_preference: Optional[str] = None
+
+class UserStatus(BaseModel):
+    is_active: bool
+
 class UserResponse(UserBase):
     id: Optional[PyObjectId] = Field(default=None, alias="_id")
     token: Optional[Token] = None
@@ -211,6 +225,26 @@ class WeatherData(WeatherDataBase):
         "json_encoders": {ObjectId: str},
     }
 
+class DailyWeather(BaseModel):
+    date: str  # local calendar day at the forecast location, YYYY-MM-DD
+    # None when no slot of the day carried the reading
+    temp_min: Optional[float] = None
+    temp_max: Optional[float] = None
+    humidity_min: Optional[float] = None
+    humidity_max: Optional[float] = None
+    humidity_mean: Optional[float] = None
+    rain_total: float  # mm
+    pop_max: float  # highest probability of precipitation, 0-1
+    condition: str  # most frequent OpenWeather condition, e.g. "Clouds"
+    slots: int  # three-hour slots the day is summarised from
+
+class DailyForecast(BaseModel):
+    location: Optional[str] = None
+    lat: float
+    lon: float
+    timezone_offset: int  # seconds east of UTC
+    days: List[DailyWeather]
+
 class MarketPrice(MarketPriceBase):
     id: PyObjectId = Field(alias="_id")
     crop_id: str
@@ -222,6 +256,67 @@ class MarketPrice(MarketPriceBase):
         "json_encoders": {ObjectId: str},
     }
 
+class PriceRollup(BaseModel):
+    crop_id: str
+    market_name: str
+    period: str
+    start: datetime
+    min: float
+    max: float
+    mean: float
+    last: float
+    last_at: datetime
+    count: int
+
+class MarketSummary(BaseModel):
+    name: str
+    crop_ids: List[str]
+    last_price_date: datetime
+    price_count: int
+
+class TrendPoint(BaseModel):
+    date: datetime
+    price: float
+    ma_7: float
+    ma_30: float
+
+class MarketTrendBreakdown(BaseModel):
+    market_name: str
+    current_price: float
+    average_price: float
+    min_price: float
+    max_price: float
+    price_change: Optional[float] = None
+    count: int
+
+class ForecastPoint(BaseModel):
+    date: datetime
+    price: float
+    lower: float
+    upper: float
+
+class MarketForecast(BaseModel):
+    market_name: str
+    model: str
+    generated_at: datetime
+    mae: Optional[float] = None
+    baseline_mae: Optional[float] = None
+    points: List[ForecastPoint]
+
+class MarketTrends(BaseModel):
+    trend: str
+    current_price: Optional[float] = None
+    average_price: Optional[float] = None
+    price_change: Optional[float] = None
+    volatility: Optional[float] = None
+    markets: List[MarketTrendBreakdown] = []
+    series: List[TrendPoint] = []
+    forecast: List[MarketForecast] = []
+
+class MarketTrendsBatch(BaseModel):
+    trends: Dict[str, MarketTrends]
+    not_found: List[str] = []
+
 # Token Schemas
 class Token(BaseModel):
     access_token: str
@@ -230,6 +325,29 @@ class Token(BaseModel):
 class TokenData(BaseModel):
     user_id: Optional[str] = None
 
+# Pagination
+T = TypeVar("T")
+
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None
+
+# Bulk Ingest
+class IngestRowError(BaseModel):
+    line: int
+    errors: List[str]
+
+class IngestReport(BaseModel):
+    rows: int
+    valid: int
+    inserted: int
+    updated: int
+    failed: int
+    errors: List[IngestRowError]
+    errors_truncated: bool = False
+    seconds: float
+    rows_per_sec: float
+
 # Extended Response Schemas with Relationships
 class FarmWithCrops(Farm):
     crops: List[Crop]
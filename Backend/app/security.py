@@ -0,0 +1,108 @@
+import asyncio
+import logging
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from passlib.context import CryptContext
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Single password hashing context shared by the whole application
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__ident="2b"
+)
+
+class PasswordHasherBusy(Exception):
+    """Raised when the password hashing queue is full."""
+
+# Module-level so they can be pickled into a process pool
+def _hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+def _verify_password(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+class PasswordHasher:
+    """Runs bcrypt hashing and verification on a bounded worker pool.
+
+    bcrypt is deliberately slow, so calling it inline would block the event
+    loop for every other request on the worker. At most ``workers + queue_size``
+    calls may be in flight; anything beyond that fails fast with
+    PasswordHasherBusy instead of piling up.
+    """
+
+    def __init__(self, executor_type: str = "thread", workers: int = 2, queue_size: int = 64):
+        if executor_type not in ("thread", "process"):
+            raise ValueError(f"Unknown password hash executor: {executor_type}")
+        self.executor_type = executor_type
+        self.workers = workers
+        self.queue_size = queue_size
+        self._executor: Optional[Executor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _get_executor(self) -> Executor:
+        # Created lazily so forked server workers each get their own pool
+        if self._executor is None:
+            if self.executor_type == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix="password-hasher"
+                )
+            logger.info(f"Started {self.executor_type} password hasher pool with {self.workers} workers")
+        return self._executor
+
+    async def _run(self, func, *args):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers + self.queue_size)
+        if self._slots.locked():
+            self.rejected += 1
+            raise PasswordHasherBusy("Password hashing queue is full")
+
+        async with self._slots:
+            self.in_flight += 1
+            try:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._get_executor(), func, *args)
+            finally:
+                self.in_flight -= 1
+                self.completed += 1
+
+    async def hash(self, password: str) -> str:
+        """Generate password hash."""
+        return await self._run(_hash_password, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a plain password against a hashed password."""
+        return await self._run(_verify_password, plain_password, hashed_password)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self._slots = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "executor": self.executor_type,
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+password_hasher = PasswordHasher(
+    executor_type=settings.PASSWORD_HASH_EXECUTOR,
+    workers=settings.PASSWORD_HASH_WORKERS,
+    queue_size=settings.PASSWORD_HASH_QUEUE_SIZE,
+)
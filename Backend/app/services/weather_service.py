@@ -1,42 +1,227 @@
+import asyncio
+import logging
+import random
+import time
 import httpx
-from datetime import datetime
+from collections import Counter, deque
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
 from app.config import settings
 
+logger = logging.getLogger(__name__)
+
+# OpenWeather's forecast is 3-hourly
+SLOTS_PER_DAY = 8
+MAX_FORECAST_SLOTS = 40
+
+def _local_days(payload: Dict[str, Any], days: int) -> Tuple[List[Dict[str, Any]], np.ndarray, np.ndarray]:
+    """Slots of the first `days` local calendar days, their day numbers and where each day starts."""
+    offset = int((payload.get("city") or {}).get("timezone") or 0)
+    slots = sorted(payload.get("list") or [], key=lambda slot: slot["dt"])
+    if not slots:
+        return [], np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    day = (np.array([slot["dt"] for slot in slots], dtype=np.int64) + offset) // 86400
+    starts = np.flatnonzero(np.r_[True, day[1:] != day[:-1]])[:days]
+    end = starts[-1] + np.count_nonzero(day == day[starts[-1]])
+    return slots[:end], day[:end], starts
+
+def _finite(value: float, digits: Optional[int] = None) -> Optional[float]:
+    # A day whose slots all lack a reading aggregates to NaN, which JSON cannot carry
+    if np.isnan(value):
+        return None
+    return round(value, digits) if digits is not None else value
+
+def trim_forecast(payload: Dict[str, Any], days: int) -> Dict[str, Any]:
+    """The OpenWeather payload with its slots cut to the days summarize_forecast would cover."""
+    slots, _, _ = _local_days(payload, days)
+    return {**payload, "cnt": len(slots), "list": slots}
+
+def summarize_forecast(payload: Dict[str, Any], days: int) -> Dict[str, Any]:
+    """Fold a 3-hourly OpenWeather forecast into at most `days` local calendar days.
+
+    Days follow the location's UTC offset from the payload, so the first
+    day may be partial. All slots are aggregated in one vectorized pass.
+    Readings missing from every slot of a day come back as None.
+    """
+    city = payload.get("city") or {}
+    offset = int(city.get("timezone") or 0)
+    coord = city.get("coord") or {}
+    summary = {"location": city.get("name"), "lat": coord.get("lat", 0.0), "lon": coord.get("lon", 0.0),
+               "timezone_offset": offset, "days": []}
+    slots, day, starts = _local_days(payload, days)
+    if not slots:
+        return summary
+
+    end = len(slots)
+    main = [slot.get("main") or {} for slot in slots]
+    temp_min = np.array([m.get("temp_min", m.get("temp", np.nan)) for m in main], dtype=float)
+    temp_max = np.array([m.get("temp_max", m.get("temp", np.nan)) for m in main], dtype=float)
+    humidity = np.array([m.get("humidity", np.nan) for m in main], dtype=float)
+    rain = np.array([(slot.get("rain") or {}).get("3h", 0.0) for slot in slots], dtype=float)
+    pop = np.array([slot.get("pop", 0.0) for slot in slots], dtype=float)
+    counts = np.diff(np.r_[starts, end])
+    # fmin/fmax skip slots that lack a reading; so does the humidity mean
+    has_humidity = ~np.isnan(humidity)
+    with np.errstate(invalid="ignore"):
+        humidity_mean = (np.add.reduceat(np.where(has_humidity, humidity, 0.0), starts)
+                         / np.add.reduceat(has_humidity, starts))
+
+    columns = zip(
+        starts.tolist(), day[starts].tolist(), counts.tolist(),
+        np.fmin.reduceat(temp_min, starts).tolist(), np.fmax.reduceat(temp_max, starts).tolist(),
+        np.fmin.reduceat(humidity, starts).tolist(), np.fmax.reduceat(humidity, starts).tolist(),
+        humidity_mean.tolist(), np.add.reduceat(rain, starts).tolist(), np.fmax.reduceat(pop, starts).tolist(),
+    )
+    for start, day_number, count, t_min, t_max, h_min, h_max, h_mean, rain_total, pop_max in columns:
+        conditions = Counter(
+            (slot.get("weather") or [{}])[0].get("main", "Unknown") for slot in slots[start:start + count]
+        )
+        summary["days"].append({
+            "date": datetime.fromtimestamp(day_number * 86400, timezone.utc).strftime("%Y-%m-%d"),
+            "temp_min": _finite(t_min, 2),
+            "temp_max": _finite(t_max, 2),
+            "humidity_min": _finite(h_min),
+            "humidity_max": _finite(h_max),
+            "humidity_mean": _finite(h_mean, 1),
+            "rain_total": round(rain_total, 2),
+            "pop_max": pop_max,
+            "condition": conditions.most_common(1)[0][0],
+            "slots": count,
+        })
+    return summary
+
 class WeatherService:
-    BASE_URL = "https://api.openweathermap.org/data/2.5"
-    
+    """OpenWeather client sharing one pooled, keep-alive HTTP client.
+
+    The application lifespan calls start() and close(); outside it the
+    client is created on first use. Requests that fail in transport (time
+    out, connection refused or reset, a keep-alive connection the server
+    had closed) or get a 5xx are retried up to WEATHER_HTTP_RETRIES times
+    with jittered backoff.
+    """
+
     def __init__(self):
         self.api_key = settings.WEATHER_API_KEY
-        
+        self.base_url = settings.WEATHER_API_BASE_URL
+        self.retries = settings.WEATHER_HTTP_RETRIES
+        self.retry_backoff = settings.WEATHER_HTTP_RETRY_BACKOFF_MS / 1000
+        self._client: Optional[httpx.AsyncClient] = None
+        self._latency_ms: deque = deque(maxlen=256)
+        self.requests = 0
+        self.attempts = 0
+        self.retried = 0
+        self.failures = 0
+        self.connections_opened = 0
+        self.connections_in_use = 0
+        self.connections_in_use_max = 0
+
+    def start(self) -> None:
+        if self._client is not None:
+            return
+        self._client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.WEATHER_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.WEATHER_HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=settings.WEATHER_HTTP_KEEPALIVE_EXPIRY_SECONDS,
+            ),
+            timeout=httpx.Timeout(
+                connect=settings.WEATHER_HTTP_CONNECT_TIMEOUT_SECONDS,
+                read=settings.WEATHER_HTTP_READ_TIMEOUT_SECONDS,
+                write=settings.WEATHER_HTTP_READ_TIMEOUT_SECONDS,
+                pool=settings.WEATHER_HTTP_POOL_TIMEOUT_SECONDS,
+            ),
+        )
+
+    async def close(self) -> None:
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
+    async def _trace(self, event: str, info: Dict[str, Any]) -> None:
+        # httpcore reports each new TCP connection; reused ones skip this event
+        if event == "connection.connect_tcp.complete":
+            self.connections_opened += 1
+        # A pooled HTTP/1.1 connection is busy from sending the request until the response is closed
+        elif event == "http11.send_request_headers.started":
+            self.connections_in_use += 1
+            self.connections_in_use_max = max(self.connections_in_use_max, self.connections_in_use)
+        elif event in ("http11.response_closed.complete", "http11.response_closed.failed"):
+            self.connections_in_use -= 1
+
+    async def _get(self, url: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        if self._client is None:
+            self.start()
+        started = time.perf_counter()
+        self.requests += 1
+        try:
+            for attempt in range(self.retries + 1):
+                last_attempt = attempt == self.retries
+                self.attempts += 1
+                try:
+                    response = await self._client.get(url, params=params, extensions={"trace": self._trace})
+                except httpx.TransportError:
+                    if last_attempt:
+                        raise
+                else:
+                    if response.status_code < 500 or last_attempt:
+                        response.raise_for_status()
+                        return response.json()
+                self.retried += 1
+                # Full jitter keeps retries from many requests from arriving together
+                await asyncio.sleep(random.uniform(0, self.retry_backoff * 2 ** attempt))
+        except Exception as e:
+            self.failures += 1
+            logger.warning(f"OpenWeather request to {url} failed: {e!r}")
+            raise
+        finally:
+            self._latency_ms.append((time.perf_counter() - started) * 1000)
+
+    def stats(self) -> Dict[str, Any]:
+        latencies = sorted(self._latency_ms)
+        return {
+            "started": self._client is not None,
+            "requests": self.requests,
+            "attempts": self.attempts,
+            "retries": self.retried,
+            "failures": self.failures,
+            "connections_opened": self.connections_opened,
+            # Share of attempts that went out on an already open connection
+            "connection_reuse": round(1 - self.connections_opened / self.attempts, 4) if self.attempts else None,
+            "connections_in_use": self.connections_in_use,
+            "connections_in_use_max": self.connections_in_use_max,
+            "max_connections": settings.WEATHER_HTTP_MAX_CONNECTIONS,
+            "latency_ms_p50": round(latencies[len(latencies) // 2], 2) if latencies else None,
+            "latency_ms_p95": round(latencies[int(len(latencies) * 0.95)], 2) if latencies else None,
+        }
+
     async def get_current_weather(self, lat: float = 22.62, lon: float = 77.76):
         """Get current weather for given coordinates (default: Itarsi, MP)"""
-        url = f"{self.BASE_URL}/weather"
+        url = f"{self.base_url}/weather"
         params = {
             "lat": lat,
             "lon": lon,
             "appid": self.api_key,
             "units": "metric"
         }
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, params=params)
-            response.raise_for_status()
-            return response.json()
+        return await self._get(url, params)
             
     async def get_forecast(self, lat: float = 22.62, lon: float = 77.76, days: int = 7):
-        """Get weather forecast for given coordinates"""
-        url = f"{self.BASE_URL}/forecast"
+        """Get the raw 3-hourly forecast for the next `days` local days (at most five)"""
+        url = f"{self.base_url}/forecast"
         params = {
             "lat": lat,
             "lon": lon,
             "appid": self.api_key,
-            "units": "metric"
+            "units": "metric",
+            # One extra day of slots so the last local day is complete after a partial first one
+            "cnt": min(MAX_FORECAST_SLOTS, (days + 1) * SLOTS_PER_DAY),
         }
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, params=params)
-            response.raise_for_status()
-            return response.json()
+        return trim_forecast(await self._get(url, params), days)
+
+    async def get_daily_forecast(self, lat: float = 22.62, lon: float = 77.76, days: int = 7):
+        """Get the forecast summarised per local day, for at most `days` days"""
+        return summarize_forecast(await self.get_forecast(lat, lon, days), days)
 
 # Create a global instance
-weather_service = WeatherService()
\ No newline at end of file
+weather_service = WeatherService()
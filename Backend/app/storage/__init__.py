@@ -0,0 +1,23 @@
+from .base import Document, DocumentPage, DuplicateRecord, Storage
+
+
+def create_storage() -> Storage:
+    """Build the storage backend selected by STORAGE_BACKEND.
+
+    Nothing is connected yet; the owner calls startup() and close().
+    """
+    from ..config import settings
+
+    backend = settings.STORAGE_BACKEND.lower()
+    if backend == "sqlite":
+        # Imported lazily so Mongo deployments do not need aiosqlite
+        from .sqlite import SQLiteStorage
+        return SQLiteStorage(settings.SQLITE_PATH)
+    if backend == "mongo":
+        from ..database import mongo_client_options
+        from .mongo import MongoStorage
+        return MongoStorage(settings.MONGO_DATABASE_URI, settings.DB_NAME, **mongo_client_options())
+    raise ValueError(f"Unknown STORAGE_BACKEND '{settings.STORAGE_BACKEND}' (expected 'mongo' or 'sqlite')")
+
+
+__all__ = ["Document", "DocumentPage", "DuplicateRecord", "Storage", "create_storage"]
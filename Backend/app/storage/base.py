@@ -0,0 +1,212 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+# A document as exchanged with crud.py: the record's fields plus its id under "_id"
+Document = Dict[str, Any]
+# A page of documents and the cursor for the next page (None on the last page)
+DocumentPage = Tuple[List[Document], Optional[str]]
+
+
+class DuplicateRecord(Exception):
+    """Raised when an insert violates a unique index.
+
+    For insert_many, rejected holds the indexes of the documents that were
+    not stored when the others were; None means none of them were stored.
+    """
+
+    def __init__(self, message: str, field: Optional[str] = None, rejected: Optional[List[int]] = None):
+        super().__init__(message)
+        self.field = field
+        self.rejected = rejected
+
+
+class Storage(ABC):
+    """Persistence operations behind crud.py.
+
+    crud.py keeps the backend-independent logic (password hashing,
+    timestamps, time windows) and hands every read and write to one of these
+    implementations. Ids are opaque strings at this boundary; each backend
+    decides how to parse them and returns None for ids it cannot parse.
+    Projections use Mongo's ``{"field": 1}`` form.
+    """
+
+    name = "storage"
+
+    async def startup(self) -> None:
+        """Connect and prepare schema/indexes. Called once at application start."""
+
+    async def close(self) -> None:
+        """Release connections. Called once at application shutdown."""
+
+    # Writes
+    @abstractmethod
+    async def insert_one(self, collection: str, document: Document) -> Document:
+        """Insert a document, set its "_id" and return it. Raises DuplicateRecord."""
+
+    @abstractmethod
+    async def insert_many(self, collection: str, documents: List[Document]) -> List[Document]:
+        """Bulk insert documents sharing the same fields, setting each "_id". Raises DuplicateRecord."""
+
+    @abstractmethod
+    async def update_farm(self, farm_id: str, owner_id: str, changes: Document) -> Optional[Document]:
+        """Apply changes to a farm owned by owner_id and return the updated farm."""
+
+    @abstractmethod
+    async def delete_farm(self, farm_id: str, owner_id: str) -> bool:
+        ...
+
+    @abstractmethod
+    async def is_empty(self, collection: str) -> bool:
+        """True when the collection holds no documents."""
+
+    # Users
+    @abstractmethod
+    async def get_user(self, user_id: str) -> Optional[Document]:
+        ...
+
+    @abstractmethod
+    async def update_user(self, user_id: str, changes: Document) -> Optional[Document]:
+        """Apply changes to a user and return the updated user. Raises DuplicateRecord."""
+
+    @abstractmethod
+    async def get_user_by_email(self, email: str) -> Optional[Document]:
+        ...
+
+    # Farms
+    @abstractmethod
+    async def get_farms_by_owner(self, owner_id: str, cursor: Optional[str], limit: int,
+                                 projection: Optional[Document] = None) -> DocumentPage:
+        ...
+
+    @abstractmethod
+    async def get_farm(self, farm_id: str, owner_id: str,
+                       projection: Optional[Document] = None) -> Optional[Document]:
+        ...
+
+    # Crops and diseases
+    @abstractmethod
+    async def list_crops(self, season: Optional[str], cursor: Optional[str], limit: int,
+                         projection: Optional[Document] = None) -> DocumentPage:
+        ...
+
+    @abstractmethod
+    async def get_crop(self, crop_id: str, projection: Optional[Document] = None) -> Optional[Document]:
+        ...
+
+    @abstractmethod
+    async def get_crop_diseases(self, crop_id: str, cursor: Optional[str], limit: int,
+                                projection: Optional[Document] = None) -> DocumentPage:
+        ...
+
+    # Market prices
+    @abstractmethod
+    async def get_latest_prices(self, market: Optional[str], crop_id: Optional[str], limit: int,
+                                projection: Optional[Document] = None) -> List[Document]:
+        """Most recent price per (crop_id, market_name), ordered by market_name then crop_id."""
+
+    @abstractmethod
+    async def get_price_history(self, crop_id: str, since: datetime, cursor: Optional[str], limit: int,
+                                projection: Optional[Document] = None) -> DocumentPage:
+        ...
+
+    @abstractmethod
+    def stream_price_history(self, crop_id: str, since: datetime, batch_size: int,
+                             projection: Optional[Document] = None) -> AsyncIterator[List[Document]]:
+        """Iterate the whole window newest first, in lists of at most batch_size."""
+
+    @abstractmethod
+    async def upsert_market_prices(self, documents: List[Document]) -> Tuple[int, int]:
+        """Upsert prices keyed on (crop_id, market_name, date); returns (inserted, updated).
+
+        Existing rows get the new price and keep their created_at. Keys must
+        be unique within one call.
+        """
+
+    @abstractmethod
+    async def get_markets(self) -> List[Document]:
+        """Market registry entries ordered by name."""
+
+    @abstractmethod
+    async def refresh_markets(self, market_names: Optional[List[str]]) -> None:
+        """Recompute the registry entries of these markets (all when None) from the monthly rollups.
+
+        Markets left without rollups are removed from the registry.
+        """
+
+    # Price rollups
+    @abstractmethod
+    def stream_market_prices(self, since: Optional[datetime], until: Optional[datetime],
+                             crop_ids: Optional[List[str]], market_names: Optional[List[str]],
+                             batch_size: int) -> AsyncIterator[List[Document]]:
+        """Iterate _id, crop_id, market_name, price, date and created_at of prices with since <= date < until.
+
+        Bounds and filters are optional; rows come in no particular order.
+        """
+
+    @abstractmethod
+    async def recompute_price_rollups(self, windows: List[Document]) -> None:
+        """Recompute rollups from market_prices, with the latest prices and markets they touch.
+
+        Each window names one rollup by crop_id, market_name, period and
+        start, and holds its end; the rollup is rebuilt from the prices with
+        start <= date < end. The latest price of each series is taken from its
+        month windows unless a newer one is stored, then the registry entries
+        of the windows' markets are refreshed. Prices are read and results
+        written in one step in the database, so a refresh running concurrently
+        in another worker cannot overwrite these results with older totals.
+        """
+
+    @abstractmethod
+    async def clear_price_rollups(self) -> None:
+        ...
+
+    @abstractmethod
+    async def clear_latest_prices(self) -> None:
+        ...
+
+    @abstractmethod
+    async def get_price_rollups(self, crop_id: str, period: str, since: datetime,
+                                market: Optional[str]) -> List[Document]:
+        """Rollups of one period starting at or after since, newest first."""
+
+    @abstractmethod
+    def stream_price_rollups(self, period: str, since: datetime,
+                             batch_size: int) -> AsyncIterator[List[Document]]:
+        """Iterate rollups of one period for every crop starting at or after since, in no particular order."""
+
+    # Price forecasts
+    @abstractmethod
+    async def store_price_forecasts(self, documents: List[Document], generated_at: datetime) -> None:
+        """Write forecasts keyed on (crop_id, market_name) and drop any generated before generated_at."""
+
+    # Leases
+    @abstractmethod
+    async def acquire_lease(self, name: str, holder: str, now: datetime, until: datetime) -> bool:
+        """Take or renew the named lease for holder until the given time.
+
+        Succeeds when nobody holds it, holder already does, or the previous
+        holder's lease expired before now; false while another holder's
+        lease is live. Lets one worker of many run a periodic job.
+        """
+
+    @abstractmethod
+    async def get_price_trends(self, crop_ids: List[str], since: datetime,
+                               markets: Optional[List[str]] = None) -> Dict[str, Document]:
+        """Trend statistics per crop over daily rollups from since (see app/trends.py), in one query.
+
+        Keyed by crop id; crops that do not exist are left out. markets
+        restricts the statistics to those markets. Each crop's stored
+        forecasts come back under "forecast", one per market.
+        """
+
+    # Weather
+    @abstractmethod
+    async def get_weather_history(self, location: str, since: datetime, cursor: Optional[str],
+                                  limit: int) -> DocumentPage:
+        ...
+
+    @abstractmethod
+    def stream_weather_history(self, location: str, since: datetime,
+                               batch_size: int) -> AsyncIterator[List[Document]]:
+        """Iterate the whole window newest first, in lists of at most batch_size."""
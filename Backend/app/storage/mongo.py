@@ -0,0 +1,541 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING, ReplaceOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, ConnectionFailure, DuplicateKeyError
+
+from ..config import settings
+from ..indexes import LATEST_PRICE_ORDER, ensure_indexes
+from ..pagination import ID_ORDER, NEWEST_FIRST, keyset_page
+from .base import Document, DocumentPage, DuplicateRecord, Storage
+
+logger = logging.getLogger(__name__)
+
+
+def _object_id(value: str) -> Optional[ObjectId]:
+    try:
+        return ObjectId(value)
+    except (InvalidId, TypeError):
+        return None
+
+
+async def _iter_batches(cursor, batch_size: int):
+    """Yield documents from a cursor in lists of at most batch_size."""
+    batch = []
+    async for document in cursor.batch_size(batch_size):
+        batch.append(document)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+_WEIGHTED_TOTAL = {"$sum": {"$multiply": ["$mean", "$count"]}}
+
+# Per-branch pipelines over one crop's daily rollups; app/trends.py defines the figures
+_TREND_FACETS = {
+    "overall": [
+        {"$group": {"_id": None, "total": _WEIGHTED_TOTAL, "count": {"$sum": "$count"}}},
+        {"$project": {"_id": 0, "count": 1, "average_price": {"$divide": ["$total", "$count"]}}},
+    ],
+    "current": [
+        {"$sort": {"last_at": -1}},
+        {"$limit": 1},
+        {"$project": {"_id": 0, "last": 1}},
+    ],
+    "markets": [
+        {"$sort": {"start": 1}},
+        {"$group": {
+            "_id": "$market_name",
+            "first_price": {"$first": "$mean"},
+            "current_price": {"$last": "$last"},
+            "total": _WEIGHTED_TOTAL,
+            "count": {"$sum": "$count"},
+            "min_price": {"$min": "$min"},
+            "max_price": {"$max": "$max"},
+        }},
+        {"$project": {
+            "_id": 0, "market_name": "$_id", "first_price": 1, "current_price": 1,
+            "average_price": {"$divide": ["$total", "$count"]},
+            "min_price": 1, "max_price": 1, "count": 1,
+        }},
+        {"$sort": {"market_name": 1}},
+    ],
+    "series": [
+        {"$group": {"_id": "$start", "total": _WEIGHTED_TOTAL, "count": {"$sum": "$count"}}},
+        {"$project": {"_id": 0, "date": "$_id", "price": {"$divide": ["$total", "$count"]}}},
+        {"$setWindowFields": {
+            "sortBy": {"date": 1},
+            "output": {
+                "ma_7": {"$avg": "$price", "window": {"range": [-6, 0], "unit": "day"}},
+                "ma_30": {"$avg": "$price", "window": {"range": [-29, 0], "unit": "day"}},
+                "previous": {"$shift": {"output": "$price", "by": -1}},
+            },
+        }},
+        {"$set": {"change": {"$cond": [
+            {"$gt": ["$previous", 0]},
+            {"$divide": [{"$subtract": ["$price", "$previous"]}, "$previous"]},
+            None,
+        ]}}},
+        {"$setWindowFields": {
+            "sortBy": {"date": 1},
+            "output": {"volatility": {"$stdDevSamp": "$change", "window": {"documents": ["unbounded", "unbounded"]}}},
+        }},
+    ],
+}
+
+
+class MongoStorage(Storage):
+    """Storage on MongoDB Atlas through Motor.
+
+    The client is created by connect() (called from startup()) rather than
+    in the constructor, so it is opened inside the running event loop of the
+    process that serves requests, never inherited across a fork.
+    """
+
+    name = "mongo"
+
+    def __init__(self, uri: str, db_name: str, **client_options):
+        self.uri = uri
+        self.db_name = db_name
+        self.client_options = client_options
+        self.client: Optional[AsyncIOMotorClient] = None
+        self.database: Optional[AsyncIOMotorDatabase] = None
+
+    def connect(self) -> None:
+        if self.client is None:
+            self.client = AsyncIOMotorClient(self.uri, **self.client_options)
+            self.database = self.client[self.db_name]
+
+    async def verify_connection(self) -> bool:
+        try:
+            # Send a ping to confirm a successful connection
+            await self.client.admin.command('ping')
+            logger.info("MongoDB Atlas connection verified successfully!")
+
+            # List available databases to verify permissions
+            databases = await self.client.list_database_names()
+            logger.info(f"Available databases: {databases}")
+
+            return True
+        except ConnectionFailure as e:
+            if "SSL" in str(e) or "TLS" in str(e):
+                logger.error("SSL/TLS Connection Error: Check your MongoDB Atlas SSL/TLS settings")
+                logger.error(f"Detailed error: {str(e)}")
+                raise ConnectionFailure(
+                    "SSL/TLS connection failed. Please verify your MongoDB Atlas SSL settings "
+                    "and ensure you're using a compatible Python version with proper SSL support."
+                )
+            else:
+                logger.error(f"MongoDB Connection Error: {str(e)}")
+                raise ConnectionFailure(f"Could not connect to MongoDB Atlas: {str(e)}")
+        except Exception as e:
+            logger.error(f"Unexpected error connecting to MongoDB Atlas: {str(e)}")
+            raise ConnectionFailure(f"Could not connect to MongoDB Atlas: {str(e)}")
+
+    async def startup(self) -> None:
+        self.connect()
+        try:
+            await asyncio.wait_for(self.verify_connection(), timeout=10.0)
+        except asyncio.TimeoutError:
+            logger.error("Database connection timed out")
+            raise ConnectionError("Could not connect to MongoDB Atlas - connection timed out")
+        logger.info("Database connection verified successfully")
+        if settings.AUTO_CREATE_INDEXES:
+            await ensure_indexes(self.database)
+
+    async def close(self) -> None:
+        if self.client is not None:
+            self.client.close()
+            self.client = None
+            self.database = None
+
+    # Writes
+    async def insert_one(self, collection: str, document: Document) -> Document:
+        try:
+            # insert_one sets document["_id"], so the document is what was stored
+            await self.database[collection].insert_one(document)
+        except DuplicateKeyError as e:
+            key = (e.details or {}).get("keyValue") or {}
+            raise DuplicateRecord(str(e), field=next(iter(key), None))
+        return document
+
+    async def insert_many(self, collection: str, documents: List[Document]) -> List[Document]:
+        if documents:
+            try:
+                # Unordered so the server can apply the batch in parallel
+                await self.database[collection].insert_many(documents, ordered=False)
+            except BulkWriteError as e:
+                errors = e.details.get("writeErrors", [])
+                if not errors or any(error.get("code") != 11000 for error in errors):
+                    raise
+                # Unordered: every document without a write error was stored
+                raise DuplicateRecord(str(e), rejected=[error["index"] for error in errors])
+        return documents
+
+    async def update_farm(self, farm_id: str, owner_id: str, changes: Document) -> Optional[Document]:
+        oid = _object_id(farm_id)
+        if oid is None:
+            return None
+        return await self.database.farms.find_one_and_update(
+            {"_id": oid, "owner_id": owner_id},
+            {"$set": changes},
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def delete_farm(self, farm_id: str, owner_id: str) -> bool:
+        oid = _object_id(farm_id)
+        if oid is None:
+            return False
+        result = await self.database.farms.delete_one({"_id": oid, "owner_id": owner_id})
+        return result.deleted_count > 0
+
+    async def is_empty(self, collection: str) -> bool:
+        return await self.database[collection].find_one({}, {"_id": 1}) is None
+
+    # Users
+    async def get_user(self, user_id: str) -> Optional[Document]:
+        oid = _object_id(user_id)
+        if oid is None:
+            return None
+        return await self.database.users.find_one({"_id": oid})
+
+    async def update_user(self, user_id: str, changes: Document) -> Optional[Document]:
+        oid = _object_id(user_id)
+        if oid is None:
+            return None
+        try:
+            return await self.database.users.find_one_and_update(
+                {"_id": oid},
+                {"$set": changes},
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError as e:
+            key = (e.details or {}).get("keyValue") or {}
+            raise DuplicateRecord(str(e), field=next(iter(key), None))
+
+    async def get_user_by_email(self, email: str) -> Optional[Document]:
+        return await self.database.users.find_one({"email": email})
+
+    # Farms
+    async def get_farms_by_owner(self, owner_id: str, cursor: Optional[str], limit: int,
+                                 projection: Optional[Document] = None) -> DocumentPage:
+        return await keyset_page(self.database.farms, {"owner_id": owner_id}, ID_ORDER,
+                                 cursor=cursor, limit=limit, projection=projection)
+
+    async def get_farm(self, farm_id: str, owner_id: str,
+                       projection: Optional[Document] = None) -> Optional[Document]:
+        oid = _object_id(farm_id)
+        if oid is None:
+            return None
+        return await self.database.farms.find_one({"_id": oid, "owner_id": owner_id}, projection)
+
+    # Crops and diseases
+    async def list_crops(self, season: Optional[str], cursor: Optional[str], limit: int,
+                         projection: Optional[Document] = None) -> DocumentPage:
+        query = {}
+        if season:
+            query["season"] = season
+        return await keyset_page(self.database.crops, query, ID_ORDER,
+                                 cursor=cursor, limit=limit, projection=projection)
+
+    async def get_crop(self, crop_id: str, projection: Optional[Document] = None) -> Optional[Document]:
+        oid = _object_id(crop_id)
+        if oid is None:
+            return None
+        return await self.database.crops.find_one({"_id": oid}, projection)
+
+    async def get_crop_diseases(self, crop_id: str, cursor: Optional[str], limit: int,
+                                projection: Optional[Document] = None) -> DocumentPage:
+        return await keyset_page(self.database.diseases, {"crop_id": crop_id}, ID_ORDER,
+                                 cursor=cursor, limit=limit, projection=projection)
+
+    # Market prices
+    async def get_latest_prices(self, market: Optional[str], crop_id: Optional[str], limit: int,
+                                projection: Optional[Document] = None) -> List[Document]:
+        query = {}
+        if market:
+            query["market_name"] = market
+        if crop_id:
+            query["crop_id"] = crop_id
+        # The view has its own _id; the price's id is kept in price_id
+        if projection is not None:
+            projection = {("price_id" if field == "_id" else field): value for field, value in projection.items()}
+            projection.setdefault("price_id", 1)
+        projection = {**(projection or {}), "_id": 0}
+        cursor = self.database.latest_prices.find(query, projection).sort(LATEST_PRICE_ORDER).limit(limit)
+        documents = await cursor.to_list(length=limit)
+        for document in documents:
+            document["_id"] = document.pop("price_id")
+        return documents
+
+    async def get_price_history(self, crop_id: str, since: datetime, cursor: Optional[str], limit: int,
+                                projection: Optional[Document] = None) -> DocumentPage:
+        query = {"crop_id": crop_id, "date": {"$gte": since}}
+        return await keyset_page(self.database.market_prices, query, NEWEST_FIRST,
+                                 cursor=cursor, limit=limit, projection=projection)
+
+    def stream_price_history(self, crop_id: str, since: datetime, batch_size: int,
+                             projection: Optional[Document] = None):
+        query = {"crop_id": crop_id, "date": {"$gte": since}}
+        cursor = self.database.market_prices.find(query, projection).sort(NEWEST_FIRST)
+        return _iter_batches(cursor, batch_size)
+
+    async def upsert_market_prices(self, documents: List[Document]) -> Tuple[int, int]:
+        if not documents:
+            return 0, 0
+        operations = [
+            UpdateOne(
+                {"crop_id": d["crop_id"], "market_name": d["market_name"], "date": d["date"]},
+                {"$set": {"price": d["price"]}, "$setOnInsert": {"created_at": d["created_at"]}},
+                upsert=True,
+            )
+            for d in documents
+        ]
+        result = await self.database.market_prices.bulk_write(operations, ordered=False)
+        return result.upserted_count, result.matched_count
+
+    async def get_markets(self) -> List[Document]:
+        cursor = self.database.markets.find({}, {"_id": 0}).sort("name", ASCENDING)
+        markets = await cursor.to_list(length=None)
+        for market in markets:
+            market["crop_ids"].sort()
+        return markets
+
+    async def refresh_markets(self, market_names: Optional[List[str]]) -> None:
+        match = {"period": "month"}
+        if market_names is not None:
+            match["market_name"] = {"$in": market_names}
+        pipeline = [
+            {"$match": match},
+            {"$group": {
+                "_id": "$market_name",
+                "crop_ids": {"$addToSet": "$crop_id"},
+                "last_price_date": {"$max": "$last_at"},
+                "price_count": {"$sum": "$count"},
+            }},
+            {"$project": {
+                "_id": 0, "name": "$_id", "crop_ids": 1, "last_price_date": 1, "price_count": 1,
+                "updated_at": "$$NOW",
+            }},
+            # Grouped and written by the server in one command, without a round trip in between
+            {"$merge": {"into": "markets", "on": "name", "whenMatched": "merge", "whenNotMatched": "insert"}},
+        ]
+        await self.database.price_rollups.aggregate(pipeline).to_list(length=None)
+        # Markets without rollups any more are dropped
+        traded = await self.database.price_rollups.distinct("market_name", match)
+        stale = {"name": {"$nin": traded}}
+        if market_names is not None:
+            stale["name"]["$in"] = market_names
+        await self.database.markets.delete_many(stale)
+
+    # Price rollups
+    def stream_market_prices(self, since: Optional[datetime], until: Optional[datetime],
+                             crop_ids: Optional[List[str]], market_names: Optional[List[str]],
+                             batch_size: int):
+        query = {}
+        if since or until:
+            query["date"] = {}
+            if since:
+                query["date"]["$gte"] = since
+            if until:
+                query["date"]["$lt"] = until
+        if crop_ids is not None:
+            query["crop_id"] = {"$in": crop_ids}
+        if market_names is not None:
+            query["market_name"] = {"$in": market_names}
+        projection = {"crop_id": 1, "market_name": 1, "price": 1, "date": 1, "created_at": 1}
+        return _iter_batches(self.database.market_prices.find(query, projection), batch_size)
+
+    async def recompute_price_rollups(self, windows: List[Document]) -> None:
+        if not windows:
+            return
+        prices = {"$or": [
+            {"crop_id": w["crop_id"], "market_name": w["market_name"], "date": {"$gte": w["start"], "$lt": w["end"]}}
+            for w in windows
+        ]}
+        wanted = {"$or": [
+            {"crop_id": w["crop_id"], "market_name": w["market_name"], "period": w["period"], "start": w["start"]}
+            for w in windows
+        ]}
+        # Each pipeline reads the prices and writes its results in one server-side
+        # command, so a concurrent refresh cannot interleave a stale write
+        rollups = [
+            {"$match": prices},
+            {"$sort": {"date": 1, "_id": 1}},
+            {"$set": {"period": ["day", "week", "month"]}},
+            {"$unwind": "$period"},
+            {"$set": {"start": {"$dateTrunc": {"date": "$date", "unit": "$period", "startOfWeek": "monday"}}}},
+            # A week window reaches into months that were not written; leave those rollups alone
+            {"$match": wanted},
+            {"$group": {
+                "_id": {"crop_id": "$crop_id", "market_name": "$market_name", "period": "$period", "start": "$start"},
+                "min": {"$min": "$price"},
+                "max": {"$max": "$price"},
+                "mean": {"$avg": "$price"},
+                "last": {"$last": "$price"},
+                "last_at": {"$last": "$date"},
+                "count": {"$sum": 1},
+            }},
+            {"$replaceWith": {"$mergeObjects": [
+                "$_id",
+                {"min": "$min", "max": "$max", "mean": "$mean", "last": "$last", "last_at": "$last_at",
+                 "count": "$count", "updated_at": "$$NOW"},
+            ]}},
+            {"$merge": {
+                "into": "price_rollups", "on": ["crop_id", "period", "start", "market_name"],
+                "whenMatched": "merge", "whenNotMatched": "insert",
+            }},
+        ]
+        months = [
+            {"crop_id": w["crop_id"], "market_name": w["market_name"], "date": {"$gte": w["start"], "$lt": w["end"]}}
+            for w in windows if w["period"] == "month"
+        ]
+        latest = [
+            {"$match": {"$or": months}},
+            {"$sort": {"date": -1, "_id": -1}},
+            {"$group": {
+                "_id": {"crop_id": "$crop_id", "market_name": "$market_name"},
+                "price_id": {"$first": "$_id"},
+                "price": {"$first": "$price"},
+                "date": {"$first": "$date"},
+                "created_at": {"$first": "$created_at"},
+            }},
+            {"$replaceWith": {"$mergeObjects": [
+                "$_id", {"price_id": "$price_id", "price": "$price", "date": "$date", "created_at": "$created_at"},
+            ]}},
+            # Keep the stored price when it is newer
+            {"$merge": {
+                "into": "latest_prices", "on": ["crop_id", "market_name"],
+                "whenMatched": [{"$replaceWith": {"$cond": [
+                    {"$gt": ["$date", "$$new.date"]}, "$$ROOT", {"$mergeObjects": ["$$new", {"_id": "$_id"}]},
+                ]}}],
+                "whenNotMatched": "insert",
+            }},
+        ]
+        await self.database.market_prices.aggregate(rollups).to_list(length=None)
+        if months:
+            await self.database.market_prices.aggregate(latest).to_list(length=None)
+        await self.refresh_markets(sorted({w["market_name"] for w in windows}))
+
+    async def clear_price_rollups(self) -> None:
+        await self.database.price_rollups.delete_many({})
+
+    async def clear_latest_prices(self) -> None:
+        await self.database.latest_prices.delete_many({})
+
+    async def get_price_rollups(self, crop_id: str, period: str, since: datetime,
+                                market: Optional[str]) -> List[Document]:
+        query = {"crop_id": crop_id, "period": period, "start": {"$gte": since}}
+        if market:
+            query["market_name"] = market
+        cursor = self.database.price_rollups.find(query, {"_id": 0}).sort(
+            [("start", DESCENDING), ("market_name", ASCENDING)]
+        )
+        return await cursor.to_list(length=None)
+
+    def stream_price_rollups(self, period: str, since: datetime, batch_size: int):
+        cursor = self.database.price_rollups.find({"period": period, "start": {"$gte": since}}, {"_id": 0})
+        return _iter_batches(cursor, batch_size)
+
+    # Price forecasts
+    async def store_price_forecasts(self, documents: List[Document], generated_at: datetime) -> None:
+        if documents:
+            operations = [
+                ReplaceOne({"crop_id": d["crop_id"], "market_name": d["market_name"]}, d, upsert=True)
+                for d in documents
+            ]
+            await self.database.price_forecasts.bulk_write(operations, ordered=False)
+        # Series that were not forecast this run have stopped trading or lost their history
+        await self.database.price_forecasts.delete_many({"generated_at": {"$lt": generated_at}})
+
+    async def acquire_lease(self, name: str, holder: str, now: datetime, until: datetime) -> bool:
+        try:
+            # Matches only a lease we may take; otherwise the upsert collides on _id
+            await self.database.locks.update_one(
+                {"_id": name, "$or": [{"holder": holder}, {"expires_at": {"$lt": now}}]},
+                {"$set": {"holder": holder, "expires_at": until}},
+                upsert=True,
+            )
+            return True
+        except DuplicateKeyError:
+            return False
+
+    async def get_price_trends(self, crop_ids: List[str], since: datetime,
+                               markets: Optional[List[str]] = None) -> Dict[str, Document]:
+        oids = [oid for oid in (_object_id(crop_id) for crop_id in crop_ids) if oid is not None]
+        if not oids:
+            return {}
+        rollup_filter = {"period": "day", "start": {"$gte": since}}
+        market_filter = {}
+        if markets is not None:
+            market_filter["market_name"] = {"$in": markets}
+            rollup_filter.update(market_filter)
+        # Starts from the crops so a missing crop yields no document at all;
+        # each crop's statistics are computed over its daily rollups in the $lookup
+        pipeline = [
+            {"$match": {"_id": {"$in": oids}}},
+            {"$project": {"crop_id": {"$toString": "$_id"}}},
+            {"$lookup": {
+                "from": "price_rollups",
+                "localField": "crop_id",
+                "foreignField": "crop_id",
+                "pipeline": [
+                    {"$match": rollup_filter},
+                    {"$facet": _TREND_FACETS},
+                ],
+                "as": "stats",
+            }},
+            {"$lookup": {
+                "from": "price_forecasts",
+                "localField": "crop_id",
+                "foreignField": "crop_id",
+                "pipeline": [
+                    {"$match": market_filter},
+                    {"$sort": {"market_name": 1}},
+                    {"$project": {"_id": 0, "crop_id": 0}},
+                ],
+                "as": "forecast",
+            }},
+            {"$project": {"crop_id": 1, "forecast": 1, "stats": {"$first": "$stats"}}},
+            {"$project": {
+                "_id": 0,
+                "crop_id": 1,
+                "forecast": 1,
+                "current_price": {"$first": "$stats.current.last"},
+                "first_price": {"$first": "$stats.series.price"},
+                "average_price": {"$first": "$stats.overall.average_price"},
+                "volatility": {"$multiply": [{"$first": "$stats.series.volatility"}, 100]},
+                "count": {"$ifNull": [{"$first": "$stats.overall.count"}, 0]},
+                "markets": "$stats.markets",
+                "series": {"$map": {
+                    "input": "$stats.series",
+                    "in": {"date": "$$this.date", "price": "$$this.price",
+                           "ma_7": "$$this.ma_7", "ma_30": "$$this.ma_30"},
+                }},
+            }},
+        ]
+        trends = {}
+        async for document in self.database.crops.aggregate(pipeline):
+            # $first of an empty array leaves the field out; match trend_statistics()
+            for field in ("current_price", "first_price", "average_price", "volatility"):
+                document.setdefault(field, None)
+            trends[document.pop("crop_id")] = document
+        return trends
+
+    # Weather
+    async def get_weather_history(self, location: str, since: datetime, cursor: Optional[str],
+                                  limit: int) -> DocumentPage:
+        query = {"location": location, "date": {"$gte": since}}
+        return await keyset_page(self.database.weather_data, query, NEWEST_FIRST, cursor=cursor, limit=limit)
+
+    def stream_weather_history(self, location: str, since: datetime, batch_size: int):
+        query = {"location": location, "date": {"$gte": since}}
+        cursor = self.database.weather_data.find(query).sort(NEWEST_FIRST)
+        return _iter_batches(cursor, batch_size)
@@ -0,0 +1,743 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import aiosqlite
+
+from ..pagination import ID_ORDER, NEWEST_FIRST, SortSpec, decode_cursor, encode_cursor
+from ..trends import TREND_COLUMNS, empty_trends, trend_statistics
+from .base import Document, DocumentPage, DuplicateRecord, Storage
+
+logger = logging.getLogger(__name__)
+
+# Same tables as the bundled fasalsaathi.db, so an existing file is used as is
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS users (
+        id INTEGER NOT NULL,
+        email VARCHAR,
+        phone VARCHAR,
+        hashed_password VARCHAR,
+        full_name VARCHAR,
+        language_preference VARCHAR,
+        is_active BOOLEAN,
+        created_at DATETIME,
+        updated_at DATETIME,
+        PRIMARY KEY (id)
+    )""",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_users_phone ON users (phone)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_users_email ON users (email)",
+    """CREATE TABLE IF NOT EXISTS crops (
+        id INTEGER NOT NULL,
+        name VARCHAR,
+        name_hindi VARCHAR,
+        scientific_name VARCHAR,
+        season VARCHAR,
+        duration INTEGER,
+        water_requirement FLOAT,
+        created_at DATETIME,
+        updated_at DATETIME,
+        PRIMARY KEY (id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS weather_data (
+        id INTEGER NOT NULL,
+        location VARCHAR,
+        temperature FLOAT,
+        humidity FLOAT,
+        rainfall FLOAT,
+        wind_speed FLOAT,
+        date DATETIME,
+        created_at DATETIME,
+        PRIMARY KEY (id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS farms (
+        id INTEGER NOT NULL,
+        name VARCHAR,
+        location VARCHAR,
+        area FLOAT,
+        soil_type VARCHAR,
+        irrigation_type VARCHAR,
+        owner_id INTEGER,
+        created_at DATETIME,
+        updated_at DATETIME,
+        PRIMARY KEY (id),
+        FOREIGN KEY(owner_id) REFERENCES users (id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS diseases (
+        id INTEGER NOT NULL,
+        name VARCHAR,
+        name_hindi VARCHAR,
+        crop_id INTEGER,
+        symptoms VARCHAR,
+        prevention VARCHAR,
+        treatment VARCHAR,
+        created_at DATETIME,
+        updated_at DATETIME,
+        PRIMARY KEY (id),
+        FOREIGN KEY(crop_id) REFERENCES crops (id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS market_prices (
+        id INTEGER NOT NULL,
+        crop_id INTEGER,
+        market_name VARCHAR,
+        price FLOAT,
+        date DATETIME,
+        created_at DATETIME,
+        PRIMARY KEY (id),
+        FOREIGN KEY(crop_id) REFERENCES crops (id)
+    )""",
+    # Maintained by app/rollups.py; the key doubles as the read index
+    """CREATE TABLE IF NOT EXISTS price_rollups (
+        crop_id INTEGER NOT NULL,
+        period VARCHAR NOT NULL,
+        start DATETIME NOT NULL,
+        market_name VARCHAR NOT NULL,
+        min FLOAT,
+        max FLOAT,
+        mean FLOAT,
+        last FLOAT,
+        last_at DATETIME,
+        count INTEGER,
+        updated_at DATETIME,
+        PRIMARY KEY (crop_id, period, start, market_name)
+    ) WITHOUT ROWID""",
+    # Latest price per crop and market, maintained by app/rollups.py; id is the price's id
+    """CREATE TABLE IF NOT EXISTS latest_prices (
+        crop_id INTEGER NOT NULL,
+        market_name VARCHAR NOT NULL,
+        id INTEGER NOT NULL,
+        price FLOAT,
+        date DATETIME,
+        created_at DATETIME,
+        PRIMARY KEY (crop_id, market_name)
+    ) WITHOUT ROWID""",
+    # Registry of markets, derived from the monthly price_rollups; crop_ids is a JSON array
+    """CREATE TABLE IF NOT EXISTS markets (
+        name VARCHAR NOT NULL PRIMARY KEY,
+        crop_ids TEXT,
+        last_price_date DATETIME,
+        price_count INTEGER,
+        updated_at DATETIME
+    ) WITHOUT ROWID""",
+    # Written by app/forecasting.py; points is a JSON array
+    """CREATE TABLE IF NOT EXISTS price_forecasts (
+        crop_id INTEGER NOT NULL,
+        market_name VARCHAR NOT NULL,
+        generated_at DATETIME,
+        model VARCHAR,
+        mae FLOAT,
+        baseline_mae FLOAT,
+        points TEXT,
+        PRIMARY KEY (crop_id, market_name)
+    ) WITHOUT ROWID""",
+    # Storage.acquire_lease; one row per lease
+    """CREATE TABLE IF NOT EXISTS locks (
+        name VARCHAR NOT NULL PRIMARY KEY,
+        holder VARCHAR NOT NULL,
+        expires_at DATETIME NOT NULL
+    ) WITHOUT ROWID""",
+    # Query indexes, mirroring app/indexes.py for the Mongo backend
+    "CREATE INDEX IF NOT EXISTS ix_farms_owner_id_id ON farms (owner_id, id)",
+    "CREATE INDEX IF NOT EXISTS ix_crops_season_id ON crops (season, id)",
+    "CREATE INDEX IF NOT EXISTS ix_diseases_crop_id_id ON diseases (crop_id, id)",
+    "CREATE INDEX IF NOT EXISTS ix_market_prices_crop_id_date_id ON market_prices (crop_id, date DESC, id DESC)",
+    "CREATE INDEX IF NOT EXISTS ix_market_prices_market_name_date ON market_prices (market_name, date DESC)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_market_prices_crop_id_market_name_date "
+    "ON market_prices (crop_id, market_name, date)",
+    "CREATE INDEX IF NOT EXISTS ix_latest_prices_market_name_crop_id ON latest_prices (market_name, crop_id)",
+    "CREATE INDEX IF NOT EXISTS ix_price_rollups_period_market_name ON price_rollups (period, market_name)",
+    "CREATE INDEX IF NOT EXISTS ix_weather_data_location_date_id ON weather_data (location, date DESC, id DESC)",
+]
+
+PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+]
+
+DATETIME_COLUMNS = {"created_at", "updated_at", "date", "test_date", "start", "last_at", "generated_at", "last_price_date"}
+# Foreign keys are INTEGER columns but strings in the API schemas
+REFERENCE_COLUMNS = {"owner_id", "crop_id", "farm_id"}
+BOOLEAN_COLUMNS = {"is_active"}
+JSON_COLUMNS = {"points", "crop_ids"}
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+# Rollups of the windows staged in rollup_windows, recomputed from market_prices;
+# last is the price with the newest date, the newest row breaking ties
+RECOMPUTE_ROLLUPS = """
+    INSERT OR REPLACE INTO price_rollups
+        (crop_id, period, start, market_name, min, max, mean, last, last_at, count, updated_at)
+    SELECT crop_id, period, start, market_name, MIN(price), MAX(price), AVG(price), MAX(last), MAX(date), COUNT(*), ?
+    FROM (
+        SELECT w.crop_id, w.period, w.start, w.market_name, m.price, m.date,
+               FIRST_VALUE(m.price) OVER (
+                   PARTITION BY w.crop_id, w.market_name, w.period, w.start ORDER BY m.date DESC, m.id DESC
+               ) AS last
+        FROM rollup_windows AS w JOIN market_prices AS m
+        ON m.crop_id = w.crop_id AND m.market_name = w.market_name AND m.date >= w.start AND m.date < w.until
+    )
+    GROUP BY crop_id, period, start, market_name
+"""
+
+# Newest price of each series within its staged month windows, kept unless a newer one is stored
+RECOMPUTE_LATEST_PRICES = """
+    INSERT INTO latest_prices (crop_id, market_name, id, price, date, created_at)
+    SELECT crop_id, market_name, id, price, date, created_at
+    FROM (
+        SELECT m.crop_id, m.market_name, m.id, m.price, m.date, m.created_at,
+               ROW_NUMBER() OVER (PARTITION BY m.crop_id, m.market_name ORDER BY m.date DESC, m.id DESC) AS rank
+        FROM rollup_windows AS w JOIN market_prices AS m
+        ON m.crop_id = w.crop_id AND m.market_name = w.market_name AND m.date >= w.start AND m.date < w.until
+        WHERE w.period = 'month'
+    )
+    WHERE rank = 1
+    ON CONFLICT (crop_id, market_name) DO UPDATE SET id = excluded.id, price = excluded.price,
+        date = excluded.date, created_at = excluded.created_at WHERE excluded.date >= latest_prices.date
+"""
+
+
+def _int_id(value: Any) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def to_db_value(value: Any) -> Any:
+    """Convert a document value to its SQLite representation."""
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        # Millisecond precision, as BSON dates on Mongo, so a date read back
+        # from a pagination cursor compares equal to the stored one
+        value = value.replace(microsecond=value.microsecond // 1000 * 1000)
+        # Fixed-width text keeps lexicographic order equal to time order
+        return value.strftime(DATETIME_FORMAT)
+    if isinstance(value, bool):
+        return int(value)
+    return value
+
+
+def to_document(row: sqlite3.Row) -> Document:
+    """Convert a row to the document shape crud.py and the schemas expect."""
+    document = {}
+    for key in row.keys():
+        value = row[key]
+        if key == "id":
+            key = "_id"
+        elif value is None:
+            # NULL columns are fields the document never set; leave them out as
+            # Mongo would so schema defaults apply
+            continue
+        elif key in DATETIME_COLUMNS:
+            value = datetime.fromisoformat(value)
+        elif key in REFERENCE_COLUMNS:
+            value = str(value)
+        elif key in BOOLEAN_COLUMNS:
+            value = bool(value)
+        elif key in JSON_COLUMNS:
+            value = json.loads(value)
+        document[key] = value
+    return document
+
+
+def _select_columns(projection: Optional[Document], sort: SortSpec = ()) -> str:
+    if projection is None:
+        return "*"
+    fields = set(projection) | {field for field, _ in sort} | {"_id"}
+    return ", ".join(sorted("id" if field == "_id" else field for field in fields))
+
+
+def _order_by(sort: SortSpec) -> str:
+    return ", ".join(
+        f"{'id' if field == '_id' else field} {'ASC' if direction > 0 else 'DESC'}"
+        for field, direction in sort
+    )
+
+
+def _after(sort: SortSpec) -> str:
+    """Row-value condition for rows strictly after the cursor position.
+
+    Only uniform-direction sorts are used (ID_ORDER and NEWEST_FIRST), so a
+    single tuple comparison expresses the keyset seek.
+    """
+    columns = ", ".join("id" if field == "_id" else field for field, _ in sort)
+    placeholders = ", ".join("?" for _ in sort)
+    operator = ">" if sort[0][1] > 0 else "<"
+    return f"({columns}) {operator} ({placeholders})"
+
+
+class SQLiteStorage(Storage):
+    """Embedded storage on a local SQLite file through aiosqlite.
+
+    Intended for single-node edge deployments: reads are served from the
+    local file with no network round trip. The database runs in WAL mode so
+    readers never block behind the writer.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[aiosqlite.Connection] = None
+        # Serializes explicit transactions on the shared connection
+        self._write_lock = asyncio.Lock()
+
+    @property
+    def conn(self) -> aiosqlite.Connection:
+        if self._conn is None:
+            raise RuntimeError("SQLite storage used before startup()")
+        return self._conn
+
+    async def startup(self) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        # Autocommit mode; multi-statement writes open their own transaction
+        self._conn = await aiosqlite.connect(self.path, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        for pragma in PRAGMAS:
+            await self._conn.execute(pragma)
+        for statement in SCHEMA:
+            try:
+                await self._conn.execute(statement)
+            except sqlite3.IntegrityError as e:
+                # A unique index over existing duplicates; serve anyway, as ensure_indexes does on Mongo
+                logger.error(f"Could not apply schema statement {statement!r}: {e}")
+        logger.info(f"SQLite storage ready at {self.path}")
+
+    async def close(self) -> None:
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+
+    async def _fetch_one(self, sql: str, params: Sequence[Any]) -> Optional[Document]:
+        async with self.conn.execute(sql, params) as cursor:
+            row = await cursor.fetchone()
+        return to_document(row) if row is not None else None
+
+    async def _fetch_all(self, sql: str, params: Sequence[Any]) -> List[Document]:
+        async with self.conn.execute(sql, params) as cursor:
+            rows = await cursor.fetchall()
+        return [to_document(row) for row in rows]
+
+    async def _page(self, table: str, where: List[str], params: List[Any], sort: SortSpec,
+                    cursor: Optional[str], limit: int, projection: Optional[Document]) -> DocumentPage:
+        where = list(where)
+        params = list(params)
+        if cursor:
+            position = decode_cursor(cursor, sort)
+            where.append(_after(sort))
+            params.extend(to_db_value(position[field]) for field, _ in sort)
+
+        sql = f"SELECT {_select_columns(projection, sort)} FROM {table}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {_order_by(sort)} LIMIT ?"
+        params.append(limit + 1)
+
+        async with self.conn.execute(sql, params) as db_cursor:
+            rows = await db_cursor.fetchall()
+
+        documents = [to_document(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            # The cursor carries document values (datetimes, integer ids) as on Mongo;
+            # they are converted back to column values when the seek is bound
+            next_cursor = encode_cursor(documents[-1], sort)
+        return documents, next_cursor
+
+    async def _iter_batches(self, sql: str, params: Sequence[Any], batch_size: int):
+        async with self.conn.execute(sql, params) as cursor:
+            while True:
+                rows = await cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield [to_document(row) for row in rows]
+
+    # Writes
+    async def insert_one(self, collection: str, document: Document) -> Document:
+        columns = [key for key in document if key != "_id"]
+        sql = (
+            f"INSERT INTO {collection} ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' for _ in columns)})"
+        )
+        try:
+            async with self._write_lock, self.conn.execute(sql, [to_db_value(document[c]) for c in columns]) as cursor:
+                document["_id"] = cursor.lastrowid
+        except sqlite3.IntegrityError as e:
+            # e.g. "UNIQUE constraint failed: users.email"
+            field = str(e).rsplit(".", 1)[-1] if "UNIQUE" in str(e) else None
+            raise DuplicateRecord(str(e), field=field)
+        return document
+
+    async def insert_many(self, collection: str, documents: List[Document]) -> List[Document]:
+        if not documents:
+            return documents
+        columns = [key for key in documents[0] if key != "_id"]
+        sql = (
+            f"INSERT INTO {collection} ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' for _ in columns)})"
+        )
+        rows = [[to_db_value(document[c]) for c in columns] for document in documents]
+        async with self._write_lock:
+            # One transaction for the batch: a single fsync instead of one per row,
+            # and nothing else inserts in between so the new ids are consecutive
+            await self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                await self.conn.executemany(sql, rows)
+                async with self.conn.execute("SELECT last_insert_rowid()") as cursor:
+                    last_id = (await cursor.fetchone())[0]
+                await self.conn.execute("COMMIT")
+            except sqlite3.IntegrityError as e:
+                await self.conn.execute("ROLLBACK")
+                raise DuplicateRecord(str(e))
+            except BaseException:
+                await self.conn.execute("ROLLBACK")
+                raise
+        for offset, document in enumerate(documents, start=last_id - len(documents) + 1):
+            document["_id"] = offset
+        return documents
+
+    async def update_farm(self, farm_id: str, owner_id: str, changes: Document) -> Optional[Document]:
+        farm_key, owner_key = _int_id(farm_id), _int_id(owner_id)
+        if farm_key is None or owner_key is None:
+            return None
+        assignments = ", ".join(f"{column} = ?" for column in changes)
+        params = [to_db_value(value) for value in changes.values()] + [farm_key, owner_key]
+        # Under the lock so the statement never lands inside another writer's transaction
+        async with self._write_lock:
+            return await self._fetch_one(
+                f"UPDATE farms SET {assignments} WHERE id = ? AND owner_id = ? RETURNING *", params
+            )
+
+    async def delete_farm(self, farm_id: str, owner_id: str) -> bool:
+        farm_key, owner_key = _int_id(farm_id), _int_id(owner_id)
+        if farm_key is None or owner_key is None:
+            return False
+        async with self._write_lock, self.conn.execute(
+            "DELETE FROM farms WHERE id = ? AND owner_id = ?", (farm_key, owner_key)
+        ) as cursor:
+            return cursor.rowcount > 0
+
+    async def is_empty(self, collection: str) -> bool:
+        return await self._fetch_one(f"SELECT 1 AS found FROM {collection} LIMIT 1", ()) is None
+
+    # Users
+    async def get_user(self, user_id: str) -> Optional[Document]:
+        key = _int_id(user_id)
+        if key is None:
+            return None
+        return await self._fetch_one("SELECT * FROM users WHERE id = ?", (key,))
+
+    async def update_user(self, user_id: str, changes: Document) -> Optional[Document]:
+        key = _int_id(user_id)
+        if key is None:
+            return None
+        assignments = ", ".join(f"{column} = ?" for column in changes)
+        params = [to_db_value(value) for value in changes.values()] + [key]
+        try:
+            async with self._write_lock:
+                return await self._fetch_one(f"UPDATE users SET {assignments} WHERE id = ? RETURNING *", params)
+        except sqlite3.IntegrityError as e:
+            field = str(e).rsplit(".", 1)[-1] if "UNIQUE" in str(e) else None
+            raise DuplicateRecord(str(e), field=field)
+
+    async def get_user_by_email(self, email: str) -> Optional[Document]:
+        return await self._fetch_one("SELECT * FROM users WHERE email = ?", (email,))
+
+    # Farms
+    async def get_farms_by_owner(self, owner_id: str, cursor: Optional[str], limit: int,
+                                 projection: Optional[Document] = None) -> DocumentPage:
+        owner_key = _int_id(owner_id)
+        if owner_key is None:
+            return [], None
+        return await self._page("farms", ["owner_id = ?"], [owner_key], ID_ORDER, cursor, limit, projection)
+
+    async def get_farm(self, farm_id: str, owner_id: str,
+                       projection: Optional[Document] = None) -> Optional[Document]:
+        farm_key, owner_key = _int_id(farm_id), _int_id(owner_id)
+        if farm_key is None or owner_key is None:
+            return None
+        return await self._fetch_one(
+            f"SELECT {_select_columns(projection)} FROM farms WHERE id = ? AND owner_id = ?",
+            (farm_key, owner_key)
+        )
+
+    # Crops and diseases
+    async def list_crops(self, season: Optional[str], cursor: Optional[str], limit: int,
+                         projection: Optional[Document] = None) -> DocumentPage:
+        where, params = [], []
+        if season:
+            where.append("season = ?")
+            params.append(season)
+        return await self._page("crops", where, params, ID_ORDER, cursor, limit, projection)
+
+    async def get_crop(self, crop_id: str, projection: Optional[Document] = None) -> Optional[Document]:
+        key = _int_id(crop_id)
+        if key is None:
+            return None
+        return await self._fetch_one(f"SELECT {_select_columns(projection)} FROM crops WHERE id = ?", (key,))
+
+    async def get_crop_diseases(self, crop_id: str, cursor: Optional[str], limit: int,
+                                projection: Optional[Document] = None) -> DocumentPage:
+        key = _int_id(crop_id)
+        if key is None:
+            return [], None
+        return await self._page("diseases", ["crop_id = ?"], [key], ID_ORDER, cursor, limit, projection)
+
+    # Market prices
+    async def get_latest_prices(self, market: Optional[str], crop_id: Optional[str], limit: int,
+                                projection: Optional[Document] = None) -> List[Document]:
+        sql = f"SELECT {_select_columns(projection)} FROM latest_prices"
+        where, params = [], []
+        if market:
+            where.append("market_name = ?")
+            params.append(market)
+        if crop_id:
+            where.append("crop_id = ?")
+            params.append(_int_id(crop_id))
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        return await self._fetch_all(sql + " ORDER BY market_name, crop_id LIMIT ?", [*params, limit])
+
+    async def get_price_history(self, crop_id: str, since: datetime, cursor: Optional[str], limit: int,
+                                projection: Optional[Document] = None) -> DocumentPage:
+        return await self._page(
+            "market_prices", ["crop_id = ?", "date >= ?"], [_int_id(crop_id), to_db_value(since)],
+            NEWEST_FIRST, cursor, limit, projection
+        )
+
+    def stream_price_history(self, crop_id: str, since: datetime, batch_size: int,
+                             projection: Optional[Document] = None):
+        sql = (
+            f"SELECT {_select_columns(projection, NEWEST_FIRST)} FROM market_prices "
+            f"WHERE crop_id = ? AND date >= ? ORDER BY {_order_by(NEWEST_FIRST)}"
+        )
+        return self._iter_batches(sql, (_int_id(crop_id), to_db_value(since)), batch_size)
+
+    async def upsert_market_prices(self, documents: List[Document]) -> Tuple[int, int]:
+        if not documents:
+            return 0, 0
+        rows = [
+            (to_db_value(d["crop_id"]), d["market_name"], d["price"], to_db_value(d["date"]), to_db_value(d["created_at"]))
+            for d in documents
+        ]
+        async with self._write_lock:
+            # Stage the batch, then update matches and insert the rest as two set-based statements
+            await self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                await self.conn.execute(
+                    "CREATE TEMP TABLE IF NOT EXISTS price_upserts "
+                    "(crop_id INTEGER, market_name VARCHAR, price FLOAT, date DATETIME, created_at DATETIME)"
+                )
+                await self.conn.execute("DELETE FROM price_upserts")
+                await self.conn.executemany("INSERT INTO price_upserts VALUES (?, ?, ?, ?, ?)", rows)
+                async with self.conn.execute(
+                    "UPDATE market_prices SET price = u.price FROM price_upserts AS u "
+                    "WHERE market_prices.crop_id = u.crop_id AND market_prices.market_name = u.market_name "
+                    "AND market_prices.date = u.date"
+                ) as cursor:
+                    updated = cursor.rowcount
+                async with self.conn.execute(
+                    "INSERT INTO market_prices (crop_id, market_name, price, date, created_at) "
+                    "SELECT crop_id, market_name, price, date, created_at FROM price_upserts AS u "
+                    "WHERE NOT EXISTS (SELECT 1 FROM market_prices AS m WHERE m.crop_id = u.crop_id "
+                    "AND m.market_name = u.market_name AND m.date = u.date)"
+                ) as cursor:
+                    inserted = cursor.rowcount
+                await self.conn.execute("COMMIT")
+            except BaseException:
+                await self.conn.execute("ROLLBACK")
+                raise
+        return inserted, updated
+
+    async def get_markets(self) -> List[Document]:
+        markets = await self._fetch_all("SELECT name, crop_ids, last_price_date, price_count, updated_at "
+                                        "FROM markets ORDER BY name", ())
+        for market in markets:
+            market["crop_ids"].sort()
+        return markets
+
+    async def refresh_markets(self, market_names: Optional[List[str]]) -> None:
+        async with self._write_lock:
+            await self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                await self._refresh_markets(market_names)
+                await self.conn.execute("COMMIT")
+            except BaseException:
+                await self.conn.execute("ROLLBACK")
+                raise
+
+    async def _refresh_markets(self, market_names: Optional[List[str]]) -> None:
+        """refresh_markets() inside the caller's transaction."""
+        delete_sql = "DELETE FROM markets"
+        insert_sql = (
+            "INSERT INTO markets (name, crop_ids, last_price_date, price_count, updated_at) "
+            "SELECT market_name, json_group_array(DISTINCT CAST(crop_id AS TEXT)), MAX(last_at), SUM(count), ? "
+            "FROM price_rollups WHERE period = 'month'"
+        )
+        params: List[Any] = []
+        if market_names is not None:
+            placeholders = ", ".join("?" for _ in market_names)
+            delete_sql += f" WHERE name IN ({placeholders})"
+            insert_sql += f" AND market_name IN ({placeholders})"
+            params = list(market_names)
+        # Markets without rollups any more are dropped along the way
+        await self.conn.execute(delete_sql, params)
+        await self.conn.execute(insert_sql + " GROUP BY market_name", [to_db_value(datetime.utcnow()), *params])
+
+    # Price rollups
+    def stream_market_prices(self, since: Optional[datetime], until: Optional[datetime],
+                             crop_ids: Optional[List[str]], market_names: Optional[List[str]],
+                             batch_size: int):
+        where, params = [], []
+        if since:
+            where.append("date >= ?")
+            params.append(to_db_value(since))
+        if until:
+            where.append("date < ?")
+            params.append(to_db_value(until))
+        if crop_ids is not None:
+            where.append(f"crop_id IN ({', '.join('?' for _ in crop_ids)})")
+            params.extend(_int_id(crop_id) for crop_id in crop_ids)
+        if market_names is not None:
+            where.append(f"market_name IN ({', '.join('?' for _ in market_names)})")
+            params.extend(market_names)
+        sql = "SELECT id, crop_id, market_name, price, date, created_at FROM market_prices"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        return self._iter_batches(sql, params, batch_size)
+
+    async def recompute_price_rollups(self, windows: List[Document]) -> None:
+        if not windows:
+            return
+        rows = [
+            (_int_id(w["crop_id"]), w["market_name"], w["period"], to_db_value(w["start"]), to_db_value(w["end"]))
+            for w in windows
+        ]
+        market_names = sorted({w["market_name"] for w in windows})
+        async with self._write_lock:
+            # One transaction from reading the prices to writing the results: another
+            # worker's refresh waits for it, then reads every price this one read
+            await self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                await self.conn.execute(
+                    "CREATE TEMP TABLE IF NOT EXISTS rollup_windows "
+                    "(crop_id INTEGER, market_name VARCHAR, period VARCHAR, start DATETIME, until DATETIME)"
+                )
+                await self.conn.execute("DELETE FROM rollup_windows")
+                await self.conn.executemany("INSERT INTO rollup_windows VALUES (?, ?, ?, ?, ?)", rows)
+                await self.conn.execute(RECOMPUTE_ROLLUPS, (to_db_value(datetime.utcnow()),))
+                await self.conn.execute(RECOMPUTE_LATEST_PRICES)
+                await self._refresh_markets(market_names)
+                await self.conn.execute("COMMIT")
+            except BaseException:
+                await self.conn.execute("ROLLBACK")
+                raise
+
+    async def clear_price_rollups(self) -> None:
+        async with self._write_lock:
+            await self.conn.execute("DELETE FROM price_rollups")
+
+    async def clear_latest_prices(self) -> None:
+        async with self._write_lock:
+            await self.conn.execute("DELETE FROM latest_prices")
+
+    async def get_price_rollups(self, crop_id: str, period: str, since: datetime,
+                                market: Optional[str]) -> List[Document]:
+        sql = "SELECT * FROM price_rollups WHERE crop_id = ? AND period = ? AND start >= ?"
+        params = [_int_id(crop_id), period, to_db_value(since)]
+        if market:
+            sql += " AND market_name = ?"
+            params.append(market)
+        return await self._fetch_all(sql + " ORDER BY start DESC, market_name ASC", params)
+
+    def stream_price_rollups(self, period: str, since: datetime, batch_size: int):
+        sql = "SELECT crop_id, market_name, period, start, min, max, mean, last, last_at, count FROM price_rollups"
+        return self._iter_batches(sql + " WHERE period = ? AND start >= ?", (period, to_db_value(since)), batch_size)
+
+    # Price forecasts
+    async def store_price_forecasts(self, documents: List[Document], generated_at: datetime) -> None:
+        columns = ["crop_id", "market_name", "generated_at", "model", "mae", "baseline_mae", "points"]
+        rows = [
+            [to_db_value(d[c]) for c in columns[:-1]]
+            + [json.dumps([{**point, "date": point["date"].isoformat()} for point in d["points"]])]
+            for d in documents
+        ]
+        async with self._write_lock:
+            await self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                await self.conn.executemany(
+                    f"INSERT OR REPLACE INTO price_forecasts ({', '.join(columns)}) "
+                    f"VALUES ({', '.join('?' for _ in columns)})",
+                    rows,
+                )
+                # Series that were not forecast this run have stopped trading or lost their history
+                await self.conn.execute("DELETE FROM price_forecasts WHERE generated_at < ?", (to_db_value(generated_at),))
+                await self.conn.execute("COMMIT")
+            except BaseException:
+                await self.conn.execute("ROLLBACK")
+                raise
+
+    async def acquire_lease(self, name: str, holder: str, now: datetime, until: datetime) -> bool:
+        async with self._write_lock:
+            await self.conn.execute(
+                "INSERT INTO locks (name, holder, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET holder = excluded.holder, expires_at = excluded.expires_at "
+                "WHERE locks.holder = excluded.holder OR locks.expires_at < ?",
+                (name, holder, to_db_value(until), to_db_value(now)),
+            )
+            async with self.conn.execute("SELECT changes()") as cursor:
+                return (await cursor.fetchone())[0] == 1
+
+    async def get_price_trends(self, crop_ids: List[str], since: datetime,
+                               markets: Optional[List[str]] = None) -> Dict[str, Document]:
+        keys = [key for key in (_int_id(crop_id) for crop_id in crop_ids) if key is not None]
+        if not keys:
+            return {}
+        on = ["r.crop_id = c.id", "r.period = 'day'", "r.start >= ?"]
+        params: List[Any] = [to_db_value(since)]
+        if markets is not None:
+            on.append(f"r.market_name IN ({', '.join('?' for _ in markets)})")
+            params.extend(markets)
+        # Every requested crop row comes back, so a crop without prices yields one row of NULLs
+        columns = ", ".join(("c.id",) + tuple(f"r.{column}" for column in TREND_COLUMNS[1:]))
+        sql = (
+            f"SELECT {columns} FROM crops AS c LEFT JOIN price_rollups AS r ON {' AND '.join(on)} "
+            f"WHERE c.id IN ({', '.join('?' for _ in keys)})"
+        )
+        async with self.conn.execute(sql, params + keys) as cursor:
+            rows = await cursor.fetchall()
+        # The raw rows go straight into the vectorized pass, skipping per-row documents
+        trends = trend_statistics([row for row in rows if row["start"] is not None])
+        without_prices = {str(row[0]): empty_trends() for row in rows if row["start"] is None}
+        trends = {**without_prices, **trends}
+
+        sql = f"SELECT * FROM price_forecasts WHERE crop_id IN ({', '.join('?' for _ in keys)})"
+        forecast_params: List[Any] = list(keys)
+        if markets is not None:
+            sql += f" AND market_name IN ({', '.join('?' for _ in markets)})"
+            forecast_params.extend(markets)
+        for crop_trends in trends.values():
+            crop_trends["forecast"] = []
+        for forecast in await self._fetch_all(sql + " ORDER BY crop_id, market_name", forecast_params):
+            crop_id = forecast.pop("crop_id")
+            if crop_id in trends:
+                trends[crop_id]["forecast"].append(forecast)
+        return trends
+
+    # Weather
+    async def get_weather_history(self, location: str, since: datetime, cursor: Optional[str],
+                                  limit: int) -> DocumentPage:
+        return await self._page(
+            "weather_data", ["location = ?", "date >= ?"], [location, to_db_value(since)],
+            NEWEST_FIRST, cursor, limit, None
+        )
+
+    def stream_weather_history(self, location: str, since: datetime, batch_size: int):
+        sql = f"SELECT * FROM weather_data WHERE location = ? AND date >= ? ORDER BY {_order_by(NEWEST_FIRST)}"
+        return self._iter_batches(sql, (location, to_db_value(since)), batch_size)
@@ -0,0 +1,29 @@
+from typing import AsyncIterator, Type
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+def wants_ndjson(request: Request, stream: bool = False) -> bool:
+    """True when the client asked for a streamed NDJSON body."""
+    return stream or NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+def ndjson_response(
+    batches: AsyncIterator[list],
+    model: Type[BaseModel],
+) -> StreamingResponse:
+    """Stream batches of documents as newline-delimited JSON.
+
+    Each batch is validated and written as soon as it arrives, so only one
+    batch is ever held in memory regardless of how many rows match.
+    """
+    async def body():
+        async for batch in batches:
+            yield "".join(
+                model.model_validate(document).model_dump_json(by_alias=True) + "\n"
+                for document in batch
+            )
+
+    return StreamingResponse(body(), media_type=NDJSON_MEDIA_TYPE)
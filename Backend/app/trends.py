@@ -0,0 +1,139 @@
+"""Market trend statistics over daily price rollups.
+
+trend_statistics() is the reference definition. The SQLite backend calls
+it directly, and MongoStorage.get_price_trends computes the same figures
+in an aggregation pipeline:
+
+- series: one point per day, the count-weighted mean price across markets,
+  with 7 and 30 calendar-day trailing moving averages
+- volatility: sample standard deviation of the day-to-day changes of that
+  series, in percent
+- average_price and count: count-weighted mean and number of prices in the window
+- current_price: the most recent price; first_price: the first day's mean
+- markets: the same figures per market plus its min and max
+"""
+
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+Document = Dict[str, Any]
+
+# Column order of the rollup rows trend_statistics() takes
+TREND_COLUMNS = ("crop_id", "market_name", "start", "min", "max", "mean", "last", "last_at", "count")
+
+# Spacing of crops in the combined (crop, day) sort key; larger than any day number
+_CROP_STRIDE = 1 << 32
+
+
+def empty_trends() -> Document:
+    return {"current_price": None, "first_price": None, "average_price": None,
+            "volatility": None, "count": 0, "markets": [], "series": []}
+
+
+def _group_starts(keys: np.ndarray) -> np.ndarray:
+    """Indexes where each run of equal values starts in a sorted array."""
+    return np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+
+
+def _moving_average(keys: np.ndarray, cumulative: np.ndarray, days: int) -> np.ndarray:
+    # keys are sorted (crop, day) keys; the window never reaches the previous crop
+    right = np.arange(1, len(keys) + 1)
+    left = np.searchsorted(keys, keys - (days - 1), side="left")
+    return (cumulative[right] - cumulative[left]) / (right - left)
+
+
+def trend_statistics(rows: Sequence[Sequence[Any]]) -> Dict[str, Document]:
+    """Trend figures keyed by crop id, from daily rollup rows of any number of crops.
+
+    rows are tuples in TREND_COLUMNS order, in any order; start and last_at
+    may be datetimes or ISO strings. All crops are computed together in one
+    vectorized pass. Crops without rows are not in the result.
+    """
+    if not rows:
+        return {}
+    crop_col, market_col, start_col, min_col, max_col, mean_col, last_col, last_at_col, count_col = zip(*rows)
+    crop_ids, crop = np.unique(np.array(crop_col, dtype=str), return_inverse=True)
+    markets, market = np.unique(np.array(market_col, dtype=str), return_inverse=True)
+    day = np.array(start_col, dtype="datetime64[us]").astype("datetime64[D]").astype(np.int64)
+    last_at = np.array(last_at_col, dtype="datetime64[us]")
+    low, high = np.array(min_col, dtype=float), np.array(max_col, dtype=float)
+    mean, last = np.array(mean_col, dtype=float), np.array(last_col, dtype=float)
+    count = np.array(count_col, dtype=float)
+    total = mean * count
+    n_crops = len(crop_ids)
+
+    counts = np.bincount(crop, weights=count, minlength=n_crops)
+    average = np.bincount(crop, weights=total, minlength=n_crops) / counts
+
+    # Most recent price per crop: the last row of each crop ordered by last_at
+    order = np.lexsort((last_at, crop))
+    current = last[order][np.r_[_group_starts(crop[order])[1:], len(order)] - 1]
+
+    # Daily series per crop, ordered by (crop, day)
+    series_keys, series_index = np.unique(crop * _CROP_STRIDE + day, return_inverse=True)
+    price = np.bincount(series_index, weights=total) / np.bincount(series_index, weights=count)
+    series_crop = series_keys // _CROP_STRIDE
+    series_day = (series_keys % _CROP_STRIDE).astype("datetime64[D]")
+    cumulative = np.r_[0.0, np.cumsum(price)]
+    ma_7 = _moving_average(series_keys, cumulative, 7)
+    ma_30 = _moving_average(series_keys, cumulative, 30)
+    series_starts = _group_starts(series_crop)
+    first_price = price[series_starts]
+
+    # Day-to-day changes within each crop, then their sample standard deviation
+    same_crop = (series_crop[1:] == series_crop[:-1]) & (price[:-1] > 0)
+    change = np.divide(price[1:] - price[:-1], price[:-1], out=np.zeros(len(price) - 1), where=same_crop)
+    change_crop = series_crop[1:][same_crop]
+    change = change[same_crop]
+    n = np.bincount(change_crop, minlength=n_crops)
+    change_sum = np.bincount(change_crop, weights=change, minlength=n_crops)
+    change_squares = np.bincount(change_crop, weights=change * change, minlength=n_crops)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        variance = (change_squares - change_sum * change_sum / n) / (n - 1)
+    volatility = np.sqrt(np.clip(variance, 0, None)) * 100
+
+    # Per-market figures, rows ordered by (crop, market, day)
+    order = np.lexsort((day, market, crop))
+    pair = (crop * len(markets) + market)[order]
+    pair_starts = _group_starts(pair)
+    pair_ends = np.r_[pair_starts[1:], len(order)] - 1
+    pair_count = np.add.reduceat(count[order], pair_starts)
+    pair_average = np.add.reduceat(total[order], pair_starts) / pair_count
+    pair_min = np.minimum.reduceat(low[order], pair_starts)
+    pair_max = np.maximum.reduceat(high[order], pair_starts)
+
+    results = {}
+    series_bounds = np.r_[series_starts, len(series_keys)]
+    market_rows: Dict[int, List[Document]] = {}
+    for start, end, pair_count_value, average_value, min_value, max_value in zip(
+        pair_starts, pair_ends, pair_count, pair_average, pair_min, pair_max
+    ):
+        row = order[start]
+        market_rows.setdefault(int(crop[row]), []).append({
+            "market_name": str(markets[market[row]]),
+            "first_price": float(mean[row]),
+            "current_price": float(last[order[end]]),
+            "average_price": float(average_value),
+            "min_price": float(min_value),
+            "max_price": float(max_value),
+            "count": int(pair_count_value),
+        })
+    for index, crop_id in enumerate(crop_ids):
+        lo, hi = series_bounds[index], series_bounds[index + 1]
+        results[str(crop_id)] = {
+            "current_price": float(current[index]),
+            "first_price": float(first_price[index]),
+            "average_price": float(average[index]),
+            "volatility": float(volatility[index]) if n[index] >= 2 else None,
+            "count": int(counts[index]),
+            "markets": market_rows[index],
+            "series": [
+                {"date": date, "price": p, "ma_7": a7, "ma_30": a30}
+                for date, p, a7, a30 in zip(
+                    series_day[lo:hi].astype("datetime64[us]").tolist(),
+                    price[lo:hi].tolist(), ma_7[lo:hi].tolist(), ma_30[lo:hi].tolist(),
+                )
+            ],
+        }
+    return results
@@ -0,0 +1,249 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .config import settings
+from .storage import DuplicateRecord, Storage
+
+logger = logging.getLogger(__name__)
+
+# Called with the storage and the documents of each successful flush
+AfterFlush = Callable[[Storage, List[Dict[str, Any]]], Awaitable[None]]
+
+# Queued after the last document by stop(); the flusher drains up to it and exits
+_STOP = object()
+
+
+class WriteQueueFull(Exception):
+    """Raised when a write could not be queued before the enqueue timeout."""
+
+
+class CollectionBuffer:
+    """Queue and flusher for one collection.
+
+    Documents are flushed with one insert_many (unordered on Mongo) as soon
+    as batch_size are waiting or flush_interval has passed since the first
+    one of the batch arrived, whichever comes first. Callers were already
+    answered 202, so a failed flush is retried up to retries times, and a
+    batch the storage rejects for duplicates is split until the duplicates
+    are isolated and dropped on their own.
+    """
+
+    def __init__(self, collection: str, batch_size: int, flush_interval: float, max_queue: int,
+                 retries: int = 0, retry_backoff: float = 0.1):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._task: Optional[asyncio.Task] = None
+        self._storage: Optional[Storage] = None
+        self._after_flush: Optional[AfterFlush] = None
+        self._flush_ms: deque = deque(maxlen=256)
+        self.enqueued = 0
+        self.rejected = 0
+        self.flushes = 0
+        self.flushed_documents = 0
+        self.failed_documents = 0
+        self.duplicate_documents = 0
+        self.flush_retries = 0
+
+    def start(self, storage: Storage, after_flush: Optional[AfterFlush] = None) -> None:
+        self._storage = storage
+        self._after_flush = after_flush
+        self._task = asyncio.create_task(self._run(), name=f"write-behind-{self.collection}")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        await self.queue.put(_STOP)
+        await self._task
+        self._task = None
+        # Writers that were blocked on a full queue may have landed behind the marker
+        leftovers = []
+        while not self.queue.empty():
+            document = self.queue.get_nowait()
+            if document is not _STOP:
+                leftovers.append(document)
+        if leftovers:
+            await self._flush(leftovers)
+
+    async def put(self, document: Dict[str, Any], timeout: float) -> None:
+        try:
+            # Waiting here is the backpressure: producers slow to the flush rate
+            await asyncio.wait_for(self.queue.put(document), timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise WriteQueueFull(f"{self.collection} write queue is full")
+        self.enqueued += 1
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        # Cancelling a get() on timeout can drop a document it has just taken off
+        # the queue, so waits go through one getter task that outlives them
+        getter: Optional[asyncio.Task] = None
+        batch: List[Dict[str, Any]] = []
+        deadline = 0.0
+        try:
+            while True:
+                if getter is None:
+                    try:
+                        document = self.queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        getter = asyncio.ensure_future(self.queue.get())
+                if getter is not None:
+                    done, _ = await asyncio.wait({getter}, timeout=max(0.0, deadline - loop.time()) if batch else None)
+                    if not done:
+                        await self._flush(batch)
+                        batch = []
+                        continue
+                    document, getter = getter.result(), None
+                if document is _STOP:
+                    break
+                if not batch:
+                    deadline = loop.time() + self.flush_interval
+                batch.append(document)
+                if len(batch) >= self.batch_size or loop.time() >= deadline:
+                    await self._flush(batch)
+                    batch = []
+        finally:
+            if getter is not None:
+                getter.cancel()
+        if batch:
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[Dict[str, Any]]) -> None:
+        started = time.perf_counter()
+        try:
+            stored = await self._store(batch)
+            self.flushed_documents += len(stored)
+            if stored and self._after_flush is not None:
+                await self._after_flush(self._storage, stored)
+        except Exception as e:
+            logger.error(f"Write-behind after-flush hook for {self.collection} failed: {e}")
+        finally:
+            self.flushes += 1
+            self._flush_ms.append((time.perf_counter() - started) * 1000)
+
+    async def _store(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Insert a batch, retrying transient failures; returns the documents stored."""
+        for attempt in range(self.retries + 1):
+            try:
+                await self._storage.insert_many(self.collection, batch)
+                return batch
+            except DuplicateRecord as e:
+                if e.rejected is not None:
+                    # The storage kept going past the duplicates
+                    rejected = set(e.rejected)
+                    self._drop_duplicates([batch[i] for i in sorted(rejected)], e)
+                    return [document for i, document in enumerate(batch) if i not in rejected]
+                if len(batch) == 1:
+                    self._drop_duplicates(batch, e)
+                    return []
+                # The batch was rolled back as a whole; halve it until the duplicates stand alone
+                middle = len(batch) // 2
+                return await self._store(batch[:middle]) + await self._store(batch[middle:])
+            except Exception as e:
+                if attempt == self.retries:
+                    self.failed_documents += len(batch)
+                    logger.error(
+                        f"Write-behind flush of {len(batch)} {self.collection} documents failed "
+                        f"after {attempt + 1} attempts, dropping them: {e}"
+                    )
+                    return []
+                self.flush_retries += 1
+                # Jittered exponential backoff, e.g. for a locked SQLite file or a Mongo failover
+                await asyncio.sleep(self.retry_backoff * 2 ** attempt * random.uniform(0.5, 1))
+        return []
+
+    def _drop_duplicates(self, documents: List[Dict[str, Any]], error: DuplicateRecord) -> None:
+        self.duplicate_documents += len(documents)
+        logger.warning(f"Write-behind dropped {len(documents)} duplicate {self.collection} documents: {error}")
+
+    def stats(self) -> Dict[str, Any]:
+        latencies = sorted(self._flush_ms)
+        return {
+            "queue_depth": self.queue.qsize(),
+            "max_queue": self.queue.maxsize,
+            "enqueued": self.enqueued,
+            "rejected": self.rejected,
+            "flushes": self.flushes,
+            "flushed_documents": self.flushed_documents,
+            "failed_documents": self.failed_documents,
+            "duplicate_documents": self.duplicate_documents,
+            "flush_retries": self.flush_retries,
+            "avg_batch": round(self.flushed_documents / self.flushes, 1) if self.flushes else 0,
+            "flush_ms_p50": round(latencies[len(latencies) // 2], 2) if latencies else None,
+            "flush_ms_max": round(latencies[-1], 2) if latencies else None,
+        }
+
+
+class WriteBehind:
+    """Optional in-process write-behind for high-volume weather and price readings.
+
+    Started by the application lifespan when WRITE_BEHIND_ENABLED is set;
+    stop() flushes everything still queued before the storage is closed.
+    While not running, callers write directly.
+    """
+
+    COLLECTIONS = ("weather_data", "market_prices")
+
+    def __init__(self, batch_size: int, flush_interval_ms: int, max_queue: int, enqueue_timeout_ms: int,
+                 retries: int = 0, retry_backoff_ms: int = 100):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_queue = max_queue
+        self.enqueue_timeout = enqueue_timeout_ms / 1000
+        self.retries = retries
+        self.retry_backoff = retry_backoff_ms / 1000
+        self._buffers: Dict[str, CollectionBuffer] = {}
+
+    @property
+    def running(self) -> bool:
+        return bool(self._buffers)
+
+    def start(self, storage: Storage, after_flush: Optional[Dict[str, AfterFlush]] = None) -> None:
+        # Queues are created here so they belong to the serving event loop
+        after_flush = after_flush or {}
+        for collection in self.COLLECTIONS:
+            buffer = CollectionBuffer(collection, self.batch_size, self.flush_interval, self.max_queue,
+                                      self.retries, self.retry_backoff)
+            buffer.start(storage, after_flush.get(collection))
+            self._buffers[collection] = buffer
+        logger.info(
+            f"Write-behind started: batches of {self.batch_size}, "
+            f"every {self.flush_interval * 1000:.0f} ms, queue of {self.max_queue}"
+        )
+
+    async def stop(self) -> None:
+        buffers, self._buffers = self._buffers, {}
+        for buffer in buffers.values():
+            await buffer.stop()
+        if buffers:
+            logger.info("Write-behind queues flushed")
+
+    async def enqueue(self, collection: str, document: Dict[str, Any]) -> int:
+        """Queue a document; returns the queue depth. Raises WriteQueueFull."""
+        buffer = self._buffers[collection]
+        await buffer.put(document, self.enqueue_timeout)
+        return buffer.queue.qsize()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.running,
+            **{collection: buffer.stats() for collection, buffer in self._buffers.items()},
+        }
+
+
+write_behind = WriteBehind(
+    batch_size=settings.WRITE_BEHIND_BATCH_SIZE,
+    flush_interval_ms=settings.WRITE_BEHIND_FLUSH_INTERVAL_MS,
+    max_queue=settings.WRITE_BEHIND_MAX_QUEUE,
+    enqueue_timeout_ms=settings.WRITE_BEHIND_ENQUEUE_TIMEOUT_MS,
+    retries=settings.WRITE_BEHIND_RETRIES,
+    retry_backoff_ms=settings.WRITE_BEHIND_RETRY_BACKOFF_MS,
+)
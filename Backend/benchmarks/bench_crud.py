@@ -0,0 +1,244 @@
+"""Query-level benchmarks for every crud.py function at several data sizes.
+
+For each scale a fresh store is filled by benchmarks.dataset, then each
+crud function is called repeatedly with randomly sampled ids. The report
+shows p50/p95 latency per function per scale, so queries that degrade
+with volume stand out before they reach production.
+
+    cd Backend
+    python -m benchmarks.bench_crud --scales tiny,small,medium --iterations 200 --json crud.json
+    python -m benchmarks.bench_crud --backend mongo --mongo-uri mongodb://localhost:27017
+
+SQLite runs use a temporary file per scale. Mongo runs use a
+fasalsaathi_bench_<scale> database that is dropped before loading.
+create_user is left out: it is dominated by bcrypt, which
+bench_password_hashing covers.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+from app import crud
+from app.indexes import ensure_indexes
+from app.schemas.schemas import FarmCreate, MarketPriceCreate, WeatherDataCreate
+from app.storage import Storage
+
+from .dataset import SCALES, Dataset, load
+from .load_test import git_commit, percentile
+
+
+def _farm(rng: random.Random) -> FarmCreate:
+    return FarmCreate(name="Bench Farm", location="Itarsi", area=round(rng.uniform(1, 20), 2),
+                      soil_type="black", irrigation_type="drip")
+
+
+def cases(data: Dataset, rng: random.Random):
+    """(name, call) pairs; each call performs one crud operation on sampled ids."""
+    created_farms = []
+
+    async def get_user_by_email(db):
+        await crud.get_user_by_email(db, rng.choice(data.emails))
+
+    async def get_user(db):
+        await crud.get_user(db, rng.choice(data.user_ids))
+
+    async def get_farms_by_owner(db):
+        await crud.get_farms_by_owner(db, rng.choice(data.user_ids))
+
+    async def get_farm(db):
+        farm_id, owner_id = rng.choice(data.farms)
+        await crud.get_farm(db, farm_id, owner_id)
+
+    async def list_crops(db):
+        await crud.list_crops(db)
+
+    async def list_crops_by_season(db):
+        await crud.list_crops(db, season=rng.choice(["kharif", "rabi", "zaid"]))
+
+    async def get_crop(db):
+        await crud.get_crop(db, rng.choice(data.crop_ids))
+
+    async def get_crop_diseases(db):
+        await crud.get_crop_diseases(db, rng.choice(data.crop_ids))
+
+    async def get_current_prices(db):
+        await crud.get_current_prices(db, market=rng.choice(data.markets))
+
+    async def get_current_prices_all(db):
+        await crud.get_current_prices(db)
+
+    async def get_price_history(db):
+        await crud.get_price_history(db, rng.choice(data.crop_ids), days=30)
+
+    async def get_price_history_page_3(db):
+        cursor = None
+        crop_id = rng.choice(data.crop_ids)
+        for _ in range(3):
+            _, cursor = await crud.get_price_history(db, crop_id, days=365, cursor=cursor)
+            if cursor is None:
+                break
+
+    async def stream_price_history(db):
+        async for _ in crud.stream_price_history(db, rng.choice(data.crop_ids), days=90):
+            pass
+
+    async def get_price_rollups_daily(db):
+        await crud.get_price_rollups(db, rng.choice(data.crop_ids), period="day", days=90)
+
+    async def get_price_rollups_monthly(db):
+        await crud.get_price_rollups(db, rng.choice(data.crop_ids), period="month", days=365)
+
+    async def get_market_trends(db):
+        await crud.get_market_trends(db, rng.choice(data.crop_ids), days=90)
+
+    async def get_market_trends_batch_20(db):
+        await crud.get_market_trends_batch(db, rng.sample(data.crop_ids, min(20, len(data.crop_ids))), days=90)
+
+    async def get_markets(db):
+        await crud.get_markets(db)
+
+    async def get_weather_history(db):
+        await crud.get_weather_history(db, rng.choice(data.locations), days=30)
+
+    async def stream_weather_history(db):
+        async for _ in crud.stream_weather_history(db, rng.choice(data.locations), days=365):
+            pass
+
+    async def create_farm(db):
+        owner_id = rng.choice(data.user_ids)
+        farm = await crud.create_farm(db, _farm(rng), owner_id)
+        created_farms.append((str(farm["_id"]), owner_id))
+
+    async def update_farm(db):
+        farm_id, owner_id = rng.choice(created_farms)
+        await crud.update_farm(db, farm_id, _farm(rng), owner_id)
+
+    async def delete_farm(db):
+        if created_farms:
+            farm_id, owner_id = created_farms.pop()
+            await crud.delete_farm(db, farm_id, owner_id)
+
+    async def create_market_price(db):
+        await crud.create_market_price(db, MarketPriceCreate(
+            crop_id=rng.choice(data.crop_ids), market_name=rng.choice(data.markets),
+            price=round(rng.uniform(1500, 4000), 2), date=datetime.utcnow(),
+        ))
+
+    async def create_weather_data(db):
+        await crud.create_weather_data(db, WeatherDataCreate(
+            location=rng.choice(data.locations), temperature=28.0, humidity=60.0,
+            rainfall=0.0, wind_speed=3.0, date=datetime.utcnow(),
+        ))
+
+    return [
+        (fn.__name__, fn) for fn in (
+            get_user_by_email, get_user, get_farms_by_owner, get_farm, list_crops, list_crops_by_season,
+            get_crop, get_crop_diseases, get_current_prices, get_current_prices_all, get_price_history,
+            get_price_history_page_3, stream_price_history, get_price_rollups_daily, get_price_rollups_monthly,
+            get_market_trends, get_market_trends_batch_20, get_markets, get_weather_history, stream_weather_history,
+            create_farm, update_farm, delete_farm, create_market_price, create_weather_data,
+        )
+    ]
+
+
+async def time_case(db: Storage, call, iterations: int) -> dict:
+    latencies = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await call(db)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return {
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "mean_ms": round(statistics.mean(latencies), 3),
+        "ops_per_sec": round(iterations / (sum(latencies) / 1000), 1),
+    }
+
+
+async def open_storage(args, scale_name: str, workdir: str) -> Storage:
+    if args.backend == "sqlite":
+        from app.storage.sqlite import SQLiteStorage
+        storage = SQLiteStorage(os.path.join(workdir, f"{scale_name}.db"))
+        await storage.startup()
+        return storage
+
+    from app.database import mongo_client_options
+    from app.storage.mongo import MongoStorage
+    db_name = f"fasalsaathi_bench_{scale_name}"
+    storage = MongoStorage(args.mongo_uri, db_name, **mongo_client_options())
+    storage.connect()
+    await storage.client.drop_database(db_name)
+    await ensure_indexes(storage.database)
+    return storage
+
+
+async def bench_scale(args, scale_name: str, workdir: str) -> dict:
+    storage = await open_storage(args, scale_name, workdir)
+    try:
+        started = time.perf_counter()
+        data = await load(storage, SCALES[scale_name], seed=args.seed, log=lambda line: print(f"  {line}"))
+        print(f"  loaded in {time.perf_counter() - started:.1f}s")
+
+        rng = random.Random(args.seed)
+        results = {}
+        for name, call in cases(data, rng):
+            results[name] = await time_case(storage, call, args.iterations)
+            print(f"  {name:<28} p50 {results[name]['p50_ms']:>9} ms  p95 {results[name]['p95_ms']:>9} ms")
+        return {
+            "price_rows": data.price_rows,
+            "weather_rows": data.weather_rows,
+            "users": len(data.user_ids),
+            "farms": len(data.farms),
+            "functions": results,
+        }
+    finally:
+        await storage.close()
+
+
+def print_table(results: dict):
+    scales = list(results)
+    functions = list(next(iter(results.values()))["functions"])
+    print(f"\np50 latency (ms) by scale\n{'function':<28}" + "".join(f"{s:>12}" for s in scales))
+    for name in functions:
+        print(f"{name:<28}" + "".join(f"{results[s]['functions'][name]['p50_ms']:>12}" for s in scales))
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", default="tiny,small", help=f"comma separated, from {', '.join(SCALES)}")
+    parser.add_argument("--iterations", type=int, default=100, help="calls per function per scale")
+    parser.add_argument("--backend", choices=["sqlite", "mongo"], default="sqlite")
+    parser.add_argument("--mongo-uri", default="mongodb://localhost:27017")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", dest="json_path", help="write results to this file")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="fasalsaathi-crud-") as workdir:
+        for scale_name in args.scales.split(","):
+            scale_name = scale_name.strip()
+            print(f"Scale '{scale_name}' on {args.backend}")
+            results[scale_name] = await bench_scale(args, scale_name, workdir)
+
+    print_table(results)
+    if args.json_path:
+        with open(args.json_path, "w") as fh:
+            json.dump({
+                "commit": git_commit(),
+                "timestamp": datetime.utcnow().isoformat(),
+                "backend": args.backend,
+                "iterations": args.iterations,
+                "scales": results,
+            }, fh, indent=2)
+        print(f"Results written to {args.json_path}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
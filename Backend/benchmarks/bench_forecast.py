@@ -0,0 +1,99 @@
+"""Forecast fitting throughput: vectorized batch fit vs one series at a time.
+
+Generates synthetic daily price series (level, drift, weekly season, noise
+and random walk shocks) and times app.forecasting.fit_forecasts on all of
+them at once. For the smaller sizes the same series are also fitted one by
+one, which is what a per-series model library loop would do. Each run also
+reports the holdout MAE of the chosen models against the seasonal naive
+baseline on the last --holdout days, which the fit never sees.
+
+    cd Backend
+    python -m benchmarks.bench_forecast --series 100,1000,10000,50000 --days 180
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from app.forecasting import SEASON, fit_forecasts
+
+
+def synthetic_series(n: int, days: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    t = np.arange(days)
+    level = rng.uniform(500, 5000, (n, 1))
+    drift = rng.normal(0, 0.002, (n, 1)) * level
+    amplitude = rng.uniform(0, 0.08, (n, 1)) * level
+    phase = rng.uniform(0, 2 * np.pi, (n, 1))
+    season = amplitude * np.sin(2 * np.pi * t / SEASON + phase)
+    walk = np.cumsum(rng.normal(0, 0.005, (n, days)), axis=1) * level
+    noise = rng.normal(0, 0.02, (n, days)) * level
+    return np.maximum(level + drift * t + season + walk + noise, 1)
+
+
+def _timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+def run_size(n: int, args) -> dict:
+    y = synthetic_series(n, args.days + args.holdout, args.seed)
+    history, actual = y[:, :args.days], y[:, args.days:]
+
+    forecasts, seconds = _timed(fit_forecasts, history, args.holdout, SEASON * 2)
+    result = {
+        "series": n,
+        "days": args.days,
+        "batch_seconds": round(seconds, 3),
+        "batch_series_per_sec": round(n / seconds, 1),
+        "holt_winters_share": round(float(forecasts.holt_winters.mean()), 3),
+        "holdout_mae": round(float(np.abs(forecasts.prices - actual).mean()), 2),
+        "baseline_holdout_mae": round(float(np.abs(history[:, -SEASON:][:, np.arange(args.holdout) % SEASON]
+                                                   - actual).mean()), 2),
+    }
+    if n <= args.loop_max:
+        _, loop_seconds = _timed(
+            lambda: [fit_forecasts(history[i:i + 1], args.holdout, SEASON * 2) for i in range(n)]
+        )
+        result["loop_seconds"] = round(loop_seconds, 3)
+        result["loop_series_per_sec"] = round(n / loop_seconds, 1)
+        result["speedup"] = round(loop_seconds / seconds, 1)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--series", default="100,1000,10000,50000", help="comma separated series counts")
+    parser.add_argument("--days", type=int, default=180, help="days of history per series")
+    parser.add_argument("--holdout", type=int, default=14, help="days forecast and scored after the history")
+    parser.add_argument("--loop-max", type=int, default=1000, help="largest size also fitted one series at a time")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", dest="json_path", help="write results to this file")
+    args = parser.parse_args()
+
+    results = []
+    for n in (int(size) for size in args.series.split(",")):
+        result = run_size(n, args)
+        results.append(result)
+        line = (
+            f"{n:>7} series: {result['batch_series_per_sec']:>10} series/s batch"
+            f" ({result['batch_seconds']} s)"
+        )
+        if "loop_seconds" in result:
+            line += f", {result['loop_series_per_sec']:>8} series/s looped, {result['speedup']}x"
+        line += (
+            f" | holdout MAE {result['holdout_mae']} vs baseline {result['baseline_holdout_mae']},"
+            f" Holt-Winters chosen for {result['holt_winters_share']:.0%}"
+        )
+        print(line)
+
+    if args.json_path:
+        with open(args.json_path, "w") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Event-loop latency under login traffic: inline bcrypt vs the hasher pool.
+
+Runs a burst of concurrent password verifications (what /token does per
+login attempt) and, on the same event loop, keeps probing /api/health. With
+inline hashing every probe waits behind bcrypt; with the pool the probes
+stay fast.
+
+    cd Backend
+    python -m benchmarks.bench_password_hashing --logins 40 --concurrency 8
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+
+from app.main import app
+from app.security import PasswordHasher, pwd_context
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def probe(client: httpx.AsyncClient, stop: asyncio.Event, interval: float, latencies: list):
+    while not stop.is_set():
+        started = time.perf_counter()
+        response = await client.get("/api/health")
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(interval)
+
+
+async def login_traffic(verify, hashed: str, logins: int, concurrency: int):
+    remaining = iter(range(logins))
+
+    async def worker():
+        for _ in remaining:
+            await verify("correct horse battery staple", hashed)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+async def run_mode(mode: str, args, hashed: str) -> dict:
+    if mode == "inline":
+        async def verify(plain, hashed_password):
+            return pwd_context.verify(plain, hashed_password)
+        hasher = None
+    else:
+        hasher = PasswordHasher(executor_type=mode, workers=args.workers, queue_size=args.logins)
+        verify = hasher.verify
+
+    latencies = []
+    stop = asyncio.Event()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        probe_task = asyncio.create_task(probe(client, stop, args.probe_interval, latencies))
+        started = time.perf_counter()
+        await login_traffic(verify, hashed, args.logins, args.concurrency)
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await probe_task
+
+    if hasher is not None:
+        hasher.shutdown()
+
+    return {
+        "mode": mode,
+        "logins": args.logins,
+        "logins_per_sec": round(args.logins / elapsed, 2),
+        "probes": len(latencies),
+        "probe_p50_ms": round(percentile(latencies, 50), 2),
+        "probe_p95_ms": round(percentile(latencies, 95), 2),
+        "probe_max_ms": round(max(latencies), 2),
+        "probe_mean_ms": round(statistics.mean(latencies), 2),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=40, help="password verifications per mode")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent login coroutines")
+    parser.add_argument("--workers", type=int, default=4, help="hasher pool size")
+    parser.add_argument("--probe-interval", type=float, default=0.005, help="seconds between health probes")
+    parser.add_argument("--modes", default="inline,thread,process", help="comma separated modes to run")
+    parser.add_argument("--json", dest="json_path", help="write results to this file")
+    args = parser.parse_args()
+
+    hashed = pwd_context.hash("correct horse battery staple")
+    results = []
+    for mode in args.modes.split(","):
+        result = await run_mode(mode.strip(), args, hashed)
+        results.append(result)
+        print(
+            f"{result['mode']:>8}: {result['logins_per_sec']:>7} logins/s | "
+            f"/api/health p50 {result['probe_p50_ms']} ms, p95 {result['probe_p95_ms']} ms, "
+            f"max {result['probe_max_ms']} ms over {result['probes']} probes"
+        )
+
+    if args.json_path:
+        with open(args.json_path, "w") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,134 @@
+"""OpenWeather call latency: a new HTTP client per call vs the shared pooled client.
+
+Starts benchmarks.stub_openweather on a local port and fetches current
+weather through both clients at the given concurrency:
+
+- per_call: a fresh httpx.AsyncClient per request, as WeatherService did
+  before it kept a shared client; every request opens a new connection
+- shared: app.services.weather_service.WeatherService, with keep-alive,
+  pool limits, timeouts and retries from the settings
+
+The stub is plain HTTP on localhost, so the saving shown is the TCP
+connect plus client setup. Against api.openweathermap.org each new
+connection also pays a TLS handshake over the real round trip.
+--failure-rate makes the stub answer that share of requests with a 503,
+which the shared client retries and the per-call one reports as errors.
+
+    cd Backend
+    python -m benchmarks.bench_weather_client --requests 500 --concurrency 10 --stub-latency-ms 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+
+import httpx
+
+from app.services.weather_service import WeatherService
+
+from .load_test import free_port, percentile, start_process, stop_processes, wait_ready
+
+PARAMS = {"lat": 22.62, "lon": 77.76, "units": "metric", "appid": "bench"}
+
+
+class PerCallClient:
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        self.connections_opened = 0
+
+    async def _trace(self, event, info):
+        if event == "connection.connect_tcp.complete":
+            self.connections_opened += 1
+
+    async def get_current_weather(self):
+        async with httpx.AsyncClient() as client:
+            response = await client.get(f"{self.base_url}/weather", params=PARAMS, extensions={"trace": self._trace})
+            response.raise_for_status()
+            return response.json()
+
+
+async def run_mode(mode: str, base_url: str, args) -> dict:
+    if mode == "per_call":
+        client = PerCallClient(base_url)
+    else:
+        client = WeatherService()
+        client.base_url = base_url
+        client.start()
+
+    latencies, errors = [], 0
+    remaining = iter(range(args.requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            try:
+                await client.get_current_weather()
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+
+    result = {
+        "mode": mode,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "errors": errors,
+        "rps": round(args.requests / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "mean_ms": round(statistics.mean(latencies), 2),
+        "connections_opened": client.connections_opened,
+    }
+    if mode == "shared":
+        result["retries"] = client.retried
+        result["pool"] = client.stats()
+        await client.close()
+    return result
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500, help="requests per mode")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--stub-latency-ms", type=float, default=0, help="delay added by the OpenWeather stub")
+    parser.add_argument("--failure-rate", type=float, default=0, help="share of stub responses that are 503s")
+    parser.add_argument("--modes", default="per_call,shared", help="comma separated modes to run")
+    parser.add_argument("--json", dest="json_path", help="write results to this file")
+    args = parser.parse_args()
+
+    port = free_port()
+    with tempfile.TemporaryDirectory() as workdir:
+        log = os.path.join(workdir, "stub.log")
+        stub = start_process(
+            ["benchmarks.stub_openweather:app", "--port", str(port)], log,
+            {"STUB_LATENCY_MS": str(args.stub_latency_ms), "STUB_FAILURE_RATE": str(args.failure_rate)},
+        )
+        try:
+            await wait_ready(f"http://127.0.0.1:{port}/docs", stub, log)
+            results = []
+            for mode in args.modes.split(","):
+                result = await run_mode(mode.strip(), f"http://127.0.0.1:{port}/data/2.5", args)
+                results.append(result)
+                print(
+                    f"{result['mode']:>8}: {result['rps']:>8} req/s | p50 {result['p50_ms']} ms, "
+                    f"p95 {result['p95_ms']} ms | {result['connections_opened']} connections opened, "
+                    f"{result['errors']} errors" + (f", {result['retries']} retries" if "retries" in result else "")
+                )
+        finally:
+            stop_processes([stub])
+
+    if args.json_path:
+        with open(args.json_path, "w") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
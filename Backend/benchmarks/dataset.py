@@ -0,0 +1,345 @@
+"""Synthetic scale datasets generated from the API schemas.
+
+Columns are drawn with NumPy, one vectorized call per field, from the
+fields of the pydantic models in app/schemas/schemas.py. Fields with a
+domain meaning get realistic generators: prices follow per-series random
+walks with a seasonal swing, weather follows the Indian seasons. Anything
+else falls back to a generator chosen by the field's type. Rows are built
+and bulk-loaded in chunks through Storage.insert_many, so memory stays
+bounded at millions of rows.
+
+Loads into the backend selected by STORAGE_BACKEND (and SQLITE_PATH):
+
+    cd Backend
+    STORAGE_BACKEND=sqlite SQLITE_PATH=/tmp/scale.db python -m benchmarks.dataset --scale medium
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Type
+
+import numpy as np
+from pydantic import BaseModel
+
+from app.schemas.schemas import (
+    CropBase, DiseaseBase, FarmBase, MarketPriceBase, UserBase, WeatherDataBase,
+)
+from app.rollups import rebuild_price_rollups
+from app.security import pwd_context
+from app.storage import Storage
+
+DAY_MS = 86_400_000
+
+DISTRICTS = np.array([
+    "Itarsi", "Bhopal", "Indore", "Jabalpur", "Gwalior", "Ujjain", "Sagar", "Rewa", "Satna", "Harda",
+    "Hoshangabad", "Vidisha", "Dewas", "Ratlam", "Mandsaur", "Neemuch", "Khandwa", "Khargone", "Betul",
+    "Chhindwara", "Seoni", "Balaghat", "Mandla", "Katni", "Damoh", "Chhatarpur", "Tikamgarh", "Shivpuri",
+    "Guna", "Morena", "Bhind", "Datia", "Raisen", "Sehore", "Shajapur", "Rajgarh", "Dhar", "Jhabua",
+    "Barwani", "Narsinghpur", "Nagpur", "Amravati", "Akola", "Jalgaon", "Nashik", "Kota", "Jhansi",
+])
+FIRST_NAMES = np.array(["Ramesh", "Suresh", "Sunita", "Anita", "Mahesh", "Geeta", "Rajesh", "Pooja",
+                        "Vijay", "Kavita", "Arjun", "Lakshmi", "Manoj", "Rekha", "Santosh", "Meena"])
+LAST_NAMES = np.array(["Patel", "Sharma", "Yadav", "Verma", "Singh", "Chouhan", "Rajput", "Meena",
+                       "Kushwaha", "Sahu", "Thakur", "Gupta"])
+SOIL_TYPES = np.array(["black", "alluvial", "red", "laterite", "sandy loam", "clay loam"])
+IRRIGATION_TYPES = np.array(["drip", "sprinkler", "canal", "tube well", "rainfed", "flood"])
+SEASONS = np.array(["kharif", "rabi", "zaid"])
+LANGUAGES = np.array(["hi", "en", "mr"])
+
+
+class Scale(NamedTuple):
+    users: int
+    farms: int
+    crops: int
+    diseases_per_crop: int
+    markets: int
+    # Fraction of crops each market trades; every traded (crop, market) pair gets a daily series
+    market_coverage: float
+    price_days: int
+    locations: int
+    weather_years: int
+
+    def price_rows(self) -> int:
+        return int(self.crops * self.markets * self.market_coverage) * self.price_days
+
+    def weather_rows(self) -> int:
+        return self.locations * self.weather_years * 365
+
+
+SCALES: Dict[str, Scale] = {
+    "tiny": Scale(200, 400, 12, 2, 10, 0.5, 60, 5, 1),
+    "small": Scale(2_000, 4_000, 40, 3, 50, 0.2, 180, 20, 1),
+    "medium": Scale(20_000, 50_000, 80, 3, 200, 0.2, 365, 100, 3),
+    "large": Scale(300_000, 600_000, 120, 4, 500, 0.2, 730, 300, 5),
+}
+
+
+# --- Column generators ---
+
+def _label(prefix: str, start: int, n: int) -> np.ndarray:
+    return np.char.add(prefix, np.arange(start, start + n).astype(str))
+
+
+def _names(vocabulary: np.ndarray, n: int) -> np.ndarray:
+    """Names from vocabulary, numbered once the vocabulary runs out."""
+    if n <= len(vocabulary):
+        return vocabulary[:n]
+    rounds = np.arange(n) // len(vocabulary)
+    base = np.resize(vocabulary, n)
+    return np.where(rounds == 0, base, np.char.add(np.char.add(base, " "), (rounds + 1).astype(str)))
+
+
+def _dates(n: int, rng: np.random.Generator, days: int = 365) -> np.ndarray:
+    now = np.datetime64(datetime.utcnow(), "ms")
+    return now - rng.integers(0, days * DAY_MS, n).astype("timedelta64[ms]")
+
+
+def default_column(annotation: Any, field: str, start: int, n: int, rng: np.random.Generator) -> np.ndarray:
+    """Generator chosen by the field's type, for fields without a specific one."""
+    if annotation is bool:
+        return rng.random(n) < 0.95
+    if annotation is int:
+        return rng.integers(1, 1_000, n)
+    if annotation is float:
+        return np.round(rng.uniform(0, 100, n), 2)
+    if annotation is datetime:
+        return _dates(n, rng)
+    return _label(f"{field} ", start, n)
+
+
+def generate_columns(model: Type[BaseModel], start: int, n: int, rng: np.random.Generator,
+                     overrides: Optional[Dict[str, Any]] = None) -> Dict[str, np.ndarray]:
+    """One column per field of model; overrides are arrays, scalars or callables(start, n, rng)."""
+    overrides = overrides or {}
+    columns = {}
+    for name, info in model.model_fields.items():
+        value = overrides.get(name)
+        if value is None:
+            value = default_column(info.annotation, name, start, n, rng)
+        elif callable(value):
+            value = value(start, n, rng)
+        columns[name] = value
+    return columns
+
+
+def to_documents(columns: Dict[str, Any], n: int, extra: Optional[Dict[str, Any]] = None) -> List[dict]:
+    """Turn columns into documents; tolist() converts NumPy scalars to Python types once per column."""
+    constants = dict(extra or {})
+    lists = {}
+    for name, column in columns.items():
+        if isinstance(column, np.ndarray):
+            if np.issubdtype(column.dtype, np.datetime64):
+                column = column.astype("datetime64[ms]")
+            lists[name] = column.tolist()
+        else:
+            constants[name] = column
+    names = list(lists)
+    return [{**dict(zip(names, values)), **constants} for values in zip(*lists.values())]
+
+
+# --- Per-collection generators ---
+
+def user_overrides(hashed_password: str) -> Dict[str, Any]:
+    return {
+        "email": lambda start, n, rng: np.char.add(_label("user", start, n), "@fasalsaathi.test"),
+        "phone": lambda start, n, rng: np.char.add("+91", (9_000_000_000 + np.arange(start, start + n)).astype(str)),
+        "full_name": lambda start, n, rng: np.char.add(
+            np.char.add(rng.choice(FIRST_NAMES, n), " "), rng.choice(LAST_NAMES, n)
+        ),
+        "language_preference": lambda start, n, rng: rng.choice(LANGUAGES, n, p=[0.6, 0.3, 0.1]),
+        "hashed_password": hashed_password,
+    }
+
+
+FARM_OVERRIDES = {
+    "name": lambda start, n, rng: _label("Farm ", start, n),
+    "location": lambda start, n, rng: rng.choice(DISTRICTS, n),
+    "area": lambda start, n, rng: np.round(rng.lognormal(1.0, 0.8, n), 2),
+    "soil_type": lambda start, n, rng: rng.choice(SOIL_TYPES, n),
+    "irrigation_type": lambda start, n, rng: rng.choice(IRRIGATION_TYPES, n),
+}
+
+
+CROP_OVERRIDES = {
+    "name": lambda start, n, rng: _label("Crop ", start, n),
+    "name_hindi": lambda start, n, rng: _label("Fasal ", start, n),
+    "scientific_name": lambda start, n, rng: _label("Cropus species ", start, n),
+    "season": lambda start, n, rng: rng.choice(SEASONS, n),
+    "duration": lambda start, n, rng: rng.integers(60, 180, n),
+    "water_requirement": lambda start, n, rng: np.round(rng.uniform(2, 12, n), 1),
+}
+
+
+def price_series(pairs: np.ndarray, crop_base: np.ndarray, market_factor: np.ndarray,
+                 days: int, rng: np.random.Generator) -> np.ndarray:
+    """Daily prices for each (crop, market) pair: base × random walk × seasonal swing."""
+    base = crop_base[pairs[:, 0]] * market_factor[pairs[:, 1]]
+    walk = np.cumsum(rng.normal(0, 0.01, (len(pairs), days)), axis=1)
+    day_of_year = (np.arange(days)[::-1] % 365)[None, :]
+    phase = rng.uniform(0, 365, (len(pairs), 1))
+    seasonal = 0.08 * np.sin(2 * np.pi * (day_of_year + phase) / 365)
+    return np.round(base[:, None] * np.exp(walk + seasonal), 2)
+
+
+def weather_columns(locations: np.ndarray, days: int, end: np.datetime64,
+                    rng: np.random.Generator) -> Dict[str, np.ndarray]:
+    """Daily readings per location with summer heat and monsoon rain."""
+    n = len(locations) * days
+    dates = end - (np.arange(days)[::-1] * DAY_MS).astype("timedelta64[ms]")
+    day_of_year = (dates.astype("datetime64[D]") - dates.astype("datetime64[Y]")).astype(int)
+    season = np.sin(2 * np.pi * (day_of_year - 80) / 365)
+    monsoon = np.exp(-((day_of_year - 200) / 40.0) ** 2)
+    offset = rng.normal(0, 2, (len(locations), 1))
+
+    temperature = 26 + 7 * season[None, :] + offset + rng.normal(0, 1.5, (len(locations), days))
+    humidity = np.clip(45 + 45 * monsoon[None, :] + rng.normal(0, 8, (len(locations), days)), 5, 100)
+    wet = rng.random((len(locations), days)) < 0.05 + 0.6 * monsoon[None, :]
+    rainfall = np.where(wet, rng.gamma(2.0, 6.0, (len(locations), days)), 0.0)
+    return {
+        "location": np.repeat(locations, days),
+        "temperature": np.round(temperature.ravel(), 1),
+        "humidity": np.round(humidity.ravel(), 1),
+        "rainfall": np.round(rainfall.ravel(), 1),
+        "wind_speed": np.round(rng.gamma(2.0, 1.5, n), 1),
+        "date": np.tile(dates, len(locations)),
+    }
+
+
+# --- Loading ---
+
+class Dataset(NamedTuple):
+    """Ids and keys of what was loaded, for benchmarks to sample from."""
+    user_ids: List[str]
+    emails: List[str]
+    farms: List[tuple]  # (farm_id, owner_id)
+    crop_ids: List[str]
+    markets: List[str]
+    locations: List[str]
+    price_rows: int
+    weather_rows: int
+
+
+async def _load_chunks(storage: Storage, collection: str, total: int, chunk_size: int,
+                       make: Callable[[int, int], List[dict]]) -> List[dict]:
+    loaded = []
+    for start in range(0, total, chunk_size):
+        documents = make(start, min(chunk_size, total - start))
+        await storage.insert_many(collection, documents)
+        loaded.extend(documents)
+    return loaded
+
+
+async def load(storage: Storage, scale: Scale, seed: int = 0, chunk_size: int = 50_000,
+               log: Callable[[str], None] = print) -> Dataset:
+    """Generate a dataset of the given scale and bulk load it into storage."""
+    rng = np.random.default_rng(seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    stamps = {"created_at": now, "updated_at": now}
+    # Every user gets the same password; hashing each one would dominate the load
+    hashed_password = pwd_context.hash("password123")
+
+    started = time.perf_counter()
+    users = await _load_chunks(storage, "users", scale.users, chunk_size, lambda start, n: to_documents(
+        generate_columns(UserBase, start, n, rng, user_overrides(hashed_password)), n, stamps
+    ))
+    user_ids = np.array([str(user["_id"]) for user in users])
+    log(f"users: {len(users)} in {time.perf_counter() - started:.1f}s")
+
+    def make_farms(start: int, n: int) -> List[dict]:
+        columns = generate_columns(FarmBase, start, n, rng, FARM_OVERRIDES)
+        columns["owner_id"] = user_ids[rng.integers(0, len(user_ids), n)]
+        return to_documents(columns, n, stamps)
+
+    started = time.perf_counter()
+    farms = await _load_chunks(storage, "farms", scale.farms, chunk_size, make_farms)
+    log(f"farms: {len(farms)} in {time.perf_counter() - started:.1f}s")
+
+    crops = to_documents(generate_columns(CropBase, 0, scale.crops, rng, CROP_OVERRIDES), scale.crops, stamps)
+    await storage.insert_many("crops", crops)
+    crop_ids = np.array([str(crop["_id"]) for crop in crops])
+
+    n_diseases = scale.crops * scale.diseases_per_crop
+    columns = generate_columns(DiseaseBase, 0, n_diseases, rng)
+    columns["crop_id"] = np.repeat(crop_ids, scale.diseases_per_crop)
+    await storage.insert_many("diseases", to_documents(columns, n_diseases, stamps))
+
+    # Market prices: one daily series per traded (crop, market) pair, newest day today
+    started = time.perf_counter()
+    markets = np.char.add(_names(DISTRICTS, scale.markets), " Mandi")
+    traded = rng.random((scale.crops, scale.markets)) < scale.market_coverage
+    pairs = np.argwhere(traded)
+    crop_base = rng.lognormal(np.log(2500), 0.6, scale.crops)
+    market_factor = rng.normal(1.0, 0.05, scale.markets)
+    today = np.datetime64(now.replace(hour=0, minute=0, second=0), "ms")
+    price_dates = today - (np.arange(scale.price_days)[::-1] * DAY_MS).astype("timedelta64[ms]")
+    series_per_chunk = max(1, chunk_size // scale.price_days)
+    price_rows = 0
+    for start in range(0, len(pairs), series_per_chunk):
+        chunk = pairs[start:start + series_per_chunk]
+        n = len(chunk) * scale.price_days
+        columns = generate_columns(MarketPriceBase, price_rows, n, rng, {
+            "market_name": np.repeat(markets[chunk[:, 1]], scale.price_days),
+            "price": price_series(chunk, crop_base, market_factor, scale.price_days, rng).ravel(),
+            "date": np.tile(price_dates, len(chunk)),
+        })
+        columns["crop_id"] = np.repeat(crop_ids[chunk[:, 0]], scale.price_days)
+        await storage.insert_many("market_prices", to_documents(columns, n, {"created_at": now}))
+        price_rows += n
+    log(f"market_prices: {price_rows} rows ({len(pairs)} series) in {time.perf_counter() - started:.1f}s")
+
+    # Bulk loads bypass crud.py, so build the rollups in one pass afterwards
+    started = time.perf_counter()
+    rollups = await rebuild_price_rollups(storage, batch_size=chunk_size)
+    log(f"price_rollups: {rollups} rows in {time.perf_counter() - started:.1f}s")
+
+    started = time.perf_counter()
+    locations = _names(DISTRICTS, scale.locations)
+    days = scale.weather_years * 365
+    locations_per_chunk = max(1, chunk_size // days)
+    weather_rows = 0
+    for start in range(0, len(locations), locations_per_chunk):
+        chunk = locations[start:start + locations_per_chunk]
+        n = len(chunk) * days
+        columns = generate_columns(WeatherDataBase, weather_rows, n, rng, weather_columns(chunk, days, today, rng))
+        await storage.insert_many("weather_data", to_documents(columns, n, {"created_at": now}))
+        weather_rows += n
+    log(f"weather_data: {weather_rows} rows in {time.perf_counter() - started:.1f}s")
+
+    return Dataset(
+        user_ids=user_ids.tolist(),
+        emails=[user["email"] for user in users],
+        farms=[(str(farm["_id"]), farm["owner_id"]) for farm in farms],
+        crop_ids=crop_ids.tolist(),
+        markets=markets.tolist(),
+        locations=locations.tolist(),
+        price_rows=price_rows,
+        weather_rows=weather_rows,
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-size", type=int, default=50_000, help="rows per insert_many call")
+    args = parser.parse_args()
+
+    from app.storage import create_storage
+
+    storage = create_storage()
+    scale = SCALES[args.scale]
+    print(f"Loading '{args.scale}' into {storage.name}: {scale.users} users, {scale.farms} farms, "
+          f"{scale.price_rows()} prices, {scale.weather_rows()} weather readings")
+    await storage.startup()
+    try:
+        started = time.perf_counter()
+        await load(storage, scale, seed=args.seed, chunk_size=args.chunk_size)
+        print(f"Done in {time.perf_counter() - started:.1f}s")
+    finally:
+        await storage.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
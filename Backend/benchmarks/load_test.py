@@ -0,0 +1,398 @@
+"""Per-route load test of the API against local stand-ins.
+
+Boots app.main:app under uvicorn on the embedded SQLite backend, with
+OpenWeather replaced by benchmarks/stub_openweather.py. It seeds users,
+crops, price and weather history through the API, then drives a weighted
+mix of requests at a fixed concurrency and reports p50/p95/p99 latency and
+requests/sec per route. Results are saved as JSON, tagged with the current
+commit, so runs can be compared across commits.
+
+    cd Backend
+    python -m benchmarks.load_test --duration 30 --concurrency 32 --json load.json
+    python -m benchmarks.load_test --mix "price_history=5,trends=1" --stub-latency-ms 40
+
+Pass --base-url to drive an already running server instead; it is seeded
+the same way. Login admission limits are raised for the booted server
+because every simulated client shares one IP.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+API = "/api/v1"
+PASSWORD = "bench-password-1"
+LOCATIONS = ["Itarsi", "Bhopal", "Indore"]
+MARKETS = ["Itarsi Mandi", "Bhopal Mandi", "Indore Mandi", "Harda Mandi", "Hoshangabad Mandi"]
+
+DEFAULT_MIX = (
+    "login=1,farm_crud=2,crops_list=3,price_history=3,trends=2,"
+    "current_prices=1,weather_current=2,weather_forecast=1,weather_history=1"
+)
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+class Recorder:
+    """Latency samples and error counts per route."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    async def request(self, client: httpx.AsyncClient, route: str, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.errors[route] += 1
+            return None
+        self.latencies[route].append((time.perf_counter() - started) * 1000)
+        if response.status_code >= 400:
+            self.errors[route] += 1
+            return None
+        return response
+
+    def summary(self, elapsed: float) -> dict:
+        routes = {}
+        for route in sorted(set(self.latencies) | set(self.errors)):
+            samples = self.latencies[route]
+            routes[route] = {
+                "requests": len(samples),
+                "errors": self.errors[route],
+                "rps": round(len(samples) / elapsed, 2),
+                "p50_ms": round(percentile(samples, 50), 2) if samples else None,
+                "p95_ms": round(percentile(samples, 95), 2) if samples else None,
+                "p99_ms": round(percentile(samples, 99), 2) if samples else None,
+                "max_ms": round(max(samples), 2) if samples else None,
+            }
+        total = sum(len(samples) for samples in self.latencies.values())
+        return {
+            "requests": total,
+            "errors": sum(self.errors.values()),
+            "rps": round(total / elapsed, 2),
+            "routes": routes,
+        }
+
+
+# --- Local stand-ins ---
+
+def start_process(args, log_path: str, env: dict) -> subprocess.Popen:
+    log = open(log_path, "w")
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", *args, "--host", "127.0.0.1", "--log-level", "warning"],
+        env={**os.environ, **env}, stdout=log, stderr=subprocess.STDOUT,
+    )
+
+
+async def wait_ready(url: str, process: subprocess.Popen, log_path: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                with open(log_path) as fh:
+                    raise RuntimeError(f"{url} exited during startup:\n{fh.read()[-2000:]}")
+            try:
+                if (await client.get(url)).status_code < 500:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} not ready after {timeout}s")
+
+
+async def boot_stand_ins(args, workdir: str):
+    """Start the OpenWeather stub and the API; returns (base_url, processes)."""
+    stub_port, api_port = free_port(), free_port()
+    stub_log = os.path.join(workdir, "stub.log")
+    api_log = os.path.join(workdir, "api.log")
+
+    stub = start_process(
+        ["benchmarks.stub_openweather:app", "--port", str(stub_port)], stub_log,
+        {"STUB_LATENCY_MS": str(args.stub_latency_ms)},
+    )
+    api = start_process(
+        ["app.main:app", "--port", str(api_port), "--workers", str(args.workers)], api_log,
+        {
+            "STORAGE_BACKEND": "sqlite",
+            "SQLITE_PATH": os.path.join(workdir, "bench.db"),
+            "WEATHER_API_BASE_URL": f"http://127.0.0.1:{stub_port}/data/2.5",
+            "BCRYPT_ROUNDS": str(args.bcrypt_rounds),
+            "LOGIN_RATE_PER_EMAIL_PER_MINUTE": "1000000",
+            "LOGIN_BURST_PER_EMAIL": "1000000",
+            "LOGIN_RATE_PER_IP_PER_MINUTE": "1000000",
+            "LOGIN_BURST_PER_IP": "1000000",
+        },
+    )
+    processes = [stub, api]
+    try:
+        await wait_ready(f"http://127.0.0.1:{stub_port}/docs", stub, stub_log)
+        await wait_ready(f"http://127.0.0.1:{api_port}/api/health", api, api_log)
+    except Exception:
+        stop_processes(processes)
+        raise
+    return f"http://127.0.0.1:{api_port}", processes
+
+
+def stop_processes(processes):
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+# --- Seeding ---
+
+async def seed(client: httpx.AsyncClient, args) -> dict:
+    """Create users, crops, prices and weather readings through the API."""
+    rng = random.Random(args.seed)
+    run_id = int(time.time())
+    users = []
+    for i in range(args.users):
+        email = f"bench{run_id}-{i}@example.com"
+        response = await client.post(f"{API}/register", json={
+            "email": email, "phone": f"{run_id % 10**6:06d}{i:04d}",
+            "full_name": f"Bench User {i}", "password": PASSWORD,
+        })
+        response.raise_for_status()
+        response = await client.post(f"{API}/token", data={"username": email, "password": PASSWORD})
+        response.raise_for_status()
+        users.append({"email": email, "token": response.json()["access_token"]})
+
+    headers = {"Authorization": f"Bearer {users[0]['token']}"}
+    crop_ids = []
+    for i in range(args.crops):
+        response = await client.post(f"{API}/crops/", headers=headers, json={
+            "name": f"Crop {i}", "name_hindi": f"Fasal {i}", "scientific_name": f"Cropus {i}",
+            "season": ["kharif", "rabi", "zaid"][i % 3], "duration": 90 + i, "water_requirement": 4.5,
+        })
+        response.raise_for_status()
+        crop_ids.append(response.json()["_id"])
+
+    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    semaphore = asyncio.Semaphore(16)
+
+    async def post(url, body):
+        async with semaphore:
+            (await client.post(url, headers=headers, json=body)).raise_for_status()
+
+    writes = []
+    for crop_id in crop_ids:
+        for day in range(args.history_days):
+            for market in MARKETS:
+                writes.append(post(f"{API}/market/prices", {
+                    "crop_id": crop_id, "market_name": market,
+                    "price": round(2000 + 300 * rng.random() - 5 * day, 2),
+                    "date": (today - timedelta(days=day)).isoformat(),
+                }))
+    for location in LOCATIONS:
+        for day in range(args.history_days):
+            writes.append(post(f"{API}/weather/", {
+                "location": location, "temperature": 25 + 5 * rng.random(),
+                "humidity": 60 + 20 * rng.random(), "rainfall": 3 * rng.random(),
+                "wind_speed": 2 + 3 * rng.random(),
+                "date": (today - timedelta(days=day)).isoformat(),
+            }))
+    await asyncio.gather(*writes)
+    return {"users": users, "crop_ids": crop_ids}
+
+
+# --- Scenario operations ---
+
+async def op_login(client, recorder, user, data, rng):
+    await recorder.request(client, "POST /token", "POST", f"{API}/token",
+                           data={"username": user["email"], "password": PASSWORD})
+
+
+async def op_farm_crud(client, recorder, user, data, rng):
+    headers = user["headers"]
+    body = {"name": "Bench Farm", "location": rng.choice(LOCATIONS), "area": round(rng.uniform(1, 20), 2),
+            "soil_type": "black", "irrigation_type": "drip"}
+    response = await recorder.request(client, "POST /farms", "POST", f"{API}/farms/", headers=headers, json=body)
+    if response is None:
+        return
+    farm_id = response.json()["_id"]
+    await recorder.request(client, "GET /farms/{id}", "GET", f"{API}/farms/{farm_id}", headers=headers)
+    await recorder.request(client, "PUT /farms/{id}", "PUT", f"{API}/farms/{farm_id}", headers=headers,
+                           json={**body, "area": body["area"] + 1})
+    await recorder.request(client, "GET /farms", "GET", f"{API}/farms/", headers=headers)
+    await recorder.request(client, "DELETE /farms/{id}", "DELETE", f"{API}/farms/{farm_id}", headers=headers)
+
+
+async def op_crops_list(client, recorder, user, data, rng):
+    await recorder.request(client, "GET /crops", "GET", f"{API}/crops/", headers=user["headers"])
+
+
+async def op_price_history(client, recorder, user, data, rng):
+    crop_id = rng.choice(data["crop_ids"])
+    await recorder.request(client, "GET /market/prices/history/{crop_id}", "GET",
+                           f"{API}/market/prices/history/{crop_id}", headers=user["headers"],
+                           params={"days": rng.choice([7, 30, 90])})
+
+
+async def op_trends(client, recorder, user, data, rng):
+    crop_id = rng.choice(data["crop_ids"])
+    await recorder.request(client, "GET /market/trends/{crop_id}", "GET",
+                           f"{API}/market/trends/{crop_id}", headers=user["headers"])
+
+
+async def op_current_prices(client, recorder, user, data, rng):
+    await recorder.request(client, "GET /market/prices/current", "GET",
+                           f"{API}/market/prices/current", headers=user["headers"])
+
+
+async def op_weather_current(client, recorder, user, data, rng):
+    await recorder.request(client, "GET /weather/current", "GET", f"{API}/weather/current",
+                           headers=user["headers"])
+
+
+async def op_weather_forecast(client, recorder, user, data, rng):
+    await recorder.request(client, "GET /weather/forecast", "GET", f"{API}/weather/forecast",
+                           headers=user["headers"])
+
+
+async def op_weather_history(client, recorder, user, data, rng):
+    location = rng.choice(LOCATIONS)
+    await recorder.request(client, "GET /weather/history/{location}", "GET",
+                           f"{API}/weather/history/{location}", headers=user["headers"])
+
+
+OPERATIONS = {
+    "login": op_login,
+    "farm_crud": op_farm_crud,
+    "crops_list": op_crops_list,
+    "price_history": op_price_history,
+    "trends": op_trends,
+    "current_prices": op_current_prices,
+    "weather_current": op_weather_current,
+    "weather_forecast": op_weather_forecast,
+    "weather_history": op_weather_history,
+}
+
+
+def parse_mix(mix: str) -> dict:
+    weights = {}
+    for item in mix.split(","):
+        name, _, weight = item.strip().partition("=")
+        if name not in OPERATIONS:
+            raise SystemExit(f"Unknown operation '{name}'; choose from {', '.join(OPERATIONS)}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+async def drive(client: httpx.AsyncClient, data: dict, weights: dict, args) -> dict:
+    recorder = Recorder()
+    names, cumulative = list(weights), list(weights.values())
+    deadline = time.monotonic() + args.duration
+    budget = iter(range(args.requests)) if args.requests else None
+
+    async def worker(index: int):
+        rng = random.Random(args.seed + index)
+        user = dict(data["users"][index % len(data["users"])])
+        user["headers"] = {"Authorization": f"Bearer {user['token']}"}
+        while time.monotonic() < deadline:
+            if budget is not None and next(budget, None) is None:
+                return
+            name = rng.choices(names, weights=cumulative)[0]
+            await OPERATIONS[name](client, recorder, user, data, rng)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(args.concurrency)))
+    return recorder.summary(time.perf_counter() - started)
+
+
+def print_summary(summary: dict):
+    print(f"{'route':<38} {'reqs':>7} {'err':>5} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for route, stats in summary["routes"].items():
+        print(
+            f"{route:<38} {stats['requests']:>7} {stats['errors']:>5} {stats['rps']:>8} "
+            f"{stats['p50_ms'] or '-':>8} {stats['p95_ms'] or '-':>8} {stats['p99_ms'] or '-':>8}"
+        )
+    print(f"{'total':<38} {summary['requests']:>7} {summary['errors']:>5} {summary['rps']:>8}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", help="drive a running server instead of booting one")
+    parser.add_argument("--duration", type=float, default=20, help="seconds of load")
+    parser.add_argument("--requests", type=int, default=0, help="stop after this many operations (0: duration only)")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent simulated clients")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="comma separated operation=weight pairs")
+    parser.add_argument("--users", type=int, default=8, help="users to register and spread clients over")
+    parser.add_argument("--crops", type=int, default=6, help="crops to create")
+    parser.add_argument("--history-days", type=int, default=90, help="days of price and weather history to seed")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the booted server")
+    parser.add_argument("--bcrypt-rounds", type=int, default=12, help="BCRYPT_ROUNDS for the booted server")
+    parser.add_argument("--stub-latency-ms", type=float, default=0, help="delay added by the OpenWeather stub")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for the request mix")
+    parser.add_argument("--json", dest="json_path", help="write results to this file")
+    args = parser.parse_args()
+    weights = parse_mix(args.mix)
+
+    processes = []
+    with tempfile.TemporaryDirectory(prefix="fasalsaathi-bench-") as workdir:
+        try:
+            if args.base_url:
+                base_url = args.base_url
+            else:
+                base_url, processes = await boot_stand_ins(args, workdir)
+            limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+            async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+                seed_started = time.perf_counter()
+                data = await seed(client, args)
+                print(f"Seeded {len(data['users'])} users, {len(data['crop_ids'])} crops and "
+                      f"{args.history_days} days of history in {time.perf_counter() - seed_started:.1f}s")
+                summary = await drive(client, data, weights, args)
+        finally:
+            stop_processes(processes)
+
+    print_summary(summary)
+    if args.json_path:
+        result = {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "config": {key: value for key, value in vars(args).items() if key != "json_path"},
+            **summary,
+        }
+        with open(args.json_path, "w") as fh:
+            json.dump(result, fh, indent=2)
+        print(f"Results written to {args.json_path}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,98 @@
+"""Stand-in for the OpenWeather 2.5 API used by the load benchmarks.
+
+Serves /data/2.5/weather and /data/2.5/forecast with payloads shaped like
+the real ones (the forecast has 40 three-hour slots). STUB_LATENCY_MS adds
+a fixed delay per response to model the upstream round trip, and
+STUB_FAILURE_RATE answers that fraction of requests with a 503.
+
+    cd Backend
+    STUB_LATENCY_MS=40 python -m uvicorn benchmarks.stub_openweather:app --port 8090
+"""
+
+import asyncio
+import math
+import os
+import random
+import time
+
+from fastapi import FastAPI, HTTPException, Query
+
+LATENCY_SECONDS = float(os.getenv("STUB_LATENCY_MS", "0")) / 1000
+FAILURE_RATE = float(os.getenv("STUB_FAILURE_RATE", "0"))
+
+app = FastAPI(title="OpenWeather stub")
+
+
+def _conditions(lat: float, lon: float, timestamp: int) -> dict:
+    # Deterministic but varying values so responses are not all identical
+    phase = (timestamp / 86400 + lat + lon) * 2 * math.pi
+    return {
+        "temp": round(27 + 6 * math.sin(phase), 2),
+        "feels_like": round(29 + 6 * math.sin(phase), 2),
+        "temp_min": round(24 + 5 * math.sin(phase), 2),
+        "temp_max": round(31 + 5 * math.sin(phase), 2),
+        "pressure": 1008,
+        "humidity": int(60 + 25 * math.cos(phase)),
+    }
+
+
+def _slot(lat: float, lon: float, timestamp: int) -> dict:
+    return {
+        "dt": timestamp,
+        "main": _conditions(lat, lon, timestamp),
+        "weather": [{"id": 802, "main": "Clouds", "description": "scattered clouds", "icon": "03d"}],
+        "clouds": {"all": 40},
+        "wind": {"speed": 3.4, "deg": 250, "gust": 5.1},
+        "visibility": 10000,
+        "pop": 0.2,
+        "rain": {"3h": 0.4},
+        "dt_txt": time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(timestamp)),
+    }
+
+
+async def _upstream_delay():
+    if LATENCY_SECONDS:
+        await asyncio.sleep(LATENCY_SECONDS)
+    if FAILURE_RATE and random.random() < FAILURE_RATE:
+        raise HTTPException(status_code=503, detail="stub failure")
+
+
+@app.get("/data/2.5/weather")
+async def current_weather(lat: float = Query(...), lon: float = Query(...), units: str = "metric", appid: str = ""):
+    await _upstream_delay()
+    now = int(time.time())
+    return {
+        "coord": {"lon": lon, "lat": lat},
+        "weather": [{"id": 800, "main": "Clear", "description": "clear sky", "icon": "01d"}],
+        "base": "stations",
+        "main": _conditions(lat, lon, now),
+        "visibility": 10000,
+        "wind": {"speed": 3.1, "deg": 240},
+        "clouds": {"all": 5},
+        "dt": now,
+        "sys": {"country": "IN", "sunrise": now - 21600, "sunset": now + 21600},
+        "timezone": 19800,
+        "id": 1269006,
+        "name": "Itarsi",
+        "cod": 200,
+    }
+
+
+@app.get("/data/2.5/forecast")
+async def forecast(lat: float = Query(...), lon: float = Query(...), units: str = "metric", appid: str = ""):
+    await _upstream_delay()
+    start = int(time.time()) // 10800 * 10800 + 10800
+    slots = [_slot(lat, lon, start + i * 10800) for i in range(40)]
+    return {
+        "cod": "200",
+        "message": 0,
+        "cnt": len(slots),
+        "list": slots,
+        "city": {
+            "id": 1269006,
+            "name": "Itarsi",
+            "coord": {"lat": lat, "lon": lon},
+            "country": "IN",
+            "timezone": 19800,
+        },
+    }
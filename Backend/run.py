@@ -1,16 +1,20 @@
 """FastAPI Backend Application
 
-This module initializes the FastAPI application with routers, middleware, and settings.
-Run this script to start the application server.
+Serves app.main:app with uvicorn. Everything is configured from the
+environment (see the Server Settings in .env.example):
+
+- WORKERS pre-forks that many worker processes (default: CPU count). Each
+  worker builds its own database and HTTP clients in the app lifespan.
+- On SIGTERM or SIGINT the workers stop accepting connections, finish
+  in-flight requests for up to GRACEFUL_SHUTDOWN_TIMEOUT seconds, then run
+  the lifespan shutdown and exit.
+- RELOAD=true runs a single auto-reloading worker for development.
 """
 
 import uvicorn
-import asyncio
 import logging
 import sys
-import os
 from app.config import Settings
-from app.main import app
 
 # Configure logging
 logging.basicConfig(
@@ -22,41 +26,34 @@ logger = logging.getLogger(__name__)
 # Load settings
 settings = Settings()
 
-class CustomServer(uvicorn.Server):
-    """Custom server class to handle graceful shutdown"""
-    def install_signal_handlers(self):
-        """Disable the default signal handlers"""
-        pass
-
-async def run_app():
-    """Run the FastAPI application server with async support"""
-    try:
-        config = uvicorn.Config(
-            app=app,
-            host="localhost",
-            port=8000,
-            log_level="debug",
-            reload=False,
-            workers=1,
-            loop="asyncio",
-            timeout_keep_alive=60,
-            access_log=True,
-            use_colors=True,
-            proxy_headers=True
-        )
-
-        server = CustomServer(config=config)
-        await server.serve()
-        logger.info("Server finished running")
-    except Exception as e:
-        logger.error("Error running server: %s", str(e))
-        raise
+def run_app():
+    """Run the FastAPI application server"""
+    workers = 1 if settings.RELOAD else max(1, settings.WORKERS)
+    logger.info(
+        f"Starting server on {settings.HOST}:{settings.PORT} with {workers} worker(s), "
+        f"graceful shutdown timeout {settings.GRACEFUL_SHUTDOWN_TIMEOUT}s"
+    )
+    # The app is passed as an import string so every worker process imports
+    # it, and opens its connections, on its own
+    uvicorn.run(
+        "app.main:app",
+        host=settings.HOST,
+        port=settings.PORT,
+        workers=workers,
+        reload=settings.RELOAD,
+        log_level=settings.LOG_LEVEL,
+        access_log=settings.ACCESS_LOG,
+        timeout_keep_alive=settings.KEEP_ALIVE_TIMEOUT,
+        timeout_graceful_shutdown=settings.GRACEFUL_SHUTDOWN_TIMEOUT,
+        loop="asyncio",
+        proxy_headers=True,
+        use_colors=True,
+    )
+    logger.info("Server finished running")
 
 if __name__ == "__main__":
     try:
-        asyncio.run(run_app())
-    except KeyboardInterrupt:
-        logger.info("Received keyboard interrupt, shutting down...")
+        run_app()
     except Exception as e:
         logger.error("Unexpected error: %s", str(e))
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
@@ -0,0 +1,23 @@
+import asyncio
+
+import pytest
+
+from app.storage.sqlite import SQLiteStorage
+
+
+@pytest.fixture
+def with_storage(tmp_path):
+    """Run an async scenario against a fresh SQLite database: with_storage(scenario) -> its result.
+
+    The storage is opened and closed inside the same event loop as the scenario.
+    """
+    def run(scenario):
+        async def main():
+            db = SQLiteStorage(str(tmp_path / "fasalsaathi.db"))
+            await db.startup()
+            try:
+                return await scenario(db)
+            finally:
+                await db.close()
+        return asyncio.run(main())
+    return run
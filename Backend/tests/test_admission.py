@@ -0,0 +1,69 @@
+import pytest
+
+from app import admission
+from app.admission import AdmissionRejected, LoginAdmission, TokenBuckets
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(admission.time, "monotonic", clock)
+    return clock
+
+
+def test_token_buckets_allow_a_burst_then_refill(clock):
+    buckets = TokenBuckets(rate_per_minute=6, burst=3, max_keys=10)
+    assert [buckets.try_acquire("k") for _ in range(3)] == [0, 0, 0]
+    assert buckets.try_acquire("k") == pytest.approx(10)
+    clock.now += 5
+    assert buckets.try_acquire("k") == pytest.approx(5)
+    clock.now += 5
+    assert buckets.try_acquire("k") == 0
+    # Other keys have their own bucket
+    assert buckets.try_acquire("other") == 0
+
+
+def test_token_buckets_never_exceed_the_burst(clock):
+    buckets = TokenBuckets(rate_per_minute=60, burst=2, max_keys=10)
+    buckets.try_acquire("k")
+    clock.now += 3600
+    assert [buckets.try_acquire("k") for _ in range(3)][-1] > 0
+
+
+def test_token_buckets_forget_idle_keys(clock):
+    buckets = TokenBuckets(rate_per_minute=1, burst=1, max_keys=2)
+    buckets.try_acquire("a")
+    buckets.try_acquire("b")
+    buckets.try_acquire("a")
+    buckets.try_acquire("c")
+    assert len(buckets) == 2
+    # "b" was the least recently used key, so it starts over with a full bucket
+    assert buckets.try_acquire("b") == 0
+    assert buckets.try_acquire("a") == 0
+
+
+def test_token_buckets_without_refill(clock):
+    buckets = TokenBuckets(rate_per_minute=0, burst=1, max_keys=10)
+    assert buckets.try_acquire("k") == 0
+    assert buckets.try_acquire("k") == 60
+
+
+def test_login_admission_applies_the_configured_limits_per_process(clock):
+    admission_control = LoginAdmission(email_rate_per_minute=10, email_burst=5, ip_rate_per_minute=60, ip_burst=20,
+                                       max_concurrent_verifications=1, max_keys=100)
+    # The whole burst is available in this process whatever the worker count
+    for _ in range(5):
+        admission_control.admit("token", "A@b.co ", "10.0.0.1")
+    with pytest.raises(AdmissionRejected) as rejected:
+        admission_control.admit("token", "a@b.co", "10.0.0.1")
+    assert rejected.value.retry_after == pytest.approx(6)
+    # Another account from the same address has its own bucket
+    admission_control.admit("token", "c@d.co", "10.0.0.1")
@@ -0,0 +1,68 @@
+import pytest
+
+from app import auth_cache, cache
+from app.cache import TTLCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache.time, "monotonic", clock)
+    return clock
+
+
+def test_ttl_cache_expires_entries(clock):
+    entries = TTLCache(max_entries=10, ttl_seconds=60)
+    entries.set("a", 1)
+    entries.set("b", 2, ttl_seconds=10)
+    clock.now += 30
+    assert entries.get("a") == 1
+    assert entries.get("b") is None
+    clock.now += 30
+    assert entries.get("a") is None
+    assert len(entries) == 0
+    assert entries.stats()["hits"] == 1
+    assert entries.stats()["misses"] == 2
+
+
+def test_ttl_cache_cannot_extend_the_default_ttl(clock):
+    entries = TTLCache(max_entries=10, ttl_seconds=60)
+    entries.set("a", 1, ttl_seconds=3600)
+    clock.now += 61
+    assert entries.get("a") is None
+
+
+def test_ttl_cache_evicts_least_recently_used(clock):
+    entries = TTLCache(max_entries=2, ttl_seconds=60)
+    entries.set("a", 1)
+    entries.set("b", 2)
+    entries.get("a")
+    entries.set("c", 3)
+    assert entries.get("b") is None
+    assert (entries.get("a"), entries.get("c")) == (1, 3)
+    assert entries.stats()["evictions"] == 1
+
+
+def test_ttl_cache_disabled():
+    for entries in (TTLCache(max_entries=0, ttl_seconds=60), TTLCache(max_entries=10, ttl_seconds=0)):
+        entries.set("a", 1)
+        assert len(entries) == 0
+        assert entries.get("a") is None
+
+
+def test_invalidate_user_drops_only_that_principal():
+    auth_cache.clear()
+    auth_cache.principal_cache.set("1", "alice")
+    auth_cache.principal_cache.set("2", "bob")
+    auth_cache.invalidate_user(1)
+    assert auth_cache.principal_cache.get("1") is None
+    assert auth_cache.principal_cache.get("2") == "bob"
+    auth_cache.clear()
@@ -0,0 +1,96 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException, Response
+from starlette.requests import Request
+
+from app.conditional import conditional_get, entity_tag, fingerprint, validators
+
+MODIFIED = datetime(2024, 3, 1, 12, 0, 0)
+
+
+def request(**headers):
+    raw = [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+
+def answers_304(request, key="k", modified=MODIFIED):
+    try:
+        conditional_get(request, Response(), "no-cache", key, modified)
+    except HTTPException as e:
+        assert e.status_code == 304
+        return True
+    return False
+
+
+def test_entity_tag_is_stable_and_quoted():
+    key = (3, MODIFIED, "a", "b")
+    assert entity_tag(key) == entity_tag(key)
+    assert entity_tag(key).startswith('"') and entity_tag(key).endswith('"')
+    assert entity_tag(key) != entity_tag((3, MODIFIED, "a", "c"))
+
+
+def test_fingerprint():
+    documents = [
+        {"_id": "a", "updated_at": MODIFIED, "price": 10.0},
+        {"_id": "b", "updated_at": MODIFIED + timedelta(days=1), "price": 2.5},
+        {"_id": "c", "updated_at": None, "price": None},
+    ]
+    assert fingerprint([]) == (0,)
+    assert fingerprint(documents) == (3, MODIFIED + timedelta(days=1), "a", "c")
+    assert fingerprint(documents, values="price")[-1] == (10.0, 2.5, None)
+
+
+def test_fingerprint_sees_corrections_that_cancel_out():
+    page = [{"_id": 1, "created_at": MODIFIED, "price": 100.0}, {"_id": 2, "created_at": MODIFIED, "price": 50.0}]
+    corrected = [{**page[0], "price": 90.0}, {**page[1], "price": 60.0}]
+    assert fingerprint(page, "created_at") == fingerprint(corrected, "created_at")
+    assert entity_tag(fingerprint(page, "created_at", values="price")) != \
+        entity_tag(fingerprint(corrected, "created_at", values="price"))
+
+
+def test_validators_last_modified_is_http_date():
+    headers = validators("k", "private, max-age=60", MODIFIED)
+    assert headers["Last-Modified"] == "Fri, 01 Mar 2024 12:00:00 GMT"
+    aware = MODIFIED.replace(tzinfo=timezone(timedelta(hours=5, minutes=30)))
+    assert validators("k", "no-cache", aware)["Last-Modified"] == "Fri, 01 Mar 2024 06:30:00 GMT"
+    assert "Last-Modified" not in validators("k", "no-cache")
+
+
+@pytest.mark.parametrize("if_none_match, fresh", [
+    ("{etag}", True),
+    ("W/{etag}", True),
+    ('"other", {etag}', True),
+    ("*", True),
+    ('"other"', False),
+])
+def test_if_none_match(if_none_match, fresh):
+    assert answers_304(request(if_none_match=if_none_match.format(etag=entity_tag("k")))) == fresh
+
+
+@pytest.mark.parametrize("if_modified_since, fresh", [
+    ("Fri, 01 Mar 2024 12:00:00 GMT", True),
+    ("Sat, 02 Mar 2024 00:00:00 GMT", True),
+    ("Fri, 01 Mar 2024 11:59:59 GMT", False),
+    ("not a date", False),
+])
+def test_if_modified_since(if_modified_since, fresh):
+    assert answers_304(request(if_modified_since=if_modified_since)) == fresh
+    assert not answers_304(request(if_modified_since=if_modified_since), modified=None)
+
+
+def test_if_none_match_takes_precedence_over_if_modified_since():
+    stale = request(if_none_match='"other"', if_modified_since="Sat, 02 Mar 2024 00:00:00 GMT")
+    assert not answers_304(stale)
+
+
+def test_conditional_get():
+    response = Response()
+    headers = conditional_get(request(), response, "no-cache", "k", MODIFIED)
+    assert response.headers["etag"] == headers["ETag"]
+    assert response.headers["cache-control"] == "no-cache"
+
+    with pytest.raises(HTTPException) as raised:
+        conditional_get(request(if_none_match=headers["ETag"]), Response(), "no-cache", "k", MODIFIED)
+    assert raised.value.status_code == 304
+    assert raised.value.headers == headers
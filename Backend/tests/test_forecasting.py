@@ -0,0 +1,153 @@
+import math
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.forecasting import (
+    PHI, SEASON, _GRID, ForecastScheduler, _holt_winters, _seasonal_naive, fit_forecasts, series_matrix,
+)
+
+BASE = datetime(2024, 1, 1)
+
+
+def rollup(crop_id, market_name, day, mean):
+    return {"crop_id": crop_id, "market_name": market_name, "start": BASE + timedelta(days=day), "mean": mean}
+
+
+def reference_holt_winters(series, horizon):
+    """Damped additive Holt-Winters for one series, one grid point at a time."""
+    best = None
+    for alpha, beta, gamma in _GRID:
+        level = sum(series[:SEASON]) / SEASON
+        trend = (sum(series[SEASON:2 * SEASON]) / SEASON - level) / SEASON
+        season = [value - level for value in series[:SEASON]]
+        sse = 0.0
+        for t, observed in enumerate(series):
+            seasonal = season[t % SEASON]
+            error = observed - (level + PHI * trend + seasonal)
+            if t >= SEASON:
+                sse += error * error
+            new_level = alpha * (observed - seasonal) + (1 - alpha) * (level + PHI * trend)
+            trend = beta * (new_level - level) + (1 - beta) * PHI * trend
+            season[t % SEASON] = gamma * (observed - new_level) + (1 - gamma) * seasonal
+            level = new_level
+        if best is None or sse < best[0]:
+            forecast = [
+                level + sum(PHI ** i for i in range(1, h + 1)) * trend + season[(len(series) + h - 1) % SEASON]
+                for h in range(1, horizon + 1)
+            ]
+            best = (sse, forecast)
+    sse, forecast = best
+    return forecast, math.sqrt(sse / (len(series) - SEASON))
+
+
+def seasonal_series(n, days, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(days)
+    level = rng.uniform(1000, 3000, (n, 1))
+    slope = rng.uniform(-5, 5, (n, 1))
+    weekly = rng.uniform(20, 100, (n, 1)) * np.sin(2 * np.pi * t / SEASON)
+    return level + slope * t + weekly + rng.normal(0, 15, (n, days))
+
+
+def test_series_matrix_forward_fills_gaps():
+    rows = [
+        rollup("wheat", "Indore", 2, 10.0),
+        rollup("wheat", "Indore", 3, 12.0),
+        rollup("wheat", "Indore", 6, 15.0),
+        rollup("rice", "Bhopal", 0, 7.0),
+        rollup("rice", "Bhopal", 4, 9.0),
+        rollup("rice", "Bhopal", 5, 8.0),
+    ]
+    matrix = series_matrix(rows, BASE, BASE + timedelta(days=7), min_days=3)
+    assert matrix.first_day == BASE
+    assert matrix.keys == [("rice", "Bhopal"), ("wheat", "Indore")]
+    # Leading days take the first observed price, later gaps the previous one
+    np.testing.assert_array_equal(matrix.values, [
+        [7, 7, 7, 7, 9, 8, 8, 8],
+        [10, 10, 10, 12, 12, 12, 15, 15],
+    ])
+
+
+def test_series_matrix_drops_short_series_and_out_of_window_rows():
+    rows = [
+        rollup("wheat", "Indore", 0, 10.0),
+        rollup("wheat", "Indore", 1, 11.0),
+        rollup("wheat", "Indore", 30, 99.0),
+        rollup("rice", "Bhopal", 0, 7.0),
+    ]
+    matrix = series_matrix(rows, BASE, BASE + timedelta(days=3), min_days=2)
+    assert matrix.keys == [("wheat", "Indore")]
+    np.testing.assert_array_equal(matrix.values, [[10, 11, 11, 11]])
+
+
+def test_series_matrix_without_rows():
+    matrix = series_matrix([], BASE, BASE + timedelta(days=4), min_days=1)
+    assert matrix.keys == []
+    assert matrix.values.shape == (0, 5)
+
+
+def test_holt_winters_matches_reference():
+    y = seasonal_series(4, 6 * SEASON)
+    forecast, rmse = _holt_winters(y, horizon=10)
+    assert forecast.shape == (4, 10)
+    for series, series_forecast, series_rmse in zip(y, forecast, rmse):
+        expected_forecast, expected_rmse = reference_holt_winters(series.tolist(), 10)
+        np.testing.assert_allclose(series_forecast, expected_forecast, rtol=1e-9)
+        assert series_rmse == pytest.approx(expected_rmse, rel=1e-9)
+
+
+def test_seasonal_naive_repeats_last_week():
+    y = np.arange(3 * SEASON, dtype=float)[None, :]
+    forecast, rmse = _seasonal_naive(y, horizon=SEASON + 2)
+    np.testing.assert_array_equal(forecast[0], np.r_[y[0, -SEASON:], y[0, -SEASON:-SEASON + 2]])
+    assert rmse[0] == pytest.approx(SEASON)
+
+
+def test_fit_forecasts_picks_the_better_model_on_the_holdout():
+    trending = seasonal_series(3, 8 * SEASON, seed=1)
+    # A series that repeats exactly every week is best served by the baseline
+    weekly = np.tile(np.array([10, 12, 11, 15, 14, 9, 8], dtype=float), 8)[None, :]
+    y = np.vstack([trending, weekly])
+    forecasts = fit_forecasts(y, horizon=14, holdout=SEASON)
+
+    assert forecasts.prices.shape == forecasts.spread.shape == (4, 14)
+    assert (forecasts.prices >= 0).all()
+    assert (np.diff(forecasts.spread, axis=1) >= 0).all()
+    assert not forecasts.holt_winters[3]
+    np.testing.assert_array_equal(forecasts.prices[3], weekly[0, -14:])
+    assert forecasts.baseline_mae[3] == 0
+    np.testing.assert_array_less(forecasts.mae, forecasts.baseline_mae + 1e-12)
+
+
+def test_fit_forecasts_without_series():
+    forecasts = fit_forecasts(np.empty((0, 60)), horizon=14, holdout=SEASON)
+    assert forecasts.prices.shape == (0, 14)
+    assert forecasts.holt_winters.shape == (0,)
+
+
+@pytest.mark.parametrize("interval_minutes, poll_seconds, interval, poll", [
+    (360, 60, 21600, 60),
+    (0, 60, 60, 60),
+    (-5, 0, 60, 1),
+])
+def test_scheduler_never_spins(interval_minutes, poll_seconds, interval, poll):
+    scheduler = ForecastScheduler(interval_minutes, poll_seconds)
+    assert (scheduler.interval, scheduler.poll) == (interval, poll)
+
+
+def test_lease_goes_to_one_holder_until_it_expires(with_storage):
+    async def scenario(db):
+        until = BASE + timedelta(hours=6)
+        return [
+            await db.acquire_lease("forecasts", "a", BASE, until),
+            await db.acquire_lease("forecasts", "b", BASE + timedelta(minutes=1), until),
+            # The holder renews its own lease
+            await db.acquire_lease("forecasts", "a", BASE + timedelta(hours=1), until + timedelta(hours=1)),
+            await db.acquire_lease("forecasts", "b", until + timedelta(minutes=1), until),
+            await db.acquire_lease("forecasts", "b", until + timedelta(hours=1, minutes=1), until + timedelta(hours=8)),
+            await db.acquire_lease("other", "b", BASE, until),
+        ]
+
+    assert with_storage(scenario) == [True, False, True, False, True, True]
@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+
+from app.ingest import _csv_rows, _lines, _ndjson_rows, ingest_format, ingest_market_prices
+
+
+async def _chunks(data, size):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+def parse(parser, data, size=7):
+    """Run a parser over data delivered in chunks of size bytes."""
+    async def collect():
+        return [row async for row in parser(_lines(_chunks(data, size)))]
+    return asyncio.run(collect())
+
+
+def lines(data, size=7):
+    async def collect():
+        return [line async for line in _lines(_chunks(data, size))]
+    return asyncio.run(collect())
+
+
+@pytest.mark.parametrize("content_type, requested, expected", [
+    ("text/csv; charset=utf-8", None, "csv"),
+    ("application/x-ndjson", None, "ndjson"),
+    ("APPLICATION/JSONL", None, "ndjson"),
+    ("application/json", None, None),
+    ("application/json", "csv", "csv"),
+])
+def test_ingest_format(content_type, requested, expected):
+    assert ingest_format(content_type, requested) == expected
+
+
+@pytest.mark.parametrize("size", [1, 2, 5, 1000])
+def test_lines_strip_bom_and_crlf_across_chunks(size):
+    data = "\ufeffa,b\r\nnamaste à,2\r\n\r\nlast".encode()
+    assert lines(data, size) == [(1, "a,b"), (2, "namaste à,2"), (3, ""), (4, "last")]
+
+
+def test_lines_report_invalid_utf8():
+    with pytest.raises(ValueError, match="after line 1"):
+        lines(b"a,b\n\xff\xfe\n", size=4)
+
+
+HEADER = "crop_id,market_name,price,date\r\n"
+
+
+@pytest.mark.parametrize("size", [1, 3, 1000])
+def test_csv_quoted_newlines_bom_and_crlf(size):
+    data = ("\ufeff" + HEADER
+            + 'c1,"Indore\r\nMandi",1200.5,2024-01-01\r\n'
+            + '\r\n'
+            + 'c2,"Azadpur, ""New"" Delhi",900,2024-01-02').encode()
+    assert parse(_csv_rows, data, size) == [
+        (2, {"crop_id": "c1", "market_name": "Indore\nMandi", "price": "1200.5", "date": "2024-01-01"}, None),
+        (5, {"crop_id": "c2", "market_name": 'Azadpur, "New" Delhi', "price": "900", "date": "2024-01-02"}, None),
+    ]
+
+
+def test_csv_bad_rows_are_reported_by_line():
+    data = (HEADER + "c1,Indore,10\n" + "c2,Indore,11,2024-01-01\n" + 'c3,"Bhopal,12,2024-01-01\n').encode()
+    assert parse(_csv_rows, data) == [
+        (2, None, "expected 4 fields, got 3"),
+        (3, {"crop_id": "c2", "market_name": "Indore", "price": "11", "date": "2024-01-01"}, None),
+        (4, None, "unterminated quoted field"),
+    ]
+
+
+def test_csv_header_columns_may_come_in_any_order():
+    data = b" date , price,market_name,crop_id,unit\n2024-01-01,5,Indore,c1,kg\n"
+    assert parse(_csv_rows, data) == [
+        (2, {"date": "2024-01-01", "price": "5", "market_name": "Indore", "crop_id": "c1", "unit": "kg"}, None),
+    ]
+
+
+def test_csv_missing_header_columns():
+    with pytest.raises(ValueError, match="missing columns: price, date"):
+        parse(_csv_rows, b"crop_id,market_name\nc1,Indore\n")
+
+
+def test_ndjson_rows():
+    data = ('\ufeff{"crop_id": "c1", "price": 5}\r\n'
+            '\n'
+            '{"crop_id": "c2",\n'
+            '[1, 2]\n'
+            '{"crop_id": "c3"}').encode()
+    rows = parse(_ndjson_rows, data)
+    assert rows[0] == (1, {"crop_id": "c1", "price": 5}, None)
+    assert rows[1][:2] == (3, None) and rows[1][2].startswith("invalid JSON")
+    assert rows[2] == (4, None, "expected a JSON object")
+    assert rows[3] == (5, {"crop_id": "c3"}, None)
+
+
+def test_ingest_upserts_and_reports_bad_rows(with_storage):
+    async def scenario(db):
+        crop = await db.insert_one("crops", {"name": "Wheat"})
+        feed = (HEADER
+                + f"{crop['_id']},Indore,2000,2024-03-01\r\n"
+                + f"{crop['_id']},Indore,not a price,2024-03-02\r\n"
+                + f"{crop['_id']},Bhopal,1900,2024-03-01\r\n"
+                # In the next chunk, so it updates the row just inserted
+                + f"{crop['_id']},Bhopal,1950,2024-03-01\r\n")
+        first = await ingest_market_prices(db, _chunks(feed.encode(), 16), "csv", chunk_size=2)
+        correction = f"{HEADER}{crop['_id']},Indore,2100,2024-03-01\r\n".encode()
+        second = await ingest_market_prices(db, _chunks(correction, 16), "csv")
+        prices = await db.get_latest_prices(None, str(crop["_id"]), 10)
+        return first, second, {price["market_name"]: price["price"] for price in prices}
+
+    first, second, latest = with_storage(scenario)
+    assert (first.rows, first.valid, first.failed) == (4, 3, 1)
+    assert first.errors[0].line == 3
+    assert first.errors[0].errors[0].startswith("price:")
+    assert (first.inserted, first.updated) == (2, 1)
+    assert (second.inserted, second.updated) == (0, 1)
+    assert latest == {"Bhopal": 1950.0, "Indore": 2100.0}
@@ -0,0 +1,114 @@
+import base64
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId, json_util
+
+from app import crud
+from app.pagination import ID_ORDER, NEWEST_FIRST, after_cursor, decode_cursor, encode_cursor
+
+
+def forge(position):
+    return base64.urlsafe_b64encode(json_util.dumps(position).encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("document_id", [ObjectId(), 42])
+def test_id_order_round_trip(document_id):
+    cursor = encode_cursor({"_id": document_id, "name": "ignored"}, ID_ORDER)
+    assert "=" not in cursor
+    assert decode_cursor(cursor, ID_ORDER) == {"_id": document_id}
+
+
+@pytest.mark.parametrize("document_id", [ObjectId(), 7])
+def test_newest_first_round_trip(document_id):
+    position = {"date": datetime(2024, 3, 1, 6, 30), "_id": document_id}
+    assert decode_cursor(encode_cursor(position, NEWEST_FIRST), NEWEST_FIRST) == position
+
+
+@pytest.mark.parametrize("sort, cursor", [
+    (ID_ORDER, forge({"_id": {"$gt": 0}})),
+    (ID_ORDER, forge({"_id": True})),
+    (ID_ORDER, forge({"_id": "abc"})),
+    (ID_ORDER, forge({"_id": [1, 2]})),
+    (ID_ORDER, forge({"_id": None})),
+    (ID_ORDER, forge({"_id": 1, "extra": 2})),
+    (ID_ORDER, forge([1])),
+    (NEWEST_FIRST, forge({"date": "2024-01-01", "_id": 1})),
+    (NEWEST_FIRST, forge({"date": {"$ne": None}, "_id": 1})),
+    (NEWEST_FIRST, forge({"date": datetime(2024, 1, 1)})),
+    (ID_ORDER, "!!not base64!!"),
+    (ID_ORDER, base64.urlsafe_b64encode(b"\xff\xfe").decode()),
+    (ID_ORDER, base64.urlsafe_b64encode(b"{not json").decode()),
+])
+def test_tampered_cursors_are_rejected(sort, cursor):
+    with pytest.raises(ValueError, match="Invalid pagination cursor"):
+        decode_cursor(cursor, sort)
+
+
+def test_cursor_for_another_order_is_rejected():
+    cursor = encode_cursor({"_id": 3}, ID_ORDER)
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, NEWEST_FIRST)
+
+
+def test_after_cursor_single_field():
+    assert after_cursor({"_id": 5}, ID_ORDER) == {"_id": {"$gt": 5}}
+
+
+def test_after_cursor_descending_compound():
+    day = datetime(2024, 3, 1)
+    assert after_cursor({"date": day, "_id": 9}, NEWEST_FIRST) == {"$or": [
+        {"date": {"$lt": day}},
+        {"date": day, "_id": {"$lt": 9}},
+    ]}
+
+
+def collect_pages(fetch, limit=2):
+    """All documents from following next cursors until the last page, and the page count."""
+    async def run():
+        documents, cursor, pages = [], None, 0
+        while True:
+            page, cursor = await fetch(cursor, limit)
+            documents.extend(page)
+            pages += 1
+            if cursor is None:
+                return documents, pages
+    return run()
+
+
+def test_sqlite_price_history_pages(with_storage):
+    now = datetime.utcnow().replace(microsecond=0)
+    # Sub-millisecond parts and two prices on the same date exercise the (date, _id) tie-break
+    dates = [now - timedelta(hours=hours, microseconds=123456) for hours in (1, 2, 2, 5, 9)]
+
+    async def scenario(db):
+        crop = await db.insert_one("crops", {"name": "Wheat", "season": "rabi"})
+        await db.insert_many("market_prices", [
+            {"crop_id": crop["_id"], "market_name": f"Market {i}", "price": 100.0 + i, "date": date, "created_at": now}
+            for i, date in enumerate(dates)
+        ])
+        return await collect_pages(
+            lambda cursor, limit: crud.get_price_history(db, crop["_id"], days=1, cursor=cursor, limit=limit)
+        )
+
+    documents, pages = with_storage(scenario)
+    assert pages == 3
+    assert [d["price"] for d in documents] == [100.0, 102.0, 101.0, 103.0, 104.0]
+    assert all(isinstance(d["date"], datetime) for d in documents)
+
+
+def test_sqlite_weather_history_pages(with_storage):
+    now = datetime.utcnow()
+
+    async def scenario(db):
+        await db.insert_many("weather_data", [
+            {"location": "Bhopal", "temperature": 20.0 + i, "date": now - timedelta(hours=i), "created_at": now}
+            for i in range(5)
+        ])
+        return await collect_pages(
+            lambda cursor, limit: crud.get_weather_history(db, "Bhopal", days=1, cursor=cursor, limit=limit)
+        )
+
+    documents, pages = with_storage(scenario)
+    assert pages == 3
+    assert [d["temperature"] for d in documents] == [20.0, 21.0, 22.0, 23.0, 24.0]
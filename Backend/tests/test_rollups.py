@@ -0,0 +1,73 @@
+from datetime import datetime
+
+import pytest
+
+from app import crud, schemas
+from app.rollups import period_end, period_for, period_start, rebuild_price_rollups
+
+SINCE = datetime(2023, 1, 1)
+
+
+@pytest.mark.parametrize("period, start, end", [
+    ("day", datetime(2024, 2, 29), datetime(2024, 3, 1)),
+    ("week", datetime(2024, 2, 26), datetime(2024, 3, 4)),
+    ("month", datetime(2024, 2, 1), datetime(2024, 3, 1)),
+])
+def test_periods(period, start, end):
+    assert period_start(datetime(2024, 2, 29, 23, 59), period) == start
+    assert period_end(start, period) == end
+
+
+def test_month_end_rolls_over_the_year():
+    assert period_end(datetime(2024, 12, 1), "month") == datetime(2025, 1, 1)
+    assert [period_for(days) for days in (30, 365, 1000)] == ["day", "week", "month"]
+
+
+def price(crop_id, market_name, value, date):
+    return schemas.MarketPriceCreate(crop_id=crop_id, market_name=market_name, price=value, date=date)
+
+
+def summary(rollups):
+    return {(r["market_name"], r["start"]): (r["min"], r["max"], r["mean"], r["last"], r["count"]) for r in rollups}
+
+
+def test_rollups_follow_inserts_and_upserts(with_storage):
+    async def scenario(db):
+        crop_id = str((await db.insert_one("crops", {"name": "Wheat"}))["_id"])
+        await crud.create_market_price(db, price(crop_id, "Indore", 100, datetime(2024, 3, 4, 9)))
+        await crud.create_market_price(db, price(crop_id, "Indore", 120, datetime(2024, 3, 5, 9)))
+        await crud.create_market_price(db, price(crop_id, "Bhopal", 90, datetime(2024, 2, 28, 9)))
+        # A correction rewrites an existing price; its rollups must be recomputed, not added to
+        await crud.upsert_market_prices(db, [price(crop_id, "Indore", 140, datetime(2024, 3, 5, 9))])
+
+        rollups = {period: summary(await db.get_price_rollups(crop_id, period, SINCE, None))
+                   for period in ("day", "week", "month")}
+        latest = {p["market_name"]: p["price"] for p in await db.get_latest_prices(None, crop_id, 10)}
+        markets = await db.get_markets()
+
+        await rebuild_price_rollups(db)
+        rebuilt = {period: summary(await db.get_price_rollups(crop_id, period, SINCE, None))
+                   for period in ("day", "week", "month")}
+        return rollups, latest, markets, rebuilt
+
+    rollups, latest, markets, rebuilt = with_storage(scenario)
+    assert rollups["day"] == {
+        ("Indore", datetime(2024, 3, 4)): (100, 100, 100, 100, 1),
+        ("Indore", datetime(2024, 3, 5)): (140, 140, 140, 140, 1),
+        ("Bhopal", datetime(2024, 2, 28)): (90, 90, 90, 90, 1),
+    }
+    assert rollups["week"] == {
+        ("Indore", datetime(2024, 3, 4)): (100, 140, 120, 140, 2),
+        ("Bhopal", datetime(2024, 2, 26)): (90, 90, 90, 90, 1),
+    }
+    assert rollups["month"] == {
+        ("Indore", datetime(2024, 3, 1)): (100, 140, 120, 140, 2),
+        ("Bhopal", datetime(2024, 2, 1)): (90, 90, 90, 90, 1),
+    }
+    assert latest == {"Indore": 140, "Bhopal": 90}
+    assert [(m["name"], m["price_count"], m["last_price_date"]) for m in markets] == [
+        ("Bhopal", 1, datetime(2024, 2, 28, 9)),
+        ("Indore", 2, datetime(2024, 3, 5, 9)),
+    ]
+    # A full rebuild from market_prices agrees with the incremental refreshes
+    assert rebuilt == rollups
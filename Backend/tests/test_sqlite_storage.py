@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.storage.base import DuplicateRecord
+from app.storage.sqlite import to_db_value
+
+NOW = datetime(2024, 3, 1, 12, 30, 15, 250000)
+
+
+def user(email, phone=None):
+    return {"email": email, "phone": phone, "hashed_password": "x", "full_name": "A", "is_active": True,
+            "created_at": NOW, "updated_at": NOW}
+
+
+def test_to_db_value_orders_like_time():
+    aware = datetime(2024, 3, 1, 18, 0, tzinfo=timezone(timedelta(hours=5, minutes=30)))
+    assert to_db_value(aware) == "2024-03-01 12:30:00.000000"
+    assert to_db_value(NOW.replace(microsecond=123456)) == "2024-03-01 12:30:15.123000"
+    assert to_db_value(True) == 1
+    assert to_db_value(datetime(2024, 1, 1, 9)) < to_db_value(datetime(2024, 1, 1, 10))
+
+
+def test_users_round_trip(with_storage):
+    async def scenario(db):
+        created = await db.insert_one("users", user("a@b.co", "123"))
+        return created, await db.get_user(str(created["_id"])), await db.get_user_by_email("a@b.co")
+
+    created, by_id, by_email = with_storage(scenario)
+    assert by_id == by_email
+    assert by_id["_id"] == created["_id"]
+    assert by_id["created_at"] == NOW
+    assert by_id["is_active"] is True
+
+
+def test_unparseable_ids_find_nothing(with_storage):
+    async def scenario(db):
+        return await db.get_user("not-an-id"), await db.get_farm("1", "x"), await db.delete_farm("x", "1")
+
+    assert with_storage(scenario) == (None, None, False)
+
+
+def test_duplicates_name_the_field(with_storage):
+    async def scenario(db):
+        await db.insert_one("users", user("a@b.co", "123"))
+        second = await db.insert_one("users", user("c@d.co", "456"))
+        with pytest.raises(DuplicateRecord) as on_insert:
+            await db.insert_one("users", user("a@b.co", "789"))
+        with pytest.raises(DuplicateRecord) as on_update:
+            await db.update_user(str(second["_id"]), {"phone": "123"})
+        return on_insert.value.field, on_update.value.field
+
+    assert with_storage(scenario) == ("email", "phone")
+
+
+def test_insert_many_is_all_or_nothing(with_storage):
+    async def scenario(db):
+        stored = await db.insert_many("users", [user("a@b.co"), user("c@d.co")])
+        with pytest.raises(DuplicateRecord):
+            await db.insert_many("users", [user("e@f.co"), user("a@b.co")])
+        return stored, await db.get_user_by_email("e@f.co")
+
+    stored, rolled_back = with_storage(scenario)
+    assert [document["_id"] for document in stored] == [1, 2]
+    assert rolled_back is None
+
+
+def test_farms_are_scoped_to_their_owner(with_storage):
+    async def scenario(db):
+        owner = await db.insert_one("users", user("a@b.co"))
+        other = await db.insert_one("users", user("c@d.co"))
+        farm = await db.insert_one("farms", {"name": "North", "area": 2.5, "owner_id": owner["_id"],
+                                             "created_at": NOW, "updated_at": NOW})
+        farm_id, owner_id, other_id = str(farm["_id"]), str(owner["_id"]), str(other["_id"])
+        results = [
+            await db.update_farm(farm_id, other_id, {"name": "Taken"}),
+            await db.delete_farm(farm_id, other_id),
+            await db.update_farm(farm_id, owner_id, {"name": "South", "updated_at": NOW + timedelta(days=1)}),
+        ]
+        farms, cursor = await db.get_farms_by_owner(owner_id, None, 10, {"name": 1})
+        results += [farms, cursor, await db.delete_farm(farm_id, owner_id), await db.get_farm(farm_id, owner_id)]
+        return results
+
+    taken, deleted_by_other, updated, farms, cursor, deleted, gone = with_storage(scenario)
+    assert taken is None and deleted_by_other is False
+    assert updated["name"] == "South"
+    assert updated["updated_at"] == NOW + timedelta(days=1)
+    assert farms == [{"_id": 1, "name": "South"}]
+    assert cursor is None
+    assert deleted is True and gone is None
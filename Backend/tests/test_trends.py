@@ -0,0 +1,123 @@
+import math
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.trends import trend_statistics
+
+BASE = datetime(2024, 1, 1)
+
+
+def reference_statistics(rows):
+    """Per-crop figures computed one series at a time in plain Python."""
+    results = {}
+    for crop_id in sorted({row[0] for row in rows}):
+        crop_rows = [row for row in rows if row[0] == crop_id]
+        count = sum(row[8] for row in crop_rows)
+        daily = {}
+        for _, _, start, _, _, mean, _, _, n in crop_rows:
+            total, weight = daily.get(start, (0.0, 0))
+            daily[start] = (total + mean * n, weight + n)
+        days = sorted(daily)
+        prices = [daily[day][0] / daily[day][1] for day in days]
+
+        def trailing(i, window):
+            values = [p for d, p in zip(days, prices) if days[i] - timedelta(days=window - 1) <= d <= days[i]]
+            return sum(values) / len(values)
+
+        changes = [(b - a) / a for a, b in zip(prices, prices[1:]) if a > 0]
+        if len(changes) >= 2:
+            mean_change = sum(changes) / len(changes)
+            volatility = math.sqrt(sum((c - mean_change) ** 2 for c in changes) / (len(changes) - 1)) * 100
+        else:
+            volatility = None
+
+        markets = []
+        for market_name in sorted({row[1] for row in crop_rows}):
+            market_rows = sorted((row for row in crop_rows if row[1] == market_name), key=lambda row: row[2])
+            market_count = sum(row[8] for row in market_rows)
+            markets.append({
+                "market_name": market_name,
+                "first_price": market_rows[0][5],
+                "current_price": market_rows[-1][6],
+                "average_price": sum(row[5] * row[8] for row in market_rows) / market_count,
+                "min_price": min(row[3] for row in market_rows),
+                "max_price": max(row[4] for row in market_rows),
+                "count": market_count,
+            })
+
+        results[crop_id] = {
+            "current_price": max(crop_rows, key=lambda row: row[7])[6],
+            "first_price": prices[0],
+            "average_price": sum(row[5] * row[8] for row in crop_rows) / count,
+            "volatility": volatility,
+            "count": count,
+            "markets": markets,
+            "series": [
+                {"date": day, "price": price, "ma_7": trailing(i, 7), "ma_30": trailing(i, 30)}
+                for i, (day, price) in enumerate(zip(days, prices))
+            ],
+        }
+    return results
+
+
+def random_rows(seed, crops=3, markets=3, days=60):
+    rng = random.Random(seed)
+    rows = []
+    for crop in range(crops):
+        for market in range(markets):
+            for day in range(days):
+                # Leave gaps so the moving averages span calendar days, not rows
+                if rng.random() < 0.3:
+                    continue
+                start = BASE + timedelta(days=day)
+                low = rng.uniform(1000, 2000)
+                high = low + rng.uniform(0, 500)
+                rows.append((f"crop{crop}", f"market{market}", start, low, high, rng.uniform(low, high),
+                             rng.uniform(low, high), start + timedelta(hours=rng.randrange(24)),
+                             rng.randrange(1, 5)))
+    rng.shuffle(rows)
+    return rows
+
+
+def assert_close(actual, expected):
+    if isinstance(expected, dict):
+        assert actual.keys() == expected.keys()
+        for key in expected:
+            assert_close(actual[key], expected[key])
+    elif isinstance(expected, list):
+        assert len(actual) == len(expected)
+        for a, e in zip(actual, expected):
+            assert_close(a, e)
+    elif isinstance(expected, float):
+        assert actual == pytest.approx(expected, rel=1e-9)
+    else:
+        assert actual == expected
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_matches_reference(seed):
+    rows = random_rows(seed)
+    assert_close(trend_statistics(rows), reference_statistics(rows))
+
+
+def test_empty_rows():
+    assert trend_statistics([]) == {}
+
+
+def test_single_day_has_no_volatility():
+    rows = [("wheat", "Indore", BASE, 10.0, 12.0, 11.0, 11.5, BASE, 2)]
+    stats = trend_statistics(rows)["wheat"]
+    assert stats["volatility"] is None
+    assert stats["series"] == [{"date": BASE, "price": 11.0, "ma_7": 11.0, "ma_30": 11.0}]
+
+
+def test_iso_string_dates():
+    rows = [
+        ("wheat", "Indore", "2024-01-01T00:00:00", 10.0, 10.0, 10.0, 10.0, "2024-01-01T10:00:00", 1),
+        ("wheat", "Indore", "2024-01-02T00:00:00", 20.0, 20.0, 20.0, 20.0, "2024-01-02T10:00:00", 1),
+    ]
+    stats = trend_statistics(rows)["wheat"]
+    assert stats["current_price"] == 20.0
+    assert [point["date"] for point in stats["series"]] == [BASE, BASE + timedelta(days=1)]
@@ -0,0 +1,61 @@
+from datetime import datetime, timezone
+
+from app.services.weather_service import summarize_forecast, trim_forecast
+
+# 2024-03-01 00:00 UTC
+START = int(datetime(2024, 3, 1, tzinfo=timezone.utc).timestamp())
+IST = 19800
+
+
+def slot(hours, temp, humidity=None, rain=None, pop=0.0, condition="Clear"):
+    main = {"temp": temp}
+    if humidity is not None:
+        main["humidity"] = humidity
+    entry = {"dt": START + hours * 3600, "main": main, "pop": pop, "weather": [{"main": condition}]}
+    if rain is not None:
+        entry["rain"] = {"3h": rain}
+    return entry
+
+
+def payload(slots, offset=IST):
+    return {"city": {"name": "Bhopal", "timezone": offset, "coord": {"lat": 23.2, "lon": 77.4}},
+            "cnt": len(slots), "list": slots}
+
+
+def test_summarize_groups_slots_by_local_day():
+    # In IST the UTC day starts at 05:30, so slots from 18:30 UTC fall on the next local day
+    slots = [slot(h, 20 + h, humidity=50 + h, rain=1.0, pop=h / 100, condition="Rain" if h < 6 else "Clear")
+             for h in range(0, 48, 3)]
+    summary = summarize_forecast(payload(slots[::-1]), days=2)
+    assert (summary["location"], summary["timezone_offset"]) == ("Bhopal", IST)
+    first, second = summary["days"]
+    assert first == {
+        "date": "2024-03-01", "temp_min": 20, "temp_max": 38, "humidity_min": 50, "humidity_max": 68,
+        "humidity_mean": 59.0, "rain_total": 7.0, "pop_max": 0.18, "condition": "Clear", "slots": 7,
+    }
+    assert second["date"] == "2024-03-02"
+    assert second["slots"] == 8
+    assert second["temp_min"] == 41
+
+
+def test_missing_readings_become_none():
+    slots = [slot(0, 20), slot(3, 22), slot(24, 25, humidity=40)]
+    first, second = summarize_forecast(payload(slots, offset=0), days=5)["days"]
+    assert first["humidity_min"] is None
+    assert first["humidity_max"] is None
+    assert first["humidity_mean"] is None
+    assert first["rain_total"] == 0
+    assert second["humidity_mean"] == 40.0
+
+
+def test_trim_matches_summary_days():
+    slots = [slot(h, 20) for h in range(0, 120, 3)]
+    trimmed = trim_forecast(payload(slots), days=2)
+    summary = summarize_forecast(payload(slots), days=2)
+    assert trimmed["cnt"] == len(trimmed["list"]) == sum(day["slots"] for day in summary["days"])
+    assert trimmed["city"]["name"] == "Bhopal"
+
+
+def test_empty_forecast():
+    assert summarize_forecast({}, days=3)["days"] == []
+    assert trim_forecast(payload([]), days=3)["list"] == []
@@ -0,0 +1,164 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from app.storage.base import DuplicateRecord
+from app.write_behind import CollectionBuffer
+
+NOW = datetime(2024, 3, 1)
+
+
+class RecordingStorage:
+    """insert_many that records each batch and fails as told."""
+
+    def __init__(self, failures=()):
+        self.batches = []
+        self.failures = list(failures)
+
+    async def insert_many(self, collection, documents):
+        if self.failures:
+            raise self.failures.pop(0)
+        self.batches.append([document["n"] for document in documents])
+        return documents
+
+
+def run(scenario):
+    return asyncio.run(scenario())
+
+
+def test_flushes_full_batches_then_the_rest_on_stop():
+    storage, flushed = RecordingStorage(), []
+
+    async def after_flush(db, documents):
+        flushed.extend(document["n"] for document in documents)
+
+    async def scenario():
+        buffer = CollectionBuffer("weather_data", batch_size=3, flush_interval=60, max_queue=100)
+        buffer.start(storage, after_flush)
+        for n in range(7):
+            await buffer.put({"n": n}, timeout=1)
+        await buffer.stop()
+        return buffer.stats()
+
+    stats = run(scenario)
+    assert storage.batches == [[0, 1, 2], [3, 4, 5], [6]]
+    assert flushed == list(range(7))
+    assert (stats["flushes"], stats["flushed_documents"], stats["queue_depth"]) == (3, 7, 0)
+
+
+def test_flushes_a_partial_batch_after_the_interval():
+    storage = RecordingStorage()
+
+    async def scenario():
+        buffer = CollectionBuffer("weather_data", batch_size=100, flush_interval=0.02, max_queue=100)
+        buffer.start(storage)
+        await buffer.put({"n": 1}, timeout=1)
+        await buffer.put({"n": 2}, timeout=1)
+        await asyncio.sleep(0.2)
+        batches = list(storage.batches)
+        await buffer.stop()
+        return batches
+
+    assert run(scenario) == [[1, 2]]
+
+
+def test_a_trickle_loses_nothing():
+    storage = RecordingStorage()
+
+    async def scenario():
+        buffer = CollectionBuffer("weather_data", batch_size=4, flush_interval=0.005, max_queue=100)
+        buffer.start(storage)
+        for n in range(30):
+            await buffer.put({"n": n}, timeout=1)
+            await asyncio.sleep(0.002 * (n % 4))
+        await buffer.stop()
+
+    run(scenario)
+    assert [n for batch in storage.batches for n in batch] == list(range(30))
+
+
+def test_full_queue_rejects_after_the_timeout():
+    async def scenario():
+        buffer = CollectionBuffer("weather_data", batch_size=10, flush_interval=60, max_queue=1)
+        await buffer.put({"n": 1}, timeout=0.01)
+        try:
+            await buffer.put({"n": 2}, timeout=0.01)
+        except Exception as e:
+            return type(e).__name__, buffer.stats()["rejected"]
+
+    assert run(scenario) == ("WriteQueueFull", 1)
+
+
+def test_transient_errors_are_retried():
+    storage = RecordingStorage(failures=[RuntimeError("database is locked")] * 2)
+
+    async def scenario():
+        buffer = CollectionBuffer("weather_data", batch_size=2, flush_interval=60, max_queue=100,
+                                  retries=2, retry_backoff=0.001)
+        buffer.start(storage)
+        for n in range(2):
+            await buffer.put({"n": n}, timeout=1)
+        await buffer.stop()
+        return buffer.stats()
+
+    stats = run(scenario)
+    assert storage.batches == [[0, 1]]
+    assert (stats["flush_retries"], stats["failed_documents"]) == (2, 0)
+
+
+def test_a_batch_is_dropped_after_the_last_retry():
+    storage = RecordingStorage(failures=[RuntimeError("down")] * 3)
+
+    async def scenario():
+        buffer = CollectionBuffer("weather_data", batch_size=2, flush_interval=60, max_queue=100,
+                                  retries=1, retry_backoff=0.001)
+        buffer.start(storage)
+        for n in range(4):
+            await buffer.put({"n": n}, timeout=1)
+        await buffer.stop()
+        return buffer.stats()
+
+    stats = run(scenario)
+    # The first batch fails twice; the second fails once, then goes through
+    assert storage.batches == [[2, 3]]
+    assert (stats["failed_documents"], stats["flushed_documents"]) == (2, 2)
+
+
+def test_rejected_duplicates_are_dropped_alone():
+    storage = RecordingStorage(failures=[DuplicateRecord("duplicate key", rejected=[1, 3])])
+    flushed = []
+
+    async def after_flush(db, documents):
+        flushed.extend(document["n"] for document in documents)
+
+    async def scenario():
+        buffer = CollectionBuffer("market_prices", batch_size=5, flush_interval=60, max_queue=100)
+        buffer.start(storage, after_flush)
+        for n in range(5):
+            await buffer.put({"n": n}, timeout=1)
+        await buffer.stop()
+        return buffer.stats()
+
+    stats = run(scenario)
+    assert flushed == [0, 2, 4]
+    assert (stats["duplicate_documents"], stats["flushed_documents"]) == (2, 3)
+
+
+def test_sqlite_batches_are_split_around_duplicates(with_storage):
+    async def scenario(db):
+        crop = await db.insert_one("crops", {"name": "Wheat"})
+        await db.insert_one("market_prices", {"crop_id": crop["_id"], "market_name": "Indore", "price": 1.0,
+                                              "date": NOW, "created_at": NOW})
+        buffer = CollectionBuffer("market_prices", batch_size=10, flush_interval=60, max_queue=100)
+        buffer.start(db)
+        for day in range(10):
+            # Day 5 reuses day 0's date, and a price for that date is already stored
+            await buffer.put({"crop_id": crop["_id"], "market_name": "Indore", "price": 2.0,
+                              "date": NOW + timedelta(days=0 if day == 5 else day),
+                              "created_at": NOW}, timeout=1)
+        await buffer.stop()
+        prices, _ = await db.get_price_history(str(crop["_id"]), NOW, None, 100)
+        return buffer.stats(), prices
+
+    stats, prices = with_storage(scenario)
+    assert (stats["flushed_documents"], stats["duplicate_documents"]) == (8, 2)
+    assert len(prices) == 9
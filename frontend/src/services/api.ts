@@ -5,7 +5,7 @@ import axios, {
     InternalAxiosRequestConfig,
     AxiosRequestConfig
 } from 'axios';
-import { User, Farm, Crop, Disease, SoilTest, WeatherData, MarketPrice } from '../types/api';
+import { User, Farm, Crop, Disease, SoilTest, WeatherData, MarketPrice, MarketTrends, Page } from '../types/api';
 
 // Error interface for backend responses
 interface ApiError {
@@ -101,8 +101,8 @@ export const authApi = {
 
 // Farm API
 export const farmApi = {
-    getAllFarms: () => 
-        apiClient.get<Farm[]>('/farms'),
+    getAllFarms: (cursor?: string) => 
+        apiClient.get<Page<Farm>>('/farms', { params: { cursor } }),
     
     getFarmById: (id: number) => 
         apiClient.get<Farm>(`/farms/${id}`),
@@ -179,9 +179,9 @@ export const marketApi = {
                 throw error;
             }),
     
-    getPriceHistory: (cropId: number, days: number = 30) => 
-        apiClient.get<MarketPrice[]>(`/market/prices/history/${cropId}`, {
-            params: { days }
+    getPriceHistory: (cropId: number, days: number = 30, cursor?: string) => 
+        apiClient.get<Page<MarketPrice>>(`/market/prices/history/${cropId}`, {
+            params: { days, cursor }
         })
             .then(response => response.data)
             .catch((error: AxiosError<ApiError>) => {
@@ -198,13 +198,7 @@ export const marketApi = {
             }),
     
     getMarketTrends: (cropId: number) => 
-        apiClient.get<{
-            trend: string;
-            current_price: number;
-            average_price: number;
-            price_change: number;
-            forecast: string;
-        }>(`/market/trends/${cropId}`)
+        apiClient.get<MarketTrends>(`/market/trends/${cropId}`)
             .then(response => response.data)
             .catch((error: AxiosError<ApiError>) => {
                 console.error('Error fetching market trends:', error.response?.data?.detail);
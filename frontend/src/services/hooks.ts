@@ -25,7 +25,7 @@ export const useCurrentUser = () => {
 export const useFarms = () => {
     return useQuery({
         queryKey: ['farms'],
-        queryFn: farmApi.getAllFarms
+        queryFn: () => farmApi.getAllFarms()
     });
 };
 
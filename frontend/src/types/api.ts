@@ -86,4 +86,56 @@ export interface MarketPrice {
     price: number;
     date: string;
     created_at: string;
-}
\ No newline at end of file
+}
+
+// Cursor-paginated list response; pass next_cursor back as `cursor` for the next page
+export interface Page<T> {
+    items: T[];
+    next_cursor: string | null;
+}
+
+// One day of a price forecast with its 95% interval
+export interface ForecastPoint {
+    date: string;
+    price: number;
+    lower: number;
+    upper: number;
+}
+
+// Stored forecast for one market; model is "holt_winters" or "seasonal_naive"
+export interface MarketForecast {
+    market_name: string;
+    model: string;
+    generated_at: string;
+    mae: number | null;
+    baseline_mae: number | null;
+    points: ForecastPoint[];
+}
+
+export interface TrendPoint {
+    date: string;
+    price: number;
+    ma_7: number;
+    ma_30: number;
+}
+
+export interface MarketTrendBreakdown {
+    market_name: string;
+    current_price: number;
+    average_price: number;
+    min_price: number;
+    max_price: number;
+    price_change: number | null;
+    count: number;
+}
+
+export interface MarketTrends {
+    trend: string;
+    current_price: number | null;
+    average_price: number | null;
+    price_change: number | null;
+    volatility: number | null;
+    markets: MarketTrendBreakdown[];
+    series: TrendPoint[];
+    forecast: MarketForecast[];
+}